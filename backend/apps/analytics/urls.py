@@ -3,8 +3,9 @@ URL routing for analytics app
 """
 
 from django.urls import path
-from .views import DashboardAnalyticsView
+from .views import DashboardAnalyticsView, RecommendationCacheStatsView
 
 urlpatterns = [
     path('dashboard/', DashboardAnalyticsView.as_view(), name='dashboard-analytics'),
+    path('recommendation-cache/', RecommendationCacheStatsView.as_view(), name='recommendation-cache-stats'),
 ]
\ No newline at end of file
@@ -4,13 +4,14 @@ Analytics views for dashboard metrics
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.db.models import Count, Q, Sum
 from datetime import timedelta
 from apps.floors.models import FloorPlan, Room
-from apps.bookings.models import Booking
+from apps.bookings.models import Booking, RoomUsageBucket
 from apps.floors.models import ConflictLog
+from apps.bookings.services.recommendation_cache import recommendation_cache
 
 
 class DashboardAnalyticsView(APIView):
@@ -23,15 +24,20 @@ class DashboardAnalyticsView(APIView):
         """Get dashboard metrics"""
         user = request.user
         now = timezone.now()
-        today = now.date()
+        today = timezone.localdate()
         
         if user.is_staff:
             # Admin metrics
             metrics = {
                 'rooms_booked': Booking.objects.filter(status='CONFIRMED').count(),
-                'bookings_today': Booking.objects.filter(
-                    start_time__date=today, status='CONFIRMED'
-                ).count(),
+                # Daily usage buckets instead of counting Booking rows
+                'bookings_today': RoomUsageBucket.objects.filter(
+                    day=today
+                ).aggregate(total=Sum('bookings'))['total'] or 0,
+                'bookings_last_7_days': RoomUsageBucket.objects.filter(
+                    day__gt=today - timedelta(days=7),
+                    day__lte=today
+                ).aggregate(total=Sum('bookings'))['total'] or 0,
                 'conflicts_pending': ConflictLog.objects.filter(
                     manually_resolved_by__isnull=True
                 ).count(),
@@ -52,4 +58,15 @@ class DashboardAnalyticsView(APIView):
                 ).count(),
             }
         
-        return Response(metrics)
\ No newline at end of file
+        return Response(metrics)
+
+
+class RecommendationCacheStatsView(APIView):
+    """
+    Hit/miss counters of this worker's recommendation cache
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """Get cache counters"""
+        return Response(recommendation_cache.stats())
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Booking, UserRoomPreference
+from .models import Booking, BookingSeries, UserRoomPreference
 
 
 @admin.register(Booking)
@@ -9,6 +9,13 @@ class BookingAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'room__name']
 
 
+@admin.register(BookingSeries)
+class BookingSeriesAdmin(admin.ModelAdmin):
+    list_display = ['room', 'user', 'start_time', 'end_time', 'frequency', 'interval', 'until', 'status']
+    list_filter = ['status', 'frequency']
+    search_fields = ['user__username', 'room__name']
+
+
 @admin.register(UserRoomPreference)
 class UserRoomPreferenceAdmin(admin.ModelAdmin):
     list_display = ['user', 'room', 'booking_count', 'last_booked']
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class BookingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.bookings'  # Important: full path
\ No newline at end of file
+    name = 'apps.bookings'  # Important: full path
+
+    def ready(self):
+        from . import signals  # noqa: F401  (connects Booking signal handlers)
+        from . import checks  # noqa: F401  (registers system checks)
\ No newline at end of file
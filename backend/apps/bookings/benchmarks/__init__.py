@@ -0,0 +1,5 @@
+"""
+FEATURE 3: Recommendation benchmark suite
+Synthetic campus generation and request replay used by
+manage.py benchmark_recommendations
+"""
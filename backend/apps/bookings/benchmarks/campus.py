@@ -0,0 +1,285 @@
+"""
+FEATURE 3: Synthetic campus generator
+Floors, rooms with a realistic mix of types, capacities and amenities,
+users with home floors, and months of bookings, written with bulk inserts
+(PostgreSQL COPY for bookings)
+"""
+
+import io
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from itertools import islice
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.floors.models import AMENITIES, FloorPlan, Room
+from ..models import Booking, RoomUsageBucket
+
+# Room type -> (share of rooms, capacity range, probability of each amenity
+# in AMENITIES order: projector, whiteboard, video conference, TV/monitor,
+# premium audio, natural light, kitchen access)
+ROOM_PROFILES = {
+    'PHONE_BOOTH': (0.20, (1, 2), (0.00, 0.05, 0.30, 0.10, 0.00, 0.20, 0.00)),
+    'HUDDLE': (0.35, (3, 6), (0.10, 0.70, 0.40, 0.60, 0.05, 0.40, 0.10)),
+    'MEETING': (0.30, (6, 14), (0.50, 0.90, 0.70, 0.80, 0.20, 0.50, 0.15)),
+    'CONFERENCE': (0.15, (14, 40), (0.90, 0.90, 0.90, 0.70, 0.60, 0.60, 0.30)),
+}
+
+USERNAME_PREFIX = 'bench-user-'
+
+# Bookings fall on weekdays, in half-hour slots between these hours (UTC)
+DAY_START, DAY_END = time(8), time(18)
+SLOT_MINUTES = 30
+
+# Booking columns written by the generator, in row order
+BOOKING_FIELDS = ('room', 'user', 'start_time', 'end_time', 'participants_count', 'status')
+
+
+class CampusGenerator:
+    """
+    Deterministic for a given seed. Bookings cover `months` of history up to
+    today plus `future_days` ahead; each user books rooms on their home
+    floor most of the time, so preferences and floor affinity are
+    realistic. Derived tables (preferences, usage buckets) are rebuilt from
+    the bookings at the end, as after any bulk import.
+
+    Rows go in through bulk_create / COPY, so no model signals run and no
+    django-simple-history rows are written for the generated floors and
+    rooms. With `bookings` set, the booking rate is derived from it and
+    generation stops at exactly that many rows (fewer if the office hours
+    fill up).
+    """
+
+    HOME_FLOOR_SHARE = 0.8
+    CANCELLED_SHARE = 0.1
+
+    def __init__(
+        self,
+        floors: int,
+        rooms: int,
+        users: int,
+        months: int,
+        seed: int = 0,
+        bookings_per_room_day: float = 3.0,
+        future_days: int = 14,
+        batch_size: int = 5000,
+        bookings: Optional[int] = None,
+        use_copy: bool = True,
+        derived: bool = True
+    ):
+        self.floors = floors
+        self.rooms = rooms
+        self.users = users
+        self.months = months
+        self.bookings_per_room_day = bookings_per_room_day
+        self.future_days = future_days
+        self.batch_size = batch_size
+        self.bookings = bookings
+        self.use_copy = use_copy
+        self.derived = derived
+        self.rng = np.random.default_rng(seed)
+        self.timings: Dict[str, float] = {}
+
+    def generate(self) -> Dict[str, int]:
+        """Write the campus and return the number of rows per model"""
+        with transaction.atomic():
+            floor_plans = self._timed('floors', self._create_floor_plans)
+            rooms = self._timed('rooms', self._create_rooms, floor_plans)
+            users, home_floors = self._timed('users', self._create_users)
+            bookings = self._timed('bookings', self._create_bookings, rooms, users, home_floors)
+
+        if self.derived:
+            self._timed(
+                'preferences', call_command,
+                'backfill_preference_decay', chunk_size=self.batch_size, stdout=io.StringIO()
+            )
+            self._timed('usage buckets', RoomUsageBucket.rebuild, batch_size=self.batch_size)
+        return {'floors': len(floor_plans), 'rooms': len(rooms), 'users': len(users), 'bookings': bookings}
+
+    def _timed(self, phase: str, function, *args, **kwargs):
+        started = perf_counter()
+        result = function(*args, **kwargs)
+        self.timings[phase] = perf_counter() - started
+        return result
+
+    def _create_floor_plans(self) -> List[FloorPlan]:
+        return FloorPlan.objects.bulk_create([
+            FloorPlan(name=f'Floor {number}', floor_number=number)
+            for number in range(1, self.floors + 1)
+        ])
+
+    def _create_rooms(self, floor_plans: List[FloorPlan]) -> List[Room]:
+        types = list(ROOM_PROFILES)
+        shares = np.array([ROOM_PROFILES[name][0] for name in types])
+        room_types = self.rng.choice(len(types), size=self.rooms, p=shares / shares.sum())
+        floors = self.rng.integers(0, len(floor_plans), self.rooms)
+
+        rooms = []
+        for number, (type_index, floor_index) in enumerate(zip(room_types.tolist(), floors.tolist())):
+            room_type = types[type_index]
+            _, (low, high), amenity_odds = ROOM_PROFILES[room_type]
+            room = Room(
+                floor_plan=floor_plans[floor_index],
+                name=f'{room_type.replace("_", " ").title()} {number}',
+                room_number=f'{floor_index + 1}-{number:05d}',
+                room_type=room_type,
+                capacity=int(self.rng.integers(low, high + 1)),
+                location_x=float(self.rng.uniform(0, 100)),
+                location_y=float(self.rng.uniform(0, 60)),
+                is_under_maintenance=bool(self.rng.random() < 0.01),
+            )
+            for (key, field, label), odds in zip(AMENITIES, amenity_odds):
+                setattr(room, field, bool(self.rng.random() < odds))
+            # bulk_create bypasses Room.save
+            room.amenity_mask = room.compute_amenity_mask()
+            rooms.append(room)
+        return Room.objects.bulk_create(rooms, batch_size=self.batch_size)
+
+    def _create_users(self):
+        users = User.objects.bulk_create(
+            [User(username=f'{USERNAME_PREFIX}{number}', password='!') for number in range(self.users)],
+            batch_size=self.batch_size
+        )
+        if users and users[0].pk is None:
+            # Backends that do not return primary keys from bulk inserts
+            users = list(User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id'))
+        home_floors = self.rng.integers(0, self.floors, len(users))
+        return users, home_floors
+
+    def _booking_days(self) -> List[date]:
+        """Weekdays from `months` ago to `future_days` ahead"""
+        today = timezone.now().date()
+        first_day = today - timedelta(days=30 * self.months)
+        return [
+            first_day + timedelta(days=offset)
+            for offset in range((today - first_day).days + self.future_days + 1)
+            if (first_day + timedelta(days=offset)).weekday() < 5
+        ]
+
+    def _create_bookings(self, rooms: List[Room], users: List[User], home_floors: np.ndarray) -> int:
+        user_ids = np.array([user.pk for user in users], dtype=np.int64)
+        # Floor plans are numbered 1..floors; home_floors holds 0-based indexes
+        users_by_floor = {number: user_ids[home_floors == number - 1] for number in range(1, self.floors + 1)}
+        days = self._booking_days()
+
+        rate = self.bookings_per_room_day
+        if self.bookings is not None:
+            rate = self.bookings / max(len(rooms) * len(days), 1)
+
+        rows = self._booking_rows(rooms, user_ids, users_by_floor, days, rate)
+        if self.bookings is not None:
+            rows = islice(rows, self.bookings)
+        return self._write_bookings(rows)
+
+    def _booking_rows(
+        self,
+        rooms: List[Room],
+        user_ids: np.ndarray,
+        users_by_floor: Dict[int, np.ndarray],
+        days: List[date],
+        rate: float
+    ) -> Iterator[Tuple]:
+        """
+        Rows in BOOKING_FIELDS order, room by room; every random draw for a
+        room is made at once as arrays
+        """
+        slots_per_day = int((DAY_END.hour - DAY_START.hour) * 60 / SLOT_MINUTES)
+        day_starts = [datetime.combine(day, DAY_START, tzinfo=dt_timezone.utc) for day in days]
+        slot = timedelta(minutes=SLOT_MINUTES)
+
+        for room in rooms:
+            counts = self.rng.poisson(rate, len(days))
+            total = int(counts.sum())
+            if not total:
+                continue
+
+            bookers = user_ids[self.rng.integers(0, len(user_ids), total)]
+            neighbours = users_by_floor[room.floor_plan.floor_number]
+            if len(neighbours):
+                bookers = np.where(
+                    self.rng.random(total) < self.HOME_FLOOR_SHARE,
+                    neighbours[self.rng.integers(0, len(neighbours), total)],
+                    bookers
+                )
+            lengths = self.rng.integers(1, 5, total).tolist()
+            gaps = self.rng.integers(0, 4, total).tolist()
+            participants = self.rng.integers(1, room.capacity + 1, total).tolist()
+            cancelled = (self.rng.random(total) < self.CANCELLED_SHARE).tolist()
+            first_slots = self.rng.integers(0, 4, len(days)).tolist()
+            bookers = bookers.tolist()
+
+            index = 0
+            for day_index, count in enumerate(counts.tolist()):
+                current = first_slots[day_index]
+                for position in range(index, index + count):
+                    if current + lengths[position] > slots_per_day:
+                        break
+                    start_time = day_starts[day_index] + current * slot
+                    yield (
+                        room.pk,
+                        bookers[position],
+                        start_time,
+                        start_time + lengths[position] * slot,
+                        participants[position],
+                        'CANCELLED' if cancelled[position] else 'CONFIRMED',
+                    )
+                    current += lengths[position] + gaps[position]
+                index += count
+
+    def _write_bookings(self, rows: Iterable[Tuple]) -> int:
+        """Insert rows in batches: COPY on PostgreSQL, bulk_create elsewhere"""
+        if self.use_copy and connection.vendor == 'postgresql':
+            write = self._copy_bookings
+        else:
+            write = self._bulk_create_bookings
+
+        rows = iter(rows)
+        created = 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return created
+            write(batch)
+            created += len(batch)
+
+    @staticmethod
+    def _bulk_create_bookings(batch: List[Tuple]):
+        Booking.objects.bulk_create([
+            Booking(
+                room_id=room_id,
+                user_id=user_id,
+                start_time=start_time,
+                end_time=end_time,
+                participants_count=participants_count,
+                status=status,
+            )
+            for room_id, user_id, start_time, end_time, participants_count, status in batch
+        ])
+
+    @staticmethod
+    def _copy_bookings(batch: List[Tuple]):
+        """One COPY ... FROM STDIN (CSV) per batch; purpose is written as an empty string"""
+        created_at = timezone.now().isoformat()
+        buffer = io.StringIO()
+        for room_id, user_id, start_time, end_time, participants_count, status in batch:
+            buffer.write(
+                f'{room_id},{user_id},{start_time.isoformat()},{end_time.isoformat()},'
+                f'{participants_count},{status},"",{created_at}\n'
+            )
+        buffer.seek(0)
+
+        quote = connection.ops.quote_name
+        columns = ', '.join(
+            quote(Booking._meta.get_field(name).column)
+            for name in BOOKING_FIELDS + ('purpose', 'created_at')
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {quote(Booking._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
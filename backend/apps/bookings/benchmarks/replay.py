@@ -0,0 +1,243 @@
+"""
+FEATURE 3: Request replay
+Synthetic or recorded streams of recommend and book requests, replayed
+against RoomRecommendationEngine with per-request latency and query counts
+"""
+
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from apps.floors.models import AMENITIES
+from apps.floors.services.room_catalog import room_catalog
+from ..models import Booking
+from ..services.availability_index import booking_index
+from ..services.recommendation_cache import RecommendationCache, recommendation_cache
+from ..services.recommendation_engine import RoomRecommendationEngine
+from .campus import USERNAME_PREFIX
+
+# Share of requests that ask for each amenity (AMENITIES order)
+AMENITY_REQUEST_ODDS = (0.25, 0.15, 0.30, 0.10, 0.03, 0.05, 0.02)
+
+
+def synthetic_stream(
+    count: int,
+    users: int,
+    floors: int,
+    seed: int = 0,
+    book_share: float = 0.3
+) -> List[Dict[str, Any]]:
+    """
+    `count` recommend requests for the next two weeks of office hours;
+    after book_share of them the same user books the top recommendation
+
+    Users are referred to by their index in the generated campus, and times
+    by minutes from the start of the replay, so streams can be saved and
+    replayed against any campus generated with the same sizes.
+    """
+    rng = np.random.default_rng(seed)
+    events = []
+    for _ in range(count):
+        user = int(rng.integers(0, users))
+        day = int(rng.integers(1, 15))
+        event = {
+            'op': 'recommend',
+            'user': user,
+            'participants_count': int(min(rng.geometric(0.25), 30)),
+            'start_in_minutes': day * 24 * 60 + int(rng.integers(0, 20)) * 30,
+            'duration_minutes': int(rng.choice([30, 60, 60, 90, 120])),
+            'required_amenities': [
+                key for (key, field, label), odds in zip(AMENITIES, AMENITY_REQUEST_ODDS)
+                if rng.random() < odds
+            ],
+            'preferred_floor': int(rng.integers(1, floors + 1)) if rng.random() < 0.2 else None,
+        }
+        events.append(event)
+        if rng.random() < book_share:
+            events.append({'op': 'book', 'user': user})
+    return events
+
+
+def save_stream(path: Path, events: List[Dict[str, Any]]):
+    """One JSON event per line"""
+    with open(path, 'w') as stream:
+        for event in events:
+            stream.write(json.dumps(event) + '\n')
+
+
+def load_stream(path: Path) -> List[Dict[str, Any]]:
+    with open(path) as stream:
+        return [json.loads(line) for line in stream if line.strip()]
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting queries
+
+    CaptureQueriesContext reads connection.queries_log, which keeps only
+    the last 9000 queries: past that every request would count as none.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class ReplayRunner:
+    """
+    Replays events in order and records latency and queries per request
+
+    `book` events book the top room of the user's previous recommend
+    request for the same window, through Booking.objects.create so the
+    usual signals (index, cache invalidation, usage buckets, preferences)
+    run; a booking the database rejects as overlapping counts as done, as
+    a 409 would for a client. The first `warmup` events are executed but
+    not measured.
+
+    The room catalog and booking interval index are loaded before the first
+    event, as a serving process has them, and the index reload that runs on
+    request_finished runs after each event, outside the timing.
+    """
+
+    def __init__(self, engine=RoomRecommendationEngine, use_cache: bool = False):
+        self.engine = engine
+        self.use_cache = use_cache
+
+    def run(self, events: List[Dict[str, Any]], warmup: int = 0) -> Dict[str, Any]:
+        users = list(User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id'))
+        if not users:
+            raise ValueError("No generated campus users found")
+        now = timezone.now().replace(second=0, microsecond=0)
+
+        samples: Dict[str, List[tuple]] = {}
+        last_recommendation: Dict[int, Optional[tuple]] = {}
+        measured_seconds = 0.0
+        room_catalog.reload()
+        self._sync_index()
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            for position, event in enumerate(events):
+                queries_before = queries.count
+                started = time.perf_counter()
+                if event['op'] == 'recommend':
+                    last_recommendation[event['user']] = self._recommend(users, now, event)
+                elif event['op'] == 'book':
+                    self._book(users, last_recommendation.pop(event['user'], None), event)
+                else:
+                    raise ValueError(f"Unknown op: {event['op']}")
+                elapsed = time.perf_counter() - started
+                query_count = queries.count - queries_before
+                self._sync_index()
+                if position >= warmup:
+                    measured_seconds += elapsed
+                    samples.setdefault(event['op'], []).append((elapsed, query_count))
+
+        report: Dict[str, Any] = {
+            'requests': sum(len(values) for values in samples.values()),
+            'throughput_rps': round(sum(len(values) for values in samples.values()) / measured_seconds, 1)
+            if measured_seconds else 0.0,
+        }
+        for op, values in sorted(samples.items()):
+            latencies = np.array([elapsed for elapsed, _ in values]) * 1000
+            report[op] = {
+                'count': len(values),
+                'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+                'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+                'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+                'queries_per_request': round(float(np.mean([count for _, count in values])), 2),
+            }
+        return report
+
+    @staticmethod
+    def _sync_index():
+        """What the request hooks do: sync the index, or (re)load it when cold or stale"""
+        booking_index.sync()
+        if booking_index.needs_reload():
+            booking_index.reload()
+
+    def _recommend(self, users: List[User], now, event: Dict[str, Any]) -> Optional[tuple]:
+        user = users[event['user'] % len(users)]
+        start_time = now + timedelta(minutes=event['start_in_minutes'])
+        end_time = start_time + timedelta(minutes=event['duration_minutes'])
+        arguments = (
+            user,
+            event['participants_count'],
+            start_time,
+            end_time,
+            event.get('required_amenities') or [],
+            event.get('preferred_floor'),
+        )
+
+        if self.use_cache:
+            key = RecommendationCache.make_key(user.id, *arguments[1:])
+            results = recommendation_cache.get_or_compute(key, lambda: self.engine.recommend_rooms(*arguments))
+        else:
+            results = self.engine.recommend_rooms(*arguments)
+
+        if not results:
+            return None
+        return results[0]['room'], start_time, end_time, event['participants_count']
+
+    @staticmethod
+    def _book(users: List[User], recommendation: Optional[tuple], event: Dict[str, Any]):
+        if recommendation is None:
+            return
+        room, start_time, end_time, participants_count = recommendation
+        try:
+            with transaction.atomic():
+                Booking.objects.create(
+                    room=room,
+                    user=users[event['user'] % len(users)],
+                    start_time=start_time,
+                    end_time=end_time,
+                    participants_count=participants_count,
+                    purpose='benchmark replay',
+                )
+        except IntegrityError as error:
+            if not Booking.is_overlap_error(error):
+                raise
+
+
+def compare(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    slack_ms: float = 1.0
+) -> List[str]:
+    """
+    Regressions of report against baseline: latency percentiles more than
+    `tolerance` (a fraction) plus slack_ms slower, throughput more than
+    `tolerance` lower, or more queries per request
+
+    slack_ms keeps timer jitter on sub-millisecond requests from failing
+    the run.
+    """
+    regressions = []
+    for op, expected in baseline.items():
+        if not isinstance(expected, dict) or op not in report:
+            continue
+        actual = report[op]
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if actual[metric] > expected[metric] * (1 + tolerance) + slack_ms:
+                regressions.append(
+                    f"{op} {metric}: {actual[metric]} > {expected[metric]} (+{tolerance:.0%}, +{slack_ms} ms)"
+                )
+        if actual['queries_per_request'] > expected['queries_per_request'] + 0.01:
+            regressions.append(
+                f"{op} queries_per_request: {actual['queries_per_request']} > {expected['queries_per_request']}"
+            )
+    if report['throughput_rps'] < baseline.get('throughput_rps', 0) * (1 - tolerance):
+        regressions.append(
+            f"throughput_rps: {report['throughput_rps']} < {baseline['throughput_rps']} (-{tolerance:.0%})"
+        )
+    return regressions
@@ -0,0 +1,77 @@
+"""
+System checks for bookings app
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+from django.utils import timezone
+
+from .models import MAX_DECAY_EXPONENT, UserRoomPreference
+from .services.availability_index import booking_index
+from .services.recommendation_cache import recommendation_cache
+
+
+@register()
+def check_recommendation_cache_backend(app_configs, **kwargs):
+    """The recommendation cache needs a cache shared by all workers"""
+    if not getattr(settings, 'RECOMMENDATION_CACHE_ENABLED', False) or recommendation_cache.enabled():
+        return []
+    return [
+        Warning(
+            "The recommendation cache is disabled: the default cache is not shared between processes, "
+            "so a worker would keep recommending rooms booked through the others.",
+            hint="Configure a shared cache (e.g. Redis) as CACHES['default'], or set "
+                 "SINGLE_PROCESS_DEPLOYMENT = True if the site runs in a single process.",
+            id='bookings.W001',
+        )
+    ]
+
+
+@register()
+def check_booking_index_backend(app_configs, **kwargs):
+    """The booking interval index syncs workers through the default cache"""
+    if not getattr(settings, 'BOOKING_INTERVAL_INDEX_ENABLED', True) or booking_index.enabled():
+        return []
+    return [
+        Warning(
+            "The booking interval index is disabled: the default cache is not shared between processes, "
+            "so a worker would keep reporting rooms booked through the others as free.",
+            hint="Configure a shared cache (e.g. Redis) as CACHES['default'], or set "
+                 "SINGLE_PROCESS_DEPLOYMENT = True if the site runs in a single process.",
+            id='bookings.W002',
+        )
+    ]
+
+
+@register()
+def check_preference_decay(app_configs, **kwargs):
+    """Decayed preference weights stop fitting a float MAX_DECAY_EXPONENT half-lives after the epoch"""
+    if not getattr(settings, 'PREFERENCE_HALF_LIFE_DAYS', 30) > 0:
+        return [Error("PREFERENCE_HALF_LIFE_DAYS must be a positive number of days.", id='bookings.E001')]
+
+    horizon = UserRoomPreference.decay_horizon()
+    hint = (
+        "Move PREFERENCE_DECAY_EPOCH forward (e.g. to today) and run manage.py backfill_preference_decay; "
+        f"weights fit a float for {MAX_DECAY_EXPONENT} half-lives after the epoch."
+    )
+    now = timezone.now()
+    if now >= horizon:
+        return [
+            Error(
+                f"Preference weights of bookings made after {horizon:%Y-%m-%d} overflow: "
+                "creating bookings fails until the decay epoch is moved.",
+                hint=hint,
+                id='bookings.E002',
+            )
+        ]
+    if now + timedelta(days=365) >= horizon:
+        return [
+            Warning(
+                f"Preference weights of bookings made after {horizon:%Y-%m-%d} will overflow.",
+                hint=hint,
+                id='bookings.W003',
+            )
+        ]
+    return []
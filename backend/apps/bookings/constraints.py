@@ -0,0 +1,140 @@
+"""
+Database constraints for bookings app
+"""
+
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeBoundary, RangeOperators
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.ddl_references import Statement, Table
+from django.db.models import Func
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.sql import Query
+
+
+class TsTzRange(Func):
+    function = 'TSTZRANGE'
+    output_field = DateTimeRangeField()
+
+
+class NoOverlapConstraint(ExclusionConstraint):
+    """
+    Rows with the same `field` may not have overlapping half-open
+    [start_field, end_field) ranges, among the rows matching condition
+
+    On PostgreSQL this is the GiST exclusion constraint it derives from
+    (comparing `field` with = needs the btree_gist extension).
+
+    SQLite has no such constraint, so there it is kept by BEFORE INSERT and
+    BEFORE UPDATE triggers raising IntegrityError with the constraint name.
+    They are created with the table: SQLite makes most schema changes by
+    rebuilding the table, which drops its triggers, and every rebuild
+    creates them again from this declaration. They name only the columns
+    of the constraint and its condition, so other columns can still be
+    dropped in place. Datetimes are stored as UTC text there, which
+    compares in time order.
+
+    Other databases get neither; see Booking.database_prevents_overlap.
+    """
+
+    sqlite_trigger = (
+        "CREATE TRIGGER %(name)s BEFORE %(event)s ON %(table)s "
+        "WHEN EXISTS (SELECT 1 FROM (SELECT %(new_row)s) WHERE %(condition)s) "
+        "BEGIN SELECT RAISE(ABORT, '%(constraint)s') WHERE EXISTS ("
+        "SELECT 1 FROM %(table)s WHERE %(condition)s AND %(field)s = NEW.%(field)s "
+        "AND %(start)s < NEW.%(end)s AND %(end)s > NEW.%(start)s%(exclude_self)s"
+        "); END"
+    )
+
+    def __init__(self, *, name, field, start_field, end_field, condition=None, violation_error_message=None):
+        self.field = field
+        self.start_field = start_field
+        self.end_field = end_field
+        super().__init__(
+            name=name,
+            expressions=[
+                (field, RangeOperators.EQUAL),
+                (TsTzRange(start_field, end_field, RangeBoundary()), RangeOperators.OVERLAPS),
+            ],
+            condition=condition,
+            violation_error_message=violation_error_message,
+        )
+
+    def deconstruct(self):
+        path = f'{self.__class__.__module__}.{self.__class__.__name__}'
+        kwargs = {
+            'name': self.name,
+            'field': self.field,
+            'start_field': self.start_field,
+            'end_field': self.end_field,
+        }
+        if self.condition is not None:
+            kwargs['condition'] = self.condition
+        if self.violation_error_message != self.default_violation_error_message:
+            kwargs['violation_error_message'] = self.violation_error_message
+        return path, (), kwargs
+
+    def constraint_sql(self, model, schema_editor):
+        vendor = schema_editor.connection.vendor
+        if vendor == 'sqlite':
+            # Not part of CREATE TABLE: the triggers follow the table, and are
+            # renamed with it when the table is a rebuild's new copy
+            schema_editor.deferred_sql.extend(self.sqlite_triggers(model, schema_editor))
+        if vendor != 'postgresql':
+            return None
+        return super().constraint_sql(model, schema_editor)
+
+    def create_sql(self, model, schema_editor):
+        # SQLite adds this constraint by rebuilding the table (constraint_sql)
+        if schema_editor.connection.vendor != 'postgresql':
+            return None
+        return super().create_sql(model, schema_editor)
+
+    def remove_sql(self, model, schema_editor):
+        # SQLite drops the triggers with the table it rebuilds without them
+        if schema_editor.connection.vendor != 'postgresql':
+            return None
+        return super().remove_sql(model, schema_editor)
+
+    def validate(self, model, instance, exclude=None, using=DEFAULT_DB_ALIAS):
+        # The range lookups are PostgreSQL-only; SQLite's triggers reject
+        # the row when it is saved
+        if connections[using].vendor == 'postgresql':
+            super().validate(model, instance, exclude, using)
+
+    def sqlite_triggers(self, model, schema_editor):
+        """The CREATE TRIGGER statements for model's table"""
+        quote = schema_editor.quote_name
+        query = Query(model, alias_cols=False)
+        compiler = query.get_compiler(connection=schema_editor.connection)
+        condition = self._get_condition_sql(compiler, schema_editor, query) or '1'
+        columns = [model._meta.get_field(name).column for name in self._condition_fields(model)]
+        parts = {
+            'table': Table(model._meta.db_table, quote),
+            'constraint': self.name,
+            'condition': condition,
+            # The condition is checked on NEW through a one-row subquery
+            'new_row': ', '.join(f'NEW.{quote(column)} AS {quote(column)}' for column in columns) or '1',
+            'field': quote(model._meta.get_field(self.field).column),
+            'start': quote(model._meta.get_field(self.start_field).column),
+            'end': quote(model._meta.get_field(self.end_field).column),
+        }
+        pk = quote(model._meta.pk.column)
+        return [
+            Statement(self.sqlite_trigger, name=quote(f'{self.name}_insert'), event='INSERT', exclude_self='', **parts),
+            Statement(
+                self.sqlite_trigger, name=quote(f'{self.name}_update'), event='UPDATE',
+                exclude_self=f' AND {pk} != NEW.{pk}', **parts
+            ),
+        ]
+
+    def _condition_fields(self, model):
+        """Names of the fields the condition looks at"""
+        names = set()
+        nodes = [self.condition] if self.condition is not None else []
+        while nodes:
+            for child in nodes.pop().children:
+                if isinstance(child, tuple):
+                    names.add(child[0].split(LOOKUP_SEP)[0])
+                else:
+                    nodes.append(child)
+        return sorted(model._meta.pk.name if name == 'pk' else name for name in names)
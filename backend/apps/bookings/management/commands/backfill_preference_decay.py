@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.bookings.models import Booking, UserRoomPreference, backfill_decayed_weights
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute UserRoomPreference.decayed_weight from existing CONFIRMED bookings, "
+        "streaming them in chunks (migration 0007 runs it once; run it again after changing "
+        "PREFERENCE_HALF_LIFE_DAYS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Bookings fetched and preferences written per batch.")
+
+    def handle(self, *args, **options):
+        updated, created = backfill_decayed_weights(Booking, UserRoomPreference, options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} preferences, created {created} missing ones."))
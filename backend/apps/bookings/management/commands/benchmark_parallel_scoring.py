@@ -0,0 +1,67 @@
+import os
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from apps.bookings.services.parallel_scorer import ParallelRoomScorer
+from apps.bookings.services.recommendation_engine import RoomRecommendationEngine
+from apps.bookings.services.vectorized_scorer import VectorizedRoomScorer
+
+
+class Command(BaseCommand):
+    help = "Scaling curve of process-pool room scoring across worker counts on synthetic room arrays."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[100_000, 1_000_000, 4_000_000])
+        parser.add_argument(
+            "--workers", nargs="+", type=int, default=None,
+            help="Worker counts to try (default: powers of two up to the CPU count).",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per point; the best time is reported.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        cpus = os.cpu_count() or 1
+        workers_list = options["workers"] or [2 ** n for n in range(cpus.bit_length()) if 2 ** n <= cpus]
+        rng = np.random.default_rng(options["seed"])
+
+        self.stdout.write(f"{cpus} CPUs; times include shipping the shard snapshots to the workers")
+        self.stdout.write(f"{'rooms':>9} {'workers':>8} {'ms':>10} {'speedup':>9}")
+        for size in options["sizes"]:
+            scorer = VectorizedRoomScorer(
+                RoomRecommendationEngine,
+                capacity=rng.integers(2, 31, size),
+                amenity_mask=rng.integers(0, 128, size),
+                preference_count=np.round(rng.exponential(0.2, size), 2),
+                recent_bookings=rng.integers(0, 15, size),
+                floor_number=rng.integers(1, 41, size),
+                proximity=np.zeros(size, dtype=np.int64),
+                affinity=rng.integers(0, 11, size),
+            )
+            participants_count, preferred_floor = 8, 12
+
+            expected = None
+            serial_best = None
+            for workers in workers_list:
+                if workers > 1:
+                    # Warm the pool so process start-up is not measured
+                    ParallelRoomScorer.top_k(scorer, participants_count, preferred_floor, workers=workers)
+                best = float("inf")
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    if workers > 1:
+                        result = ParallelRoomScorer.top_k(scorer, participants_count, preferred_floor, workers=workers)
+                    else:
+                        result = scorer.top_k(participants_count, preferred_floor)
+                    best = min(best, time.perf_counter() - started)
+
+                if expected is None:
+                    expected, serial_best = result, best
+                elif result != expected:
+                    self.stderr.write(self.style.ERROR(f"Sharded result differs at {size} rooms, {workers} workers"))
+                    return
+                self.stdout.write(f"{size:>9} {workers:>8} {best * 1000:>10.1f} {serial_best / best:>8.2f}x")
+
+        ParallelRoomScorer.shutdown()
+        self.stdout.write(self.style.SUCCESS("Sharded and in-process results are identical."))
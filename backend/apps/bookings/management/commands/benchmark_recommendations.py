@@ -0,0 +1,120 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from apps.bookings.benchmarks.campus import CampusGenerator
+from apps.bookings.benchmarks.replay import ReplayRunner, compare, load_stream, save_stream, synthetic_stream
+
+# Stored per scenario and database vendor. The committed ones are the standard
+# scenarios on SQLite; latencies depend on the machine, so re-record them
+# (--save-baseline) on the machine that runs the comparison.
+BASELINES_FILE = Path(__file__).resolve().parents[2] / "benchmarks" / "baselines.json"
+
+# Campus sizes and request counts; any of them can be overridden on the command line
+SCENARIOS = {
+    "small": {"floors": 5, "rooms": 200, "users": 300, "months": 3, "requests": 500},
+    "medium": {"floors": 20, "rooms": 2000, "users": 3000, "months": 3, "requests": 1000},
+    "campus": {"floors": 40, "rooms": 10000, "users": 20000, "months": 6, "requests": 2000},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic campus in a throwaway test database, replay recommend/book requests against "
+        "the recommendation engine and report p50/p95/p99 latency, queries per request and throughput. "
+        "Fails when a stored baseline regresses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="small")
+        for name in ("floors", "rooms", "users", "months", "requests"):
+            parser.add_argument(f"--{name}", type=int, default=None)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--warmup", type=int, default=20, help="Leading requests executed but not measured.")
+        parser.add_argument("--stream", type=Path, help="Replay this recorded JSONL stream instead of a synthetic one.")
+        parser.add_argument("--record", type=Path, help="Write the replayed stream to this JSONL file.")
+        parser.add_argument("--cache", action="store_true", help="Go through the recommendation cache, as the API does.")
+        parser.add_argument("--baselines", type=Path, default=BASELINES_FILE)
+        parser.add_argument("--save-baseline", action="store_true", help="Store this run as the scenario's baseline.")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.25,
+            help="Allowed slowdown before a latency or throughput change counts as a regression (fraction).",
+        )
+        parser.add_argument(
+            "--slack-ms", type=float, default=1.0,
+            help="Absolute latency allowance on top of --tolerance, for timer jitter on fast requests.",
+        )
+        parser.add_argument("--keepdb", action="store_true", help="Keep the test database between runs.")
+
+    def handle(self, *args, **options):
+        scenario = options["scenario"]
+        sizes = {name: options[name] or default for name, default in SCENARIOS[scenario].items()}
+
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options["keepdb"])
+        try:
+            started = time.perf_counter()
+            counts = CampusGenerator(
+                sizes["floors"], sizes["rooms"], sizes["users"], sizes["months"], seed=options["seed"]
+            ).generate()
+            self.stdout.write(
+                f"Generated {counts['floors']} floors, {counts['rooms']} rooms, {counts['users']} users and "
+                f"{counts['bookings']} bookings in {time.perf_counter() - started:.1f}s"
+            )
+
+            if options["stream"]:
+                events = load_stream(options["stream"])
+            else:
+                events = synthetic_stream(sizes["requests"], sizes["users"], sizes["floors"], seed=options["seed"])
+            if options["record"]:
+                save_stream(options["record"], events)
+
+            # One process serves every request here, so the booking index (and
+            # with --cache the result cache) is measured as a site with a
+            # shared cache runs it
+            with override_settings(
+                SINGLE_PROCESS_DEPLOYMENT=True,
+                BOOKING_INTERVAL_INDEX_ENABLED=True,
+                RECOMMENDATION_CACHE_ENABLED=options["cache"],
+            ):
+                report = ReplayRunner(use_cache=options["cache"]).run(events, warmup=options["warmup"])
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+
+        self._print(report)
+        key = f"{scenario}{'+cache' if options['cache'] else ''}/{connection.vendor}"
+        if any(options[name] for name in SCENARIOS[scenario]) or options["stream"]:
+            key += " (custom)"
+        self._check_baseline(key, report, options)
+
+    def _print(self, report):
+        self.stdout.write(f"{'op':<10} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}")
+        for op, stats in report.items():
+            if isinstance(stats, dict):
+                self.stdout.write(
+                    f"{op:<10} {stats['count']:>6} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                    f"{stats['p99_ms']:>9.2f} {stats['queries_per_request']:>8.2f}"
+                )
+        self.stdout.write(f"{report['requests']} requests at {report['throughput_rps']} requests/s")
+
+    def _check_baseline(self, key, report, options):
+        path = options["baselines"]
+        baselines = json.loads(path.read_text()) if path.exists() else {}
+
+        if options["save_baseline"]:
+            baselines[key] = report
+            path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline '{key}' to {path}"))
+            return
+
+        if key not in baselines:
+            self.stdout.write(f"No baseline for '{key}'; store one with --save-baseline.")
+            return
+
+        regressions = compare(report, baselines[key], options["tolerance"], options["slack_ms"])
+        if regressions:
+            raise CommandError("Regressed against baseline '{}':\n  {}".format(key, "\n  ".join(regressions)))
+        self.stdout.write(self.style.SUCCESS(f"Within {options['tolerance']:.0%} of baseline '{key}'."))
@@ -0,0 +1,76 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from apps.bookings.services.recommendation_engine import RoomRecommendationEngine
+from apps.floors.services.room_catalog import RoomCatalog
+
+
+class Command(BaseCommand):
+    help = "Memory and time of loading candidate rooms as ORM instances vs. the in-process room catalog."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--participants", type=int, default=1)
+        parser.add_argument("--amenities", nargs="*", default=[])
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per path; the best time is reported.")
+
+    @staticmethod
+    def _measure(load):
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = load()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, elapsed, peak
+
+    def _best(self, load, repeat):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            load()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    def handle(self, *args, **options):
+        participants, amenities = options["participants"], options["amenities"]
+        engine = RoomRecommendationEngine
+
+        rooms, _, orm_peak = self._measure(
+            lambda: list(engine._get_candidate_rooms(participants, amenities).order_by("id"))
+        )
+        catalog = RoomCatalog()
+        _, load_seconds, catalog_peak = self._measure(catalog.reload)
+        records = catalog.records()
+
+        if [room.id for room in rooms] != engine._get_candidate_records(participants, amenities)["id"].tolist():
+            self.stderr.write(self.style.ERROR("Catalog candidates differ from the ORM candidates"))
+            return
+        if not rooms:
+            self.stdout.write("No candidate rooms; seed the database first.")
+            return
+
+        orm_seconds = self._best(
+            lambda: list(engine._get_candidate_rooms(participants, amenities)), options["repeat"]
+        )
+        catalog_seconds = self._best(
+            lambda: engine._get_candidate_records(participants, amenities), options["repeat"]
+        )
+
+        self.stdout.write(f"{len(records)} rooms in the catalog, {len(rooms)} candidates")
+        self.stdout.write(f"{'path':<22} {'peak KiB':>10} {'bytes/room':>11} {'ms':>9}")
+        self.stdout.write(
+            f"{'ORM instances':<22} {orm_peak / 1024:>10.1f} {orm_peak / len(rooms):>11.0f} {orm_seconds * 1000:>9.2f}"
+        )
+        self.stdout.write(
+            f"{'catalog (load)':<22} {catalog_peak / 1024:>10.1f} {catalog_peak / len(records):>11.0f} "
+            f"{load_seconds * 1000:>9.2f}"
+        )
+        self.stdout.write(
+            f"{'catalog (resident)':<22} {records.nbytes / 1024:>10.1f} {records.itemsize:>11} "
+            f"{catalog_seconds * 1000:>9.2f}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Catalog holds the candidates in {orm_peak / max(records.nbytes, 1):.0f}x less memory."
+        ))
@@ -0,0 +1,66 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.floors.models import FloorPlan, Room
+from apps.bookings.services.recommendation_engine import RoomRecommendationEngine
+from apps.bookings.services.vectorized_scorer import VectorizedRoomScorer
+
+
+class Command(BaseCommand):
+    help = "Time the scalar and vectorized room scorers on synthetic in-memory rooms."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[1_000, 10_000, 100_000])
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per size; the best time is reported.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        floors = [FloorPlan(id=n, name=f"Floor {n}", floor_number=n) for n in range(1, 11)]
+
+        self.stdout.write(f"{'rooms':>8} {'scalar ms':>12} {'vector ms':>12} {'speedup':>9}")
+        for size in options["sizes"]:
+            rooms = []
+            for pk in range(1, size + 1):
+                room = Room(
+                    id=pk,
+                    name=f"Room {pk}",
+                    capacity=rng.randint(2, 30),
+                    has_projector=rng.random() < 0.6,
+                    has_whiteboard=rng.random() < 0.7,
+                    has_video_conference=rng.random() < 0.4,
+                    has_tv_monitor=rng.random() < 0.5,
+                    has_premium_audio=rng.random() < 0.1,
+                    has_natural_light=rng.random() < 0.3,
+                    has_kitchen_access=rng.random() < 0.1,
+                )
+                room.amenity_mask = room.compute_amenity_mask()
+                room.floor_plan = rng.choice(floors)
+                rooms.append(room)
+            preferences = {room.id: rng.randint(1, 20) for room in rng.sample(rooms, size // 20)}
+            recent_usage = {room.id: rng.randint(1, 15) for room in rng.sample(rooms, size // 4)}
+            participants_count = rng.randint(2, 12)
+            preferred_floor = rng.randint(1, 10)
+
+            scalar_best = vector_best = float("inf")
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                RoomRecommendationEngine._score_rooms(
+                    rooms, participants_count, preferred_floor, preferences, recent_usage
+                )
+                scalar_best = min(scalar_best, time.perf_counter() - started)
+
+                # Array construction is included: it is part of every request
+                started = time.perf_counter()
+                scorer = VectorizedRoomScorer.from_rooms(
+                    RoomRecommendationEngine, rooms, preferences, recent_usage
+                )
+                scorer.top_k(participants_count, preferred_floor, k=5)
+                vector_best = min(vector_best, time.perf_counter() - started)
+
+            self.stdout.write(
+                f"{size:>8} {scalar_best * 1000:>12.1f} {vector_best * 1000:>12.1f} "
+                f"{scalar_best / vector_best:>8.1f}x"
+            )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.bookings.models import RoomUsageBucket
+
+
+class Command(BaseCommand):
+    help = "Recount the daily room usage buckets from bookings (after bulk imports or queryset updates)."
+
+    def handle(self, *args, **options):
+        buckets = RoomUsageBucket.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} room usage buckets."))
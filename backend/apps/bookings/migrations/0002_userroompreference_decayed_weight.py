@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userroompreference',
+            name='decayed_weight',
+            field=models.FloatField(default=0.0),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:11
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def backfill_usage_buckets(apps, schema_editor):
+    """Count existing CONFIRMED bookings per room and local start date"""
+    Booking = apps.get_model('bookings', 'Booking')
+    RoomUsageBucket = apps.get_model('bookings', 'RoomUsageBucket')
+    counts = Booking.objects.filter(status='CONFIRMED').annotate(
+        day=TruncDate('start_time')
+    ).order_by().values_list('room_id', 'day').annotate(total=models.Count('id'))
+    RoomUsageBucket.objects.bulk_create(
+        (RoomUsageBucket(room_id=room_id, day=day, bookings=total) for room_id, day, total in counts.iterator()),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('floors', '0002_room_amenity_mask'),
+        ('bookings', '0002_userroompreference_decayed_weight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomUsageBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bookings', models.IntegerField(default=0)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage_buckets', to='floors.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='bookings_ro_day_db3108_idx')],
+                'unique_together': {('room', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_usage_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:40
+
+import apps.bookings.constraints
+from django.db import migrations, models
+
+
+def create_btree_gist(apps, schema_editor):
+    # PostgreSQL only: lets the GiST index compare room_id with =. Left in
+    # place on reverse, as other tables may use it. (BtreeGistExtension
+    # cannot be unapplied on SQLite.)
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_roomusagebucket'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_btree_gist, migrations.RunPython.noop),
+        # Fails on PostgreSQL if overlapping CONFIRMED bookings already
+        # exist; cancel or move them first
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=apps.bookings.constraints.NoOverlapConstraint(condition=models.Q(('status', 'CONFIRMED')), end_field='end_time', field='room', name='bookings_booking_no_overlap', start_field='start_time'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:05
+
+from django.db import migrations
+
+
+def backfill_preference_decay(apps, schema_editor):
+    """
+    decayed_weight was added as 0.0 (0002), which the engine treats as no
+    preference: compute it from the existing bookings
+    """
+    from apps.bookings.models import backfill_decayed_weights
+
+    backfill_decayed_weights(apps.get_model('bookings', 'Booking'), apps.get_model('bookings', 'UserRoomPreference'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_booking_start_time_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_preference_decay, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,95 @@
 # Booking, UserPreference
 """
-Bookings app models: Booking, UserRoomPreference
+Bookings app models: Booking, UserRoomPreference, RoomUsageBucket
 """
 
-from django.db import models
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from itertools import groupby
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Count, F, Q, QuerySet
+from django.db.models.functions import TruncDate
 from django.contrib.auth.models import User
+from django.utils import timezone
 from apps.floors.models import Room
+from .constraints import NoOverlapConstraint
+from .services.recurrence import Recurrence
+
+def add_counts(
+    model,
+    key_fields: List[str],
+    count_fields: List[str],
+    increments: Dict[tuple, tuple],
+    assign: Dict[str, Any] = None,
+    batch_size: int = 500
+):
+    """
+    Atomically add {key values: count values} to the rows of model that are
+    unique on key_fields, creating missing rows; assign is set on every
+    touched row. Concurrent writers never lose increments.
+    """
+    assign = assign or {}
+    # Sorted so concurrent batches lock rows in the same order
+    rows = sorted(increments.items())
+    if not rows:
+        return
+    
+    if connection.vendor in ('postgresql', 'sqlite'):
+        # INSERT ... ON CONFLICT DO UPDATE, one statement per batch
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        fields = [model._meta.get_field(name) for name in key_fields + count_fields + list(assign)]
+        columns = [quote(field.column) for field in fields]
+        keys = columns[:len(key_fields)]
+        counts = columns[len(key_fields):len(key_fields) + len(count_fields)]
+        assigned = columns[len(key_fields) + len(count_fields):]
+        updates = [f"{column} = {table}.{column} + EXCLUDED.{column}" for column in counts]
+        updates += [f"{column} = EXCLUDED.{column}" for column in assigned]
+        row_sql = f"({', '.join(['%s'] * len(columns))})"
+        
+        for offset in range(0, len(rows), batch_size):
+            batch = rows[offset:offset + batch_size]
+            params = []
+            for key, values in batch:
+                row = list(key) + list(values) + list(assign.values())
+                params += [field.get_db_prep_value(value, connection) for field, value in zip(fields, row)]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([row_sql] * len(batch))} "
+                    f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {', '.join(updates)}",
+                    params,
+                )
+        return
+    
+    # Elsewhere: F() increment, creating the row if needed (retried if
+    # another writer creates it first)
+    for key, values in rows:
+        lookup = dict(zip(key_fields, key))
+        changes = {name: F(name) + value for name, value in zip(count_fields, values)}
+        changes.update(assign)
+        if model.objects.filter(**lookup).update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, **dict(zip(count_fields, values)), **assign)
+        except IntegrityError:
+            model.objects.filter(**lookup).update(**changes)
+
+
+# Decayed preference weights are stored relative to a fixed instant, the
+# decay epoch (settings.PREFERENCE_DECAY_EPOCH, defaulting to this one), so a
+# new booking only ever adds to them (see UserRoomPreference.decayed_weight).
+# A booking's weight doubles every half-life after the epoch and float64
+# runs out at 2 ** 1024, so weights can only be stored for
+# MAX_DECAY_EXPONENT half-lives: about 82 years with a 30-day half-life,
+# under 3 with a 1-day one. Checks bookings.W003/E002 report an epoch
+# running out; moving it forward and running backfill_preference_decay
+# rebases every weight.
+PREFERENCE_DECAY_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+# 2 ** 1000 leaves room for sums of a million weights
+MAX_DECAY_EXPONENT = 1000
 
 
 class Booking(models.Model):
@@ -23,31 +107,178 @@ class Booking(models.Model):
     participants_count = models.IntegerField()
     purpose = models.TextField(blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='CONFIRMED')
+    # Set on the rows overriding one occurrence of a BookingSeries, with the
+    # date the occurrence fell on: CANCELLED skips it, CONFIRMED moves or
+    # changes it
+    series = models.ForeignKey(
+        'BookingSeries', null=True, blank=True, on_delete=models.CASCADE, related_name='overrides'
+    )
+    occurrence_date = models.DateField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # CONFIRMED bookings of a room never overlap: a GiST exclusion
+    # constraint on PostgreSQL, triggers on SQLite (see NoOverlapConstraint).
+    # Series occurrences are not rows, so they are checked by the application.
+    OVERLAP_CONSTRAINT = 'bookings_booking_no_overlap'
+    
     class Meta:
         ordering = ['-start_time']
         indexes = [
             models.Index(fields=['room', 'start_time', 'end_time']),
+            # Keyset pagination of the booking list (read backwards)
+            models.Index(fields=['start_time', 'id']),
+        ]
+        constraints = [
+            # Named as Booking.OVERLAP_CONSTRAINT
+            NoOverlapConstraint(
+                name='bookings_booking_no_overlap',
+                field='room',
+                start_field='start_time',
+                end_field='end_time',
+                condition=Q(status='CONFIRMED'),
+            ),
+            models.UniqueConstraint(
+                fields=['series', 'occurrence_date'],
+                name='bookings_booking_unique_occurrence',
+            ),
         ]
     
     def __str__(self):
         return f"{self.room.name} - {self.user.username}"
     
+    # Stored values the usage bucket signals compare against
+    USAGE_COLUMNS = ('room_id', 'start_time', 'status')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        booking = super().from_db(db, field_names, values)
+        # Remembered as loaded, so saving the booking needs no read to find
+        # the usage bucket it leaves (see signals.remember_usage_bucket)
+        if all(column in booking.__dict__ for column in cls.USAGE_COLUMNS):
+            booking._stored_usage = tuple(booking.__dict__[column] for column in cls.USAGE_COLUMNS)
+        return booking
+    
+    @staticmethod
+    def database_prevents_overlap() -> bool:
+        """Whether the database itself rejects overlapping CONFIRMED bookings"""
+        return connection.vendor in ('postgresql', 'sqlite')
+    
+    @classmethod
+    def is_overlap_error(cls, error: IntegrityError) -> bool:
+        """Whether error is a violation of the non-overlap constraint"""
+        return cls.OVERLAP_CONSTRAINT in str(error)
+    
     def save(self, *args, **kwargs):
         is_new = self.pk is None
         super().save(*args, **kwargs)
         
-        # Update user preference on new booking
+        # Update user preference on new booking: one atomic upsert, or
+        # buffered and flushed in batches when write-behind is enabled
         if is_new and self.status == 'CONFIRMED':
-            pref, created = UserRoomPreference.objects.get_or_create(
-                user=self.user,
-                room=self.room,
-                defaults={'booking_count': 0}
-            )
-            pref.booking_count += 1
-            pref.save()
+            from .services.preference_buffer import preference_buffer
+            preference_buffer.record(self.user_id, self.room_id, self.created_at)
+
+
+# (series_id, room_id, recurrence, overridden occurrence dates)
+SeriesRule = Tuple[int, int, Recurrence, Set[date]]
+
+
+class BookingSeries(models.Model):
+    """
+    FEATURE 3: A recurring booking, stored once as its rule
+
+    Occurrences are never stored: they are expanded on demand within the
+    window being looked at. Only overrides are rows, in Booking (see
+    Booking.series).
+    """
+    
+    FREQUENCY_CHOICES = [
+        ('DAILY', 'Daily'),
+        ('WEEKLY', 'Weekly'),
+    ]
+    # Bounds how far before a window an overlapping occurrence can start,
+    # which keeps the window queries below exact
+    MAX_OCCURRENCE_DURATION = timedelta(days=1)
+    
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='booking_series')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='booking_series')
+    # The first occurrence; later ones keep its local wall-clock time
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES)
+    interval = models.PositiveSmallIntegerField(default=1)
+    # WEEKLY only: 0 is Monday; empty means start_time's weekday
+    weekdays = models.JSONField(default=list, blank=True)
+    # Last date an occurrence may fall on; null repeats forever
+    until = models.DateField(null=True, blank=True)
+    participants_count = models.IntegerField()
+    purpose = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES, default='CONFIRMED')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-start_time']
+        indexes = [
+            models.Index(fields=['room', 'start_time']),
+        ]
+    
+    def __str__(self):
+        return f"{self.room.name} - {self.user.username} ({self.get_frequency_display().lower()})"
+    
+    def recurrence(self) -> Recurrence:
+        return Recurrence(self.start_time, self.end_time, self.frequency, self.interval, self.weekdays, self.until)
+    
+    @classmethod
+    def active_between(cls, start_time: datetime, end_time: Optional[datetime] = None) -> QuerySet:
+        """CONFIRMED series that may have occurrences overlapping the window (open-ended without end_time)"""
+        # An occurrence on `until` ends by the end of the following day
+        series = cls.objects.filter(status='CONFIRMED').exclude(
+            until__lt=timezone.localtime(start_time).date() - cls.MAX_OCCURRENCE_DURATION
+        )
+        if end_time is not None:
+            series = series.filter(start_time__lt=end_time)
+        return series
+    
+    @classmethod
+    def overrides_query(cls, series, start_time: datetime, end_time: Optional[datetime] = None) -> QuerySet:
+        """(series_id, occurrence_date) of the overrides of series (a queryset or ids) that may matter in the window"""
+        # Recurrence.between looks up to a duration plus a day around the window
+        overrides = Booking.objects.filter(
+            series__in=series,
+            occurrence_date__gte=timezone.localtime(start_time).date() - cls.MAX_OCCURRENCE_DURATION - timedelta(days=1),
+        )
+        if end_time is not None:
+            overrides = overrides.filter(occurrence_date__lte=timezone.localtime(end_time).date() + timedelta(days=1))
+        return overrides.values_list('series_id', 'occurrence_date')
+    
+    @staticmethod
+    def rules(series: Iterable['BookingSeries'], overrides: Iterable[Tuple[int, date]]) -> List[SeriesRule]:
+        overridden: Dict[int, Set[date]] = {}
+        for series_id, day in overrides:
+            overridden.setdefault(series_id, set()).add(day)
+        return [(item.id, item.room_id, item.recurrence(), overridden.get(item.id, set())) for item in series]
+    
+    @staticmethod
+    def occurrence_intervals(
+        rules: Iterable[SeriesRule],
+        start_time: datetime,
+        end_time: datetime
+    ) -> Dict[int, List[Tuple[float, int, float]]]:
+        """
+        (start, -series_id, end) timestamps per room of the occurrences
+        overlapping [start_time, end_time) that are not overridden, sorted
+        by start; the negative id tells them apart from booking ids
+        """
+        result: Dict[int, List[Tuple[float, int, float]]] = {}
+        for series_id, room_id, recurrence, overridden in rules:
+            for day, start, end in recurrence.between(start_time, end_time):
+                if day not in overridden:
+                    result.setdefault(room_id, []).append((start.timestamp(), -series_id, end.timestamp()))
+        for entries in result.values():
+            entries.sort()
+        return result
 
 
 class UserRoomPreference(models.Model):
@@ -56,6 +287,11 @@ class UserRoomPreference(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
     booking_count = models.IntegerField(default=0)
+    # Sum of 2 ** ((booked_at - decay epoch) / half_life) over the user's
+    # bookings of the room; decayed_score() scales it to "now". Changing
+    # PREFERENCE_HALF_LIFE_DAYS or PREFERENCE_DECAY_EPOCH requires
+    # backfill_preference_decay.
+    decayed_weight = models.FloatField(default=0.0)
     last_booked = models.DateTimeField(auto_now=True)
     
     class Meta:
@@ -63,4 +299,153 @@ class UserRoomPreference(models.Model):
         ordering = ['-booking_count']
     
     def __str__(self):
-        return f"{self.user.username} → {self.room.name} ({self.booking_count}x)"
\ No newline at end of file
+        return f"{self.user.username} → {self.room.name} ({self.booking_count}x)"
+    
+    @staticmethod
+    def half_life_seconds() -> float:
+        return getattr(settings, 'PREFERENCE_HALF_LIFE_DAYS', 30) * 86400
+    
+    @staticmethod
+    def decay_epoch() -> datetime:
+        return getattr(settings, 'PREFERENCE_DECAY_EPOCH', PREFERENCE_DECAY_EPOCH)
+    
+    @classmethod
+    def decay_horizon(cls) -> datetime:
+        """When weights of new bookings stop fitting a float: MAX_DECAY_EXPONENT half-lives after the epoch"""
+        return cls.decay_epoch() + timedelta(seconds=MAX_DECAY_EXPONENT * cls.half_life_seconds())
+    
+    @classmethod
+    def decay_weight(cls, booked_at: datetime) -> float:
+        """What one booking at booked_at adds to decayed_weight"""
+        return 2 ** ((booked_at - cls.decay_epoch()).total_seconds() / cls.half_life_seconds())
+    
+    @classmethod
+    def decay_factor(cls, now: datetime = None) -> float:
+        """Multiplier turning stored decayed_weight values into scores at now"""
+        now = now or timezone.now()
+        return 2 ** (-(now - cls.decay_epoch()).total_seconds() / cls.half_life_seconds())
+    
+    def decayed_score(self, now: datetime = None) -> float:
+        """Booking count where a booking one half-life ago counts 0.5"""
+        return self.decayed_weight * self.decay_factor(now)
+    
+    @classmethod
+    def add_bookings(cls, increments: Dict[Tuple[int, int], Tuple[int, float]]):
+        """
+        Atomically add {(user_id, room_id): (bookings, decay weight)} to the
+        preference rows, creating missing ones; concurrent writers never
+        lose increments
+        """
+        add_counts(
+            cls,
+            ['user_id', 'room_id'],
+            ['booking_count', 'decayed_weight'],
+            increments,
+            assign={'last_booked': timezone.now()},
+        )
+
+
+def backfill_decayed_weights(booking_model, preference_model, chunk_size: int = 2000) -> Tuple[int, int]:
+    """
+    Recompute decayed_weight from the CONFIRMED bookings of each (user,
+    room) pair and create the preference rows missing for booked pairs;
+    returns (updated, created). Rows of pairs without bookings are left
+    alone.
+
+    Bookings and preference rows are both streamed in (user_id, room_id)
+    order and merged, chunk_size rows at a time, so neither table is held
+    in memory. Takes the model classes so migrations can pass historical
+    ones.
+    """
+    bookings = booking_model.objects.filter(status='CONFIRMED').order_by('user_id', 'room_id').values_list(
+        'user_id', 'room_id', 'created_at'
+    ).iterator(chunk_size=chunk_size)
+    preferences = preference_model.objects.order_by('user_id', 'room_id').values_list(
+        'user_id', 'room_id', 'id'
+    ).iterator(chunk_size=chunk_size)
+
+    updated = created = 0
+    changed, missing = [], []
+    
+    def flush():
+        with transaction.atomic():
+            preference_model.objects.bulk_update(changed, ['decayed_weight'], batch_size=chunk_size)
+            preference_model.objects.bulk_create(missing, batch_size=chunk_size, ignore_conflicts=True)
+    
+    preference = next(preferences, None)
+    for (user_id, room_id), rows in groupby(bookings, key=lambda row: (row[0], row[1])):
+        count, weight = 0, 0.0
+        for _, _, created_at in rows:
+            count += 1
+            weight += UserRoomPreference.decay_weight(created_at)
+        
+        while preference is not None and (preference[0], preference[1]) < (user_id, room_id):
+            preference = next(preferences, None)
+        if preference is not None and (preference[0], preference[1]) == (user_id, room_id):
+            changed.append(preference_model(id=preference[2], decayed_weight=weight))
+        else:
+            # Bookings created without a preference row (e.g. bulk imports)
+            missing.append(preference_model(
+                user_id=user_id, room_id=room_id, booking_count=count, decayed_weight=weight
+            ))
+        
+        if len(changed) + len(missing) >= chunk_size:
+            flush()
+            updated, created = updated + len(changed), created + len(missing)
+            changed, missing = [], []
+    
+    flush()
+    return updated + len(changed), created + len(missing)
+
+
+class RoomUsageBucket(models.Model):
+    """FEATURE 3: CONFIRMED bookings per room per day (by local start date)"""
+    
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='usage_buckets')
+    day = models.DateField()
+    bookings = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['room', 'day']
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.room.name} {self.day}: {self.bookings}"
+    
+    @staticmethod
+    def day_of(booking_start: datetime):
+        return timezone.localdate(booking_start)
+    
+    @classmethod
+    def add(cls, deltas: Dict[Tuple[int, date], int]):
+        """Atomically add {(room_id, day): bookings} to the buckets"""
+        add_counts(
+            cls,
+            ['room_id', 'day'],
+            ['bookings'],
+            {key: (delta,) for key, delta in deltas.items() if delta},
+        )
+    
+    @classmethod
+    def rebuild(cls, batch_size: int = 5000) -> int:
+        """
+        Recount every bucket from Booking with one grouped query, e.g.
+        after bulk imports or queryset updates that bypassed the signals
+        """
+        counts = Booking.objects.filter(status='CONFIRMED').annotate(
+            day=TruncDate('start_time')
+        ).order_by().values_list('room_id', 'day').annotate(total=Count('id'))
+        
+        created = 0
+        with transaction.atomic():
+            cls.objects.all().delete()
+            batch = []
+            for room_id, day, total in counts.iterator(chunk_size=batch_size):
+                batch.append(cls(room_id=room_id, day=day, bookings=total))
+                if len(batch) >= batch_size:
+                    cls.objects.bulk_create(batch)
+                    created, batch = created + len(batch), []
+            cls.objects.bulk_create(batch)
+        return created + len(batch)
@@ -0,0 +1,81 @@
+"""
+Pagination for bookings app
+"""
+
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class BookingCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (start_time, id), newest first
+
+    DRF's CursorPagination keys on the first ordering field alone and pages
+    through rows sharing a start time with an offset, capped at
+    offset_cutoff: a slot booked in more rooms than that could not be paged
+    past. Here the cursor holds both fields, so every page is one index
+    range scan ending in LIMIT page_size + 1, however deep it is, and no
+    COUNT(*) is run.
+    """
+
+    ordering = ('-start_time', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        current_position = self.cursor.position if self.cursor is not None else None
+
+        queryset = queryset.order_by('start_time', 'id') if reverse else queryset.order_by('-start_time', '-id')
+        if current_position is not None:
+            queryset = queryset.filter(self._after(current_position, reverse))
+
+        # One extra row tells whether there is a page beyond this one
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if len(results) > len(self.page) else None
+        )
+
+        # Link bookkeeping as in CursorPagination; positions are unique, so
+        # the links it builds never need an offset
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = current_position is not None, current_position
+            self.has_previous, self.previous_position = following_position is not None, following_position
+        else:
+            self.has_next, self.next_position = following_position is not None, following_position
+            self.has_previous, self.previous_position = current_position is not None, current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        return f"{instance.start_time.isoformat()}|{instance.pk}"
+
+    def _after(self, position: str, reverse: bool) -> Q:
+        """
+        Rows past position in the page direction. Written as
+        start_time <= t AND (start_time < t OR id < n) rather than a bare OR,
+        so the start_time bound can drive the index scan.
+        """
+        try:
+            start_time, booking_id = position.rsplit('|', 1)
+            start_time, booking_id = datetime.fromisoformat(start_time), int(booking_id)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if reverse:
+            return Q(start_time__gte=start_time) & (Q(start_time__gt=start_time) | Q(id__gt=booking_id))
+        return Q(start_time__lte=start_time) & (Q(start_time__lt=start_time) | Q(id__lt=booking_id))
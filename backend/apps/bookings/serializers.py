@@ -3,9 +3,20 @@
 DRF Serializers for bookings app
 """
 
-from rest_framework import serializers
-from .models import Booking, UserRoomPreference
+from django.db import IntegrityError, transaction
+from rest_framework import exceptions, serializers, status
+from .models import Booking, BookingSeries, UserRoomPreference
 from apps.floors.models import Room
+from .services.availability_index import booking_index, load_series_intervals
+from .services.booking_series import BookingSeriesService
+from .services.recurrence import Recurrence, RecurrenceError
+
+
+class BookingConflict(exceptions.APIException):
+    """The room is already booked for (part of) the requested time"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This room is already booked for the selected time"
+    default_code = 'booking_conflict'
 
 
 class BookingSerializer(serializers.ModelSerializer):
@@ -17,12 +28,13 @@ class BookingSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'room', 'room_name', 'user', 'user_username',
             'start_time', 'end_time', 'participants_count',
-            'purpose', 'status', 'created_at'
+            'purpose', 'status', 'series', 'occurrence_date', 'created_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        # The booking belongs to the requesting user (see create); overrides
+        # of series occurrences are made through the series endpoints
+        read_only_fields = ['id', 'user', 'series', 'occurrence_date', 'created_at']
     
     def validate(self, data):
-        # Check for overlapping bookings
         room = data.get('room')
         start_time = data.get('start_time')
         end_time = data.get('end_time')
@@ -30,26 +42,145 @@ class BookingSerializer(serializers.ModelSerializer):
         if start_time >= end_time:
             raise serializers.ValidationError("End time must be after start time")
         
-        # Check for conflicts
-        overlapping = Booking.objects.filter(
-            room=room,
-            status='CONFIRMED',
-            start_time__lt=end_time,
-            end_time__gt=start_time
-        )
+        # On PostgreSQL and SQLite the INSERT/UPDATE itself rejects
+        # overlaps (see _save_or_conflict); elsewhere check beforehand
+        if not Booking.database_prevents_overlap():
+            self._check_overlap(room, start_time, end_time)
+        
+        return data
+    
+    def _check_overlap(self, room, start_time, end_time):
+        # Check for conflicts, from the in-memory index when it is warm
+        exclude_id = self.instance.pk if self.instance else None
+        is_free = booking_index.is_room_free(room.pk, start_time, end_time, exclude_booking_id=exclude_id)
+        
+        if is_free is None:
+            overlapping = Booking.objects.filter(
+                room=room,
+                status='CONFIRMED',
+                start_time__lt=end_time,
+                end_time__gt=start_time
+            )
+            
+            # Exclude current booking if updating
+            if self.instance:
+                overlapping = overlapping.exclude(pk=self.instance.pk)
+            
+            is_free = not overlapping.exists()
+        
+        if not is_free:
+            raise BookingConflict()
+    
+    def create(self, validated_data):
+        validated_data['user'] = self.context['request'].user
+        return self._save_or_conflict(validated_data, super().create, validated_data)
+    
+    def update(self, instance, validated_data):
+        slot = {name: validated_data.get(name, getattr(instance, name)) for name in ('room', 'start_time', 'end_time')}
+        return self._save_or_conflict(slot, super().update, instance, validated_data)
+    
+    @staticmethod
+    def _save_or_conflict(slot, save, *args):
+        """
+        Run save in its own savepoint, so a rejected write leaves any outer
+        transaction usable, and turn an overlap violation into a 409
+        
+        Series occurrences are not rows, so no constraint sees them: they
+        are checked here, with the room locked until the write commits.
+        """
+        try:
+            with transaction.atomic():
+                room = slot['room']
+                BookingSeriesService.lock_room(room.pk)
+                intervals = load_series_intervals([room.pk], slot['start_time'], slot['end_time'], use_index=False)
+                if intervals.get(room.pk):
+                    raise BookingConflict("This room is booked by a recurring series at the selected time")
+                return save(*args)
+        except IntegrityError as error:
+            if Booking.is_overlap_error(error):
+                raise BookingConflict() from error
+            raise
+
+
+class BookingSeriesSerializer(serializers.ModelSerializer):
+    room_name = serializers.CharField(source='room.name', read_only=True)
+    user_username = serializers.CharField(source='user.username', read_only=True)
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6), required=False, allow_empty=True
+    )
+    # Converted to until (the date of the count-th occurrence) in validate
+    count = serializers.IntegerField(write_only=True, required=False, min_value=1, max_value=1000)
+    
+    RULE_FIELDS = ('room', 'start_time', 'end_time', 'frequency', 'interval', 'weekdays', 'until', 'status')
+    
+    class Meta:
+        model = BookingSeries
+        fields = [
+            'id', 'room', 'room_name', 'user', 'user_username',
+            'start_time', 'end_time', 'frequency', 'interval', 'weekdays', 'until', 'count',
+            'participants_count', 'purpose', 'status', 'created_at'
+        ]
+        read_only_fields = ['id', 'user', 'created_at']
+        extra_kwargs = {'interval': {'min_value': 1, 'max_value': 52}}
+    
+    def validate(self, data):
+        # Partial updates are checked against the rule they result in
+        rule = {
+            name: data[name] if name in data else getattr(self.instance, name, None)
+            for name in self.RULE_FIELDS
+        }
+        count = data.pop('count', None)
+        if count is not None and data.get('until'):
+            raise serializers.ValidationError("Give at most one of count and until")
+        
+        try:
+            recurrence = Recurrence(
+                rule['start_time'], rule['end_time'], rule['frequency'], rule['interval'] or 1,
+                rule['weekdays'], rule['until']
+            )
+            if count is not None:
+                data['until'] = recurrence.nth_day(count)
+                recurrence = Recurrence(
+                    rule['start_time'], rule['end_time'], rule['frequency'], rule['interval'] or 1,
+                    rule['weekdays'], data['until']
+                )
+        except RecurrenceError as error:
+            raise serializers.ValidationError(str(error))
         
-        # Exclude current booking if updating
-        if self.instance:
-            overlapping = overlapping.exclude(pk=self.instance.pk)
+        if rule['end_time'] - rule['start_time'] > BookingSeries.MAX_OCCURRENCE_DURATION:
+            raise serializers.ValidationError("An occurrence can last at most a day")
         
-        if overlapping.exists():
-            raise serializers.ValidationError("This room is already booked for the selected time")
+        # Checked against bookings and other series when saved, under the room lock
+        self._checked = (rule['room'], recurrence) if (rule['status'] or 'CONFIRMED') == 'CONFIRMED' else None
         
         return data
     
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
+        with transaction.atomic():
+            self._check_conflicts()
+            return super().create(validated_data)
+    
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            self._check_conflicts()
+            return super().update(instance, validated_data)
+    
+    def _check_conflicts(self):
+        """
+        Lock the room, then look for clashes with its bookings and series;
+        the lock is held until the series is saved, so two clashing rules
+        cannot both pass
+        """
+        if self._checked is None:
+            return
+        room, recurrence = self._checked
+        BookingSeriesService.lock_room(room.pk)
+        conflicts = BookingSeriesService.conflicts(room.pk, recurrence, self.instance.pk if self.instance else None)
+        if conflicts:
+            shown = ', '.join(day.isoformat() for day in conflicts[:5])
+            more = f" and {len(conflicts) - 5} more dates" if len(conflicts) > 5 else ""
+            raise BookingConflict(f"This room is already booked on {shown}{more}")
 
 
 class UserRoomPreferenceSerializer(serializers.ModelSerializer):
@@ -0,0 +1,167 @@
+"""
+FEATURE 3: Time-slot availability grid
+One integer bitset per room per day, one bit per 15-minute slot, built from
+CONFIRMED bookings and maintenance flags. Multi-room or multi-slot questions
+become bitwise ANDs over these integers.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from typing import Dict, List, Tuple
+
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from apps.floors.models import Room
+from ..models import Booking
+from .availability_index import aload_series_intervals, load_series_intervals
+
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+FULL_DAY = (1 << SLOTS_PER_DAY) - 1
+SLOT = timedelta(minutes=SLOT_MINUTES)
+
+
+def slot_range_mask(start_slot: int, end_slot: int) -> int:
+    """Bits start_slot..end_slot-1 set"""
+    if end_slot <= start_slot:
+        return 0
+    return ((1 << (end_slot - start_slot)) - 1) << start_slot
+
+
+class AvailabilityGrid:
+    """
+    Busy bitsets for a set of rooms over consecutive days
+
+    Bit i of a day's integer is slot i (00:00-00:15 is bit 0) in the
+    current time zone; a set bit means the room is taken for at least part
+    of that slot.
+
+    Grids are built per request for the floor and dates asked about, not
+    kept as a persistent store: the range query is indexed and bounded
+    (31 days of one floor), and a store would need the same
+    cross-process invalidation as the booking index.
+    """
+
+    def __init__(self, rooms: List[Room], start_date: date, days: int):
+        self.rooms = rooms
+        self.start_date = start_date
+        self.dates = [start_date + timedelta(days=offset) for offset in range(days)]
+        self.busy: Dict[int, List[int]] = {
+            room.id: [FULL_DAY if room.is_under_maintenance else 0] * days
+            for room in rooms
+        }
+
+    @classmethod
+    def for_floor(cls, floor_number: int, start_date: date, end_date: date) -> 'AvailabilityGrid':
+        """
+        Grid for every active room on a floor, from start_date to end_date
+        inclusive, with one query for rooms and one for bookings; series
+        occurrences come from the booking index when it is warm
+        """
+        rooms, bookings = cls._floor_queries(floor_number, start_date, end_date)
+        series = load_series_intervals(None, cls._day_start(start_date), cls._day_start(end_date + timedelta(days=1)))
+        return cls._build(list(rooms), bookings, series, start_date, end_date)
+
+    @classmethod
+    async def afor_floor(cls, floor_number: int, start_date: date, end_date: date) -> 'AvailabilityGrid':
+        """
+        for_floor for async views, through the async ORM; Django 4.2 runs
+        its queries one after another in the thread-sensitive executor, so
+        they are awaited in turn
+        """
+        rooms_query, bookings_query = cls._floor_queries(floor_number, start_date, end_date)
+        rooms = [room async for room in rooms_query]
+        bookings = [row async for row in bookings_query]
+        series = await aload_series_intervals(
+            None, cls._day_start(start_date), cls._day_start(end_date + timedelta(days=1))
+        )
+        return cls._build(rooms, bookings, series, start_date, end_date)
+
+    @classmethod
+    def _floor_queries(cls, floor_number: int, start_date: date, end_date: date) -> Tuple[QuerySet, QuerySet]:
+        """
+        The floor's active rooms and their CONFIRMED bookings in the date
+        range; the bookings query joins on the floor itself so it does not
+        have to wait for the rooms
+        """
+        rooms = Room.objects.filter(
+            floor_plan__floor_number=floor_number,
+            is_active=True
+        ).order_by('name', 'id')
+
+        bookings = Booking.objects.filter(
+            room__floor_plan__floor_number=floor_number,
+            room__is_active=True,
+            status='CONFIRMED',
+            start_time__lt=cls._day_start(end_date + timedelta(days=1)),
+            end_time__gt=cls._day_start(start_date)
+        ).values_list('room_id', 'start_time', 'end_time')
+
+        return rooms, bookings
+
+    @classmethod
+    def _build(
+        cls,
+        rooms: List[Room],
+        bookings,
+        series: Dict[int, List[Tuple[float, int, float]]],
+        start_date: date,
+        end_date: date
+    ) -> 'AvailabilityGrid':
+        grid = cls(rooms, start_date, (end_date - start_date).days + 1)
+        for room_id, start_time, end_time in bookings:
+            # A room deactivated between the two queries has no row
+            if room_id in grid.busy:
+                grid.mark_busy(room_id, start_time, end_time)
+        # Series occurrences of every floor's rooms; only this floor's count
+        for room_id, occurrences in series.items():
+            if room_id in grid.busy:
+                for start, _, end in occurrences:
+                    grid.mark_busy(
+                        room_id,
+                        datetime.fromtimestamp(start, tz=dt_timezone.utc),
+                        datetime.fromtimestamp(end, tz=dt_timezone.utc),
+                    )
+        return grid
+
+    @staticmethod
+    def _day_start(day: date) -> datetime:
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def day_start(self, day_index: int) -> datetime:
+        return self._day_start(self.start_date + timedelta(days=day_index))
+
+    def mark_busy(self, room_id: int, start_time: datetime, end_time: datetime):
+        """Set the bits of every slot the interval touches"""
+        days = self.busy[room_id]
+        first = max(0, (timezone.localtime(start_time).date() - self.start_date).days)
+        last = min(len(days) - 1, (timezone.localtime(end_time).date() - self.start_date).days)
+        for day_index in range(first, last + 1):
+            day_start = self.day_start(day_index)
+            start_slot = max(0, int((start_time - day_start) // SLOT))
+            end_slot = min(SLOTS_PER_DAY, -int(-(end_time - day_start) // SLOT))
+            days[day_index] |= slot_range_mask(start_slot, end_slot)
+
+    def free_mask(self, room_id: int, day_index: int) -> int:
+        return ~self.busy[room_id][day_index] & FULL_DAY
+
+    def free_room_ids(self, day_index: int, start_slot: int, end_slot: int) -> List[int]:
+        """Rooms free for the whole slot window on a day"""
+        window = slot_range_mask(start_slot, end_slot)
+        return [
+            room.id for room in self.rooms
+            if not self.busy[room.id][day_index] & window
+        ]
+
+    def common_free_mask(self, room_ids: List[int], day_index: int) -> int:
+        """Slots in which every one of room_ids is free"""
+        mask = FULL_DAY
+        for room_id in room_ids:
+            mask &= self.free_mask(room_id, day_index)
+        return mask
+
+    @staticmethod
+    def to_slot_string(free_mask: int, start_slot: int = 0, end_slot: int = SLOTS_PER_DAY) -> str:
+        """'1' for a free slot and '0' for a busy one, earliest slot first"""
+        return ''.join('1' if free_mask >> slot & 1 else '0' for slot in range(start_slot, end_slot))
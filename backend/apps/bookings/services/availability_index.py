@@ -0,0 +1,469 @@
+"""
+FEATURE 3: In-memory booking interval index
+Per-room sorted intervals of CONFIRMED bookings so availability checks
+can be answered without a database round trip
+"""
+
+import random
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.floors.services.shared_cache import workers_share_cache
+from ..models import Booking, BookingSeries, SeriesRule
+
+
+class RoomIntervals:
+    """
+    Sorted booking intervals of one room
+
+    Entries are (start, booking_id, end) tuples ordered by start, in a
+    sorted array: adding and removing one is a binary search plus a
+    memmove. `longest` bounds the duration of every entry, so an entry
+    overlapping [start, end) starts in (start - longest, end) and a query
+    only looks at that slice.
+    """
+
+    __slots__ = ('entries', 'longest')
+
+    def __init__(self):
+        self.entries = []
+        self.longest = 0.0
+
+    @classmethod
+    def from_sorted(cls, entries: List[Tuple[float, int, float]]) -> 'RoomIntervals':
+        intervals = cls()
+        intervals.entries = list(entries)
+        intervals.longest = max((end - start for start, _, end in intervals.entries), default=0.0)
+        return intervals
+
+    def add(self, start: float, end: float, booking_id: int):
+        insort(self.entries, (start, booking_id, end))
+        # Never shrinks on remove; a loose bound only widens the slice
+        self.longest = max(self.longest, end - start)
+
+    def remove(self, start: float, booking_id: int) -> bool:
+        position = bisect_left(self.entries, (start, booking_id))
+        if position < len(self.entries) and self.entries[position][:2] == (start, booking_id):
+            del self.entries[position]
+            return True
+        return False
+
+    def candidates(self, start: float, end: float) -> List[Tuple[float, int, float]]:
+        """
+        Entries that may overlap [start, end), by start: a few may end by
+        `start`, which sweeps over the slice skip naturally
+        """
+        low = bisect_left(self.entries, (start - self.longest,))
+        high = bisect_left(self.entries, (end,))
+        return self.entries[low:high]
+
+    def overlaps(self, start: float, end: float, exclude_booking_id: int = None) -> bool:
+        return any(
+            entry_end > start and booking_id != exclude_booking_id
+            for _, booking_id, entry_end in self.candidates(start, end)
+        )
+
+    def overlapping(self, start: float, end: float) -> List[int]:
+        """Ids of the bookings overlapping [start, end), by start"""
+        return [booking_id for _, booking_id, entry_end in self.candidates(start, end) if entry_end > start]
+
+
+# A change that incremental updates do not cover: every process reloads
+RELOAD = 'reload'
+
+
+class BookingIntervalIndex:
+    """
+    Process-local index of CONFIRMED bookings, kept current by Booking
+    signals and synced across processes through a change log in the
+    shared cache
+
+    Every write bumps a generation counter and stores the changed rows
+    under the new generation. At the start of each request (sync()) a
+    process reads the counter and applies the rows it has not seen; when
+    some are gone (expired, evicted) or there are too many, or a series
+    changed, it reloads after the response instead (needs_reload()).
+
+    Lookups return None when the index is disabled, cold, stale or does
+    not cover the requested window; callers then fall back to the
+    database. The index is disabled unless the default cache reaches every
+    worker (see apps.floors.services.shared_cache).
+    """
+
+    GENERATION_CACHE_KEY = 'bookings:interval_index:generation'
+    CHANGE_CACHE_KEY = 'bookings:interval_index:change:{}'
+    # How long published changes are kept, and how many a sync applies
+    # before it prefers a reload
+    CHANGE_TIMEOUT = 300
+    MAX_CHANGES_PER_SYNC = 500
+    # A change can be counted before it is stored; wait this long for it
+    MISSING_CHANGE_GRACE_SECONDS = 5
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rooms: Dict[int, RoomIntervals] = {}
+        # booking_id -> (room_id, start) of every indexed booking
+        self._bookings: Dict[int, Tuple[int, float]] = {}
+        # Series stay rules; their occurrences are expanded per lookup
+        self._series: Dict[int, List[SeriesRule]] = {}
+        self._loaded_from: Optional[float] = None
+        self._generation: Optional[int] = None
+        self._missing_since: Optional[float] = None
+
+    @staticmethod
+    def enabled() -> bool:
+        if not getattr(settings, 'BOOKING_INTERVAL_INDEX_ENABLED', True):
+            return False
+        return workers_share_cache()
+
+    @classmethod
+    def _shared_generation(cls) -> int:
+        generation = cache.get(cls.GENERATION_CACHE_KEY)
+        if generation is None:
+            # Start from a random point, so a process that synced before the
+            # cache was cleared cannot mistake new changes for the ones it
+            # missed
+            cache.add(cls.GENERATION_CACHE_KEY, random.randrange(2 ** 40), timeout=None)
+            generation = cache.get(cls.GENERATION_CACHE_KEY)
+        return generation
+
+    def reload(self):
+        """
+        Rebuild from the database (bookings ending after the lookback cutoff)
+        """
+        lookback = timedelta(hours=getattr(settings, 'BOOKING_INTERVAL_INDEX_LOOKBACK_HOURS', 24))
+        loaded_from = timezone.now() - lookback
+        # Read first: changes published meanwhile are applied again by sync()
+        generation = self._shared_generation()
+
+        rooms: Dict[int, RoomIntervals] = {}
+        booking_rooms: Dict[int, Tuple[int, float]] = {}
+        bookings = Booking.objects.filter(
+            status='CONFIRMED',
+            end_time__gt=loaded_from
+        ).order_by('room_id', 'start_time', 'id').values_list('id', 'room_id', 'start_time', 'end_time')
+
+        for room_id, rows in groupby(bookings.iterator(chunk_size=5000), key=lambda row: row[1]):
+            # Rows arrive sorted by start
+            entries = [(start_time.timestamp(), booking_id, end_time.timestamp()) for booking_id, _, start_time, end_time in rows]
+            rooms[room_id] = RoomIntervals.from_sorted(entries)
+            for start, booking_id, _ in entries:
+                booking_rooms[booking_id] = (room_id, start)
+
+        active_series = BookingSeries.active_between(loaded_from)
+        series: Dict[int, List[SeriesRule]] = {}
+        for rule in BookingSeries.rules(active_series, BookingSeries.overrides_query(active_series, loaded_from)):
+            series.setdefault(rule[1], []).append(rule)
+
+        with self._lock:
+            self._rooms = rooms
+            self._bookings = booking_rooms
+            self._series = series
+            self._loaded_from = loaded_from.timestamp()
+            self._generation = generation
+            self._missing_since = None
+
+    def needs_reload(self) -> bool:
+        """Whether the index is cold or has fallen behind what sync() can apply"""
+        return self.enabled() and self._generation is None
+
+    def sync(self):
+        """
+        Apply the changes other processes published since the last sync;
+        one cache read when there are none
+        """
+        if not self.enabled() or self._generation is None:
+            return
+        shared = self._shared_generation()
+        seen = self._generation
+        if shared == seen:
+            return
+        if shared < seen or shared - seen > self.MAX_CHANGES_PER_SYNC:
+            # The cache was cleared, or we are too far behind
+            self._generation = None
+            return
+
+        changes = cache.get_many([self.CHANGE_CACHE_KEY.format(generation) for generation in range(seen + 1, shared + 1)])
+        with self._lock:
+            # Another thread may have synced (or reloaded) meanwhile
+            while self._generation is not None and self._generation < shared:
+                generation = self._generation + 1
+                change = changes.get(self.CHANGE_CACHE_KEY.format(generation))
+                if change is None:
+                    now = time.monotonic()
+                    if self._missing_since is None:
+                        self._missing_since = now
+                    elif now - self._missing_since > self.MISSING_CHANGE_GRACE_SECONDS:
+                        self._generation = None
+                    return
+                self._missing_since = None
+                if change == RELOAD:
+                    self._generation = None
+                    return
+                self._apply(change)
+                self._generation = generation
+
+    def covers(self, start_time: datetime) -> bool:
+        """
+        True when lookups from start_time onwards can be served from memory
+        """
+        return (
+            self.enabled()
+            and self._generation is not None
+            and self._loaded_from is not None
+            and start_time.timestamp() >= self._loaded_from
+        )
+
+    def free_room_ids(
+        self,
+        room_ids: Iterable[int],
+        start_time: datetime,
+        end_time: datetime,
+        exclude_booking_id: int = None
+    ) -> Optional[Set[int]]:
+        """
+        Rooms among room_ids with no CONFIRMED booking or series occurrence
+        overlapping [start_time, end_time), or None if the index cannot
+        answer
+        """
+        if not self.covers(start_time):
+            return None
+
+        start, end = start_time.timestamp(), end_time.timestamp()
+        with self._lock:
+            free = set()
+            for room_id in room_ids:
+                intervals = self._rooms.get(room_id)
+                if intervals is not None and intervals.overlaps(start, end, exclude_booking_id):
+                    continue
+                if not self._series_entries(room_id, start_time, end_time):
+                    free.add(room_id)
+        return free
+
+    def room_intervals(
+        self,
+        room_ids: Iterable[int],
+        start_time: datetime,
+        end_time: datetime
+    ) -> Optional[Dict[int, List[Tuple[float, int, float]]]]:
+        """
+        (start, booking_id, end) entries of each room that may overlap
+        [start_time, end_time), as POSIX timestamps sorted by start, or None
+        if the index cannot answer; series occurrences are included with
+        -series_id as their booking id
+
+        The slice can include a few entries ending before start_time; sweeps
+        over it skip those naturally.
+        """
+        if not self.covers(start_time):
+            return None
+
+        start, end = start_time.timestamp(), end_time.timestamp()
+        result = {}
+        with self._lock:
+            for room_id in room_ids:
+                intervals = self._rooms.get(room_id)
+                entries = intervals.candidates(start, end) if intervals is not None else []
+                occurrences = self._series_entries(room_id, start_time, end_time)
+                result[room_id] = sorted(entries + occurrences) if occurrences else entries
+        return result
+
+    def series_intervals(
+        self,
+        room_ids: Optional[Iterable[int]],
+        start_time: datetime,
+        end_time: datetime
+    ) -> Optional[Dict[int, List[Tuple[float, int, float]]]]:
+        """
+        (start, -series_id, end) entries of the series occurrences of each
+        room (every room with a series when room_ids is None) overlapping
+        [start_time, end_time), or None if the index cannot answer
+        """
+        if not self.covers(start_time):
+            return None
+
+        with self._lock:
+            room_ids = list(self._series) if room_ids is None else room_ids
+            result = {}
+            for room_id in room_ids:
+                occurrences = self._series_entries(room_id, start_time, end_time)
+                if occurrences:
+                    result[room_id] = occurrences
+        return result
+
+    def _series_entries(self, room_id: int, start_time: datetime, end_time: datetime) -> List[Tuple[float, int, float]]:
+        rules = self._series.get(room_id)
+        if not rules:
+            return []
+        return BookingSeries.occurrence_intervals(rules, start_time, end_time).get(room_id, [])
+
+    def is_room_free(
+        self,
+        room_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        exclude_booking_id: int = None
+    ) -> Optional[bool]:
+        free = self.free_room_ids([room_id], start_time, end_time, exclude_booking_id)
+        return None if free is None else room_id in free
+
+    def apply_booking(self, booking_id: int, room_id: int, start_time: datetime, end_time: datetime, status: str):
+        """
+        Upsert one booking after it was saved, then publish the change
+        """
+        self.apply_bookings([(booking_id, room_id, start_time, end_time, status)])
+
+    def apply_bookings(self, bookings: Iterable[Tuple[int, int, datetime, datetime, str]]):
+        """
+        Upsert (booking_id, room_id, start_time, end_time, status) rows after
+        they were saved, then publish them as one change
+        """
+        self._publish([
+            (booking_id, room_id, start_time.timestamp(), end_time.timestamp())
+            if status == 'CONFIRMED' else (booking_id, None, None, None)
+            for booking_id, room_id, start_time, end_time, status in bookings
+        ])
+
+    def remove_booking(self, booking_id: int):
+        """
+        Drop one booking after it was deleted, then publish the change
+        """
+        self._publish([(booking_id, None, None, None)])
+
+    def invalidate(self):
+        """
+        Make every process, this one included, reload before answering
+        again; for changes the incremental updates do not cover (series and
+        their overrides)
+        """
+        self._publish(RELOAD)
+
+    def _apply(self, rows: List[Tuple[int, Optional[int], Optional[float], Optional[float]]]):
+        """
+        Upsert (booking_id, room_id, start, end) rows; room_id None drops
+        the booking. Applying a row again is harmless.
+        """
+        for booking_id, room_id, start, end in rows:
+            indexed = self._bookings.pop(booking_id, None)
+            if indexed is not None:
+                self._rooms[indexed[0]].remove(indexed[1], booking_id)
+            if room_id is not None:
+                intervals = self._rooms.get(room_id)
+                if intervals is None:
+                    intervals = self._rooms[room_id] = RoomIntervals()
+                intervals.add(start, end, booking_id)
+                self._bookings[booking_id] = (room_id, start)
+
+    def _publish(self, change):
+        """Apply a change here, then log it for the other processes"""
+        if not self.enabled():
+            # Nobody is told; rebuild if the index is turned back on
+            self._generation = None
+            return
+        with self._lock:
+            if change == RELOAD:
+                self._generation = None
+            elif self._generation is not None:
+                self._apply(change)
+            self._shared_generation()
+            generation = cache.incr(self.GENERATION_CACHE_KEY)
+            cache.set(self.CHANGE_CACHE_KEY.format(generation), change, timeout=self.CHANGE_TIMEOUT)
+            if self._generation is not None and generation == self._generation + 1:
+                # Nobody else wrote since our last sync: we are still current
+                self._generation = generation
+            # Otherwise the next sync applies the changes in between, and
+            # this one again
+
+
+# One index per worker process
+booking_index = BookingIntervalIndex()
+
+
+def load_room_intervals(
+    room_ids: List[int],
+    start_time: datetime,
+    end_time: datetime,
+    use_index: bool = True
+) -> Dict[int, List[Tuple[float, int, float]]]:
+    """
+    (start, booking_id, end) timestamps of CONFIRMED bookings per room that
+    may overlap the window, and of series occurrences overlapping it (with
+    -series_id as booking id), from the index when warm (and use_index),
+    otherwise from one range query plus load_series_intervals
+    """
+    intervals = booking_index.room_intervals(room_ids, start_time, end_time) if use_index else None
+    if intervals is not None:
+        return intervals
+
+    bookings = Booking.objects.filter(
+        room__in=room_ids,
+        status='CONFIRMED',
+        start_time__lt=end_time,
+        end_time__gt=start_time
+    ).order_by('room_id', 'start_time').values_list('room_id', 'id', 'start_time', 'end_time')
+
+    intervals = {
+        room_id: [
+            (start.timestamp(), booking_id, end.timestamp())
+            for _, booking_id, start, end in rows
+        ]
+        for room_id, rows in groupby(bookings.iterator(chunk_size=5000), key=lambda row: row[0])
+    }
+    for room_id, occurrences in load_series_intervals(room_ids, start_time, end_time, use_index=False).items():
+        intervals[room_id] = sorted(intervals.get(room_id, []) + occurrences)
+    return intervals
+
+
+def load_series_intervals(
+    room_ids: Optional[List[int]],
+    start_time: datetime,
+    end_time: datetime,
+    use_index: bool = True
+) -> Dict[int, List[Tuple[float, int, float]]]:
+    """
+    (start, -series_id, end) timestamps of the series occurrences per room
+    (any room when room_ids is None) overlapping the window, expanded from
+    the index when warm (and use_index), otherwise from the series rows:
+    one query, and one more for overrides when a series is active
+    """
+    intervals = booking_index.series_intervals(room_ids, start_time, end_time) if use_index else None
+    if intervals is not None:
+        return intervals
+
+    series = BookingSeries.active_between(start_time, end_time)
+    if room_ids is not None:
+        series = series.filter(room__in=room_ids)
+    series = list(series)
+    if not series:
+        return {}
+    overrides = BookingSeries.overrides_query([item.id for item in series], start_time, end_time)
+    return BookingSeries.occurrence_intervals(BookingSeries.rules(series, overrides), start_time, end_time)
+
+
+async def aload_series_intervals(
+    room_ids: Optional[List[int]],
+    start_time: datetime,
+    end_time: datetime
+) -> Dict[int, List[Tuple[float, int, float]]]:
+    """load_series_intervals for async callers"""
+    intervals = booking_index.series_intervals(room_ids, start_time, end_time)
+    if intervals is not None:
+        return intervals
+
+    series = BookingSeries.active_between(start_time, end_time)
+    if room_ids is not None:
+        series = series.filter(room__in=room_ids)
+    series = [item async for item in series]
+    if not series:
+        return {}
+    overrides = BookingSeries.overrides_query([item.id for item in series], start_time, end_time)
+    rules = BookingSeries.rules(series, [row async for row in overrides])
+    return BookingSeries.occurrence_intervals(rules, start_time, end_time)
@@ -0,0 +1,121 @@
+"""
+FEATURE 3: Batch room recommendation
+Assigns rooms to many meeting requests at once, reusing the engine's
+scoring and guaranteeing no two meetings in the batch share a room slot
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from django.contrib.auth.models import User
+
+from apps.floors.models import Room
+from .availability_index import RoomIntervals, load_room_intervals
+from .recommendation_engine import RoomRecommendationEngine
+from .vectorized_scorer import VectorizedRoomScorer
+
+
+class BatchRecommendationService:
+    """
+    Greedy-by-score assignment with conflict tracking
+
+    Candidate rooms, preferences, recent usage and existing bookings are
+    loaded once for the whole batch. Meetings with the fewest eligible rooms
+    are placed first; each takes its best-scoring room that is still free.
+    """
+
+    @classmethod
+    def assign(
+        cls,
+        user: Optional[User],
+        meetings: List[Dict[str, Any]],
+        engine=RoomRecommendationEngine
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        meetings: dicts with participants_count, start_time, end_time and
+        optional required_amenities / preferred_floor
+
+        Returns one entry per meeting, in input order: a dict with room,
+        score and score_breakdown, or None when no room could be assigned.
+        """
+        if not meetings:
+            return []
+
+        window_start = min(meeting['start_time'] for meeting in meetings)
+        window_end = max(meeting['end_time'] for meeting in meetings)
+        min_participants = min(meeting['participants_count'] for meeting in meetings)
+
+        # Load everything once for the whole batch
+        records = engine._get_candidate_records(min_participants, [])
+        room_ids = records['id'].tolist()
+        scorer = VectorizedRoomScorer.from_records(
+            engine,
+            records,
+            engine._load_user_preferences(user, room_ids),
+            engine._load_recent_usage(room_ids),
+        )
+        busy = {
+            room_id: RoomIntervals.from_sorted(entries)
+            for room_id, entries in load_room_intervals(room_ids, window_start, window_end).items()
+        }
+
+        # Rank each meeting's eligible rooms by score (ties by position)
+        ranked = []
+        for index, meeting in enumerate(meetings):
+            scores = cls._scores(scorer, meeting)
+            eligible = (
+                (scorer.capacity >= meeting['participants_count'])
+                & scorer.has_amenities(Room.amenity_mask_for(meeting.get('required_amenities') or []))
+            )
+            candidates = np.flatnonzero(eligible)
+            ranked.append((index, candidates[np.lexsort((candidates, -scores[candidates]))]))
+
+        # Most constrained meetings first, then earliest
+        ranked.sort(key=lambda item: (len(item[1]), meetings[item[0]]['start_time']))
+
+        placements: Dict[int, int] = {}
+        for index, order in ranked:
+            meeting = meetings[index]
+            start, end = meeting['start_time'].timestamp(), meeting['end_time'].timestamp()
+            for room_index in order:
+                intervals = busy.get(room_ids[room_index])
+                if intervals is None:
+                    intervals = busy[room_ids[room_index]] = RoomIntervals()
+                elif intervals.overlaps(start, end):
+                    continue
+                # Negative ids mark batch placements, never real bookings
+                intervals.add(start, end, -(index + 1))
+                placements[index] = room_index
+                break
+
+        # Model instances only for the rooms that were assigned
+        rooms = Room.objects.select_related('floor_plan').in_bulk(
+            [room_ids[room_index] for room_index in placements.values()]
+        )
+        assignments: List[Optional[Dict[str, Any]]] = [None] * len(meetings)
+        for index, room_index in placements.items():
+            room = rooms.get(room_ids[room_index])
+            if room is not None:
+                assignments[index] = cls._result(scorer, meetings[index], room, room_index)
+
+        return assignments
+
+    @staticmethod
+    def _scores(scorer: VectorizedRoomScorer, meeting: Dict[str, Any]) -> np.ndarray:
+        components = scorer.score_components(meeting['participants_count'], meeting.get('preferred_floor'))
+        return np.maximum(components['total'].astype(np.float64), 0)
+
+    @staticmethod
+    def _result(
+        scorer: VectorizedRoomScorer,
+        meeting: Dict[str, Any],
+        room: Room,
+        room_index: int
+    ) -> Dict[str, Any]:
+        components = scorer.score_components(meeting['participants_count'], meeting.get('preferred_floor'))
+        breakdown = {name: values[room_index].item() for name, values in components.items()}
+        return {
+            'room': room,
+            'score': max(float(breakdown['total']), 0),
+            'score_breakdown': breakdown,
+        }
@@ -0,0 +1,271 @@
+"""
+FEATURE 3: Booking series
+Conflict checks for series rules, whose occurrences are never stored, and
+the per-occurrence operations: listing the occurrences in a date range,
+cancelling one and moving one (each stored as an override Booking)
+"""
+
+from datetime import date, datetime, time, timedelta
+from math import lcm
+from typing import Any, Dict, List, Optional, Set
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.floors.models import Room
+from ..models import Booking, BookingSeries
+from .availability_index import RoomIntervals, load_room_intervals, load_series_intervals
+from .recurrence import Recurrence
+
+# How far ahead a new or changed rule is checked against bookings and
+# overrides with one range query; bookings made later are checked against
+# the series when created. Other series are checked beyond it as well, see
+# BookingSeriesService.series_conflicts_after.
+CONFLICT_HORIZON = timedelta(days=366)
+
+
+class SeriesConflict(Exception):
+    """An occurrence would overlap a booking or another series' occurrence"""
+
+    def __init__(self, dates: List[date]):
+        super().__init__(f"Conflicts on {', '.join(day.isoformat() for day in dates)}")
+        self.dates = dates
+
+
+class BookingSeriesService:
+    """
+    Series are checked and expanded in memory, one room and one window at a
+    time
+
+    A rule is checked over CONFLICT_HORIZON with one range query, and
+    against the other series of the room over their whole common period.
+    An override is a Booking pointing at the series and the date of the
+    occurrence it replaces: CANCELLED skips the occurrence, CONFIRMED moves
+    it. The non-overlap constraint covers overrides like any booking;
+    series occurrences are checked here, since no constraint can see them,
+    with the room row locked (lock_room) from the check until the write
+    commits.
+    """
+
+    @staticmethod
+    def lock_room(room_id: int):
+        """
+        Lock the room's row until the end of the transaction, so writes
+        checked against its series take turns (a no-op on SQLite, which
+        serializes writers anyway)
+        """
+        list(Room.objects.select_for_update().filter(pk=room_id).values_list('pk', flat=True))
+
+    @classmethod
+    def conflicts(cls, room_id: int, recurrence: Recurrence, series_id: Optional[int] = None) -> List[date]:
+        """
+        Dates on which an occurrence of recurrence would overlap a CONFIRMED
+        booking within the horizon or another series' occurrence in the
+        room; for an existing series, its own occurrences and overridden
+        dates are left out
+        """
+        window_start = timezone.make_aware(datetime.combine(recurrence.first_day, time.min))
+        window_end = window_start + CONFLICT_HORIZON
+        if recurrence.until is not None:
+            window_end = min(window_end, timezone.make_aware(datetime.combine(recurrence.until, time.min)) + timedelta(days=2))
+
+        overridden = set()
+        entries = load_room_intervals([room_id], window_start, window_end, use_index=False).get(room_id, [])
+        if series_id is not None:
+            overridden = set(Booking.objects.filter(series_id=series_id).values_list('occurrence_date', flat=True))
+            entries = [entry for entry in entries if entry[1] != -series_id]
+        intervals = RoomIntervals.from_sorted(entries)
+
+        dates = [
+            day for day, start, end in recurrence.between(window_start, window_end)
+            if day not in overridden and intervals.overlapping(start.timestamp(), end.timestamp())
+        ]
+        if recurrence.until is None or recurrence.until >= window_end.date():
+            later = cls.series_conflicts_after(room_id, recurrence, window_end.date(), series_id, overridden)
+            dates += [day for day in later if day > dates[-1]] if dates else later
+        return dates
+
+    @staticmethod
+    def period(recurrence: Recurrence) -> int:
+        """Days after which the rule's pattern of dates repeats"""
+        return recurrence.interval * (1 if recurrence.frequency == 'DAILY' else 7)
+
+    @classmethod
+    def series_conflicts_after(
+        cls,
+        room_id: int,
+        recurrence: Recurrence,
+        after: date,
+        series_id: Optional[int] = None,
+        overridden: Set[date] = frozenset()
+    ) -> List[date]:
+        """
+        Dates from `after` on, however far ahead, on which an occurrence of
+        recurrence would overlap an occurrence of another CONFIRMED series
+        in the room, skipping the dates in overridden and the other series'
+        overridden dates
+
+        Once both rules are running, the pairs of dates they fall on repeat
+        every lcm of their periods (at most 7 * 52 * 52 days), so one such
+        period, expanded from `after`, holds every kind of clash. Each one
+        found recurs a whole number of periods later until either rule
+        ends; the first recurrence that neither series overrides is
+        reported.
+        """
+        others = BookingSeries.objects.filter(room_id=room_id, status='CONFIRMED').exclude(
+            until__lt=after - BookingSeries.MAX_OCCURRENCE_DURATION
+        )
+        if series_id is not None:
+            others = others.exclude(pk=series_id)
+        others = list(others)
+        if not others:
+            return []
+        their_overrides: Dict[int, Set[date]] = {}
+        for other_id, day in Booking.objects.filter(series__in=others).values_list('series_id', 'occurrence_date'):
+            their_overrides.setdefault(other_id, set()).add(day)
+
+        dates = set()
+        for other in others:
+            theirs = other.recurrence()
+            first = max(after, recurrence.first_day, theirs.first_day)
+            length = timedelta(days=lcm(cls.period(recurrence), cls.period(theirs)))
+            window_start = timezone.make_aware(datetime.combine(first, time.min))
+            # Ids are the dates' ordinals, to find the clashing occurrence again
+            intervals = RoomIntervals.from_sorted(sorted(
+                (start.timestamp(), day.toordinal(), end.timestamp())
+                for day, start, end in theirs.between(
+                    window_start - BookingSeries.MAX_OCCURRENCE_DURATION,
+                    window_start + length + BookingSeries.MAX_OCCURRENCE_DURATION
+                )
+            ))
+            skipped = their_overrides.get(other.pk, set())
+            for day, start, end in recurrence.between(window_start, window_start + length):
+                for ordinal in intervals.overlapping(start.timestamp(), end.timestamp()):
+                    clash = cls._first_clash(
+                        recurrence, theirs, day, date.fromordinal(ordinal), length, overridden, skipped
+                    )
+                    if clash is not None:
+                        dates.add(clash)
+        return sorted(dates)
+
+    @staticmethod
+    def _first_clash(
+        ours: Recurrence,
+        theirs: Recurrence,
+        day: date,
+        their_day: date,
+        length: timedelta,
+        overridden: Set[date],
+        skipped: Set[date]
+    ) -> Optional[date]:
+        """
+        The first of day, day + length, ... on which both rules still have
+        the occurrence and neither overrides it; overrides are finite, so
+        an open-ended pair always has one
+        """
+        while ours.matches(day) and theirs.matches(their_day):
+            if day not in overridden and their_day not in skipped:
+                return day
+            day, their_day = day + length, their_day + length
+        return None
+
+    @staticmethod
+    def occurrences(series: BookingSeries, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """
+        Occurrences dated start_date to end_date (inclusive), expanded from
+        the rule with their overrides applied, in one query
+        """
+        recurrence = series.recurrence()
+        overrides = {
+            booking.occurrence_date: booking
+            for booking in series.overrides.filter(occurrence_date__range=(start_date, end_date))
+        }
+        result = []
+        for day in recurrence.days(start_date, end_date):
+            override = overrides.get(day)
+            if override is not None:
+                start_time, end_time = override.start_time, override.end_time
+                room_id, status, booking_id = override.room_id, override.status, override.id
+            else:
+                start_time, end_time = recurrence.occurrence(day)
+                room_id, status, booking_id = series.room_id, series.status, None
+            result.append({
+                'date': day,
+                'start_time': start_time,
+                'end_time': end_time,
+                'room': room_id,
+                'status': status,
+                'booking_id': booking_id,
+            })
+        return result
+
+    @classmethod
+    def cancel_occurrence(cls, series: BookingSeries, day: date) -> Booking:
+        """Skip the occurrence on day, storing (or updating) its override"""
+        recurrence = cls._recurrence_on(series, day)
+        with transaction.atomic():
+            override = series.overrides.select_for_update().filter(occurrence_date=day).first()
+            if override is None:
+                start_time, end_time = recurrence.occurrence(day)
+                override = cls._new_override(series, day, series.room, start_time, end_time)
+            override.status = 'CANCELLED'
+            override.save()
+        return override
+
+    @classmethod
+    def move_occurrence(
+        cls,
+        series: BookingSeries,
+        day: date,
+        start_time: datetime,
+        end_time: datetime,
+        room: Optional[Room] = None
+    ) -> Booking:
+        """
+        Move the occurrence on day to start_time-end_time (and room),
+        storing (or updating) its override
+
+        Raises IntegrityError when it overlaps a booking and SeriesConflict
+        when it overlaps a series occurrence.
+        """
+        cls._recurrence_on(series, day)
+        room = room or series.room
+        with transaction.atomic():
+            cls.lock_room(room.id)
+            override = series.overrides.select_for_update().filter(occurrence_date=day).first()
+            if override is None:
+                override = cls._new_override(series, day, room, start_time, end_time)
+            override.room, override.start_time, override.end_time = room, start_time, end_time
+            override.status = 'CONFIRMED'
+            override.save()
+            # Checked once the override is in place, so the occurrence it
+            # replaces no longer counts
+            if load_series_intervals([room.id], start_time, end_time, use_index=False):
+                raise SeriesConflict([day])
+        return override
+
+    @staticmethod
+    def _recurrence_on(series: BookingSeries, day: date) -> Recurrence:
+        recurrence = series.recurrence()
+        if not recurrence.matches(day):
+            raise ValueError(f"The series has no occurrence on {day.isoformat()}")
+        return recurrence
+
+    @staticmethod
+    def _new_override(
+        series: BookingSeries,
+        day: date,
+        room: Room,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Booking:
+        return Booking(
+            series=series,
+            occurrence_date=day,
+            room=room,
+            user_id=series.user_id,
+            start_time=start_time,
+            end_time=end_time,
+            participants_count=series.participants_count,
+            purpose=series.purpose,
+        )
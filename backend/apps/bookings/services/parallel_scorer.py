@@ -0,0 +1,151 @@
+"""
+FEATURE 3: Process-pool room scoring
+Opt-in execution mode for campus-scale candidate sets: the scorer's arrays
+are split into shards, each worker process scores one shard and returns
+its top k, and a heap merge picks the overall top k
+"""
+
+import asyncio
+import heapq
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+
+import django
+import numpy as np
+from django.conf import settings
+
+from .vectorized_scorer import VectorizedRoomScorer
+
+
+def _score_shard(
+    snapshot: Dict[str, Any],
+    offset: int,
+    participants_count: int,
+    preferred_floor: Optional[int],
+    floor_points: Optional[Dict[int, int]],
+    k: int
+) -> List[Tuple[int, float, Dict[str, float]]]:
+    """Runs in a worker: top k of one shard, with indices into the full scorer"""
+    scorer = VectorizedRoomScorer.from_snapshot(snapshot)
+    return [
+        (index + offset, score, breakdown)
+        for index, score, breakdown in scorer.top_k(participants_count, preferred_floor, k, floor_points)
+    ]
+
+
+class ParallelRoomScorer:
+    """
+    Shards VectorizedRoomScorer.top_k across a per-process worker pool
+
+    Results are identical to the in-process scorer, ties included: every
+    shard is ordered by (score desc, index) and the merge keeps that order.
+    Workers are spawned (not forked) and run django.setup(), so it is safe
+    to use from threaded ASGI/WSGI servers; async code uses atop_k, which
+    awaits the shards instead of blocking the event loop on them.
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _executor_workers = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def workers() -> int:
+        return getattr(settings, 'RECOMMENDATION_POOL_WORKERS', 0)
+
+    @staticmethod
+    def min_rooms() -> int:
+        return getattr(settings, 'RECOMMENDATION_POOL_MIN_ROOMS', 50_000)
+
+    @classmethod
+    def executor(cls, workers: int) -> ProcessPoolExecutor:
+        with cls._lock:
+            if cls._executor is None or cls._executor_workers != workers:
+                if cls._executor is not None:
+                    cls._executor.shutdown(wait=False)
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=django.setup,
+                )
+                cls._executor_workers = workers
+            return cls._executor
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown()
+                cls._executor = None
+
+    @classmethod
+    def top_k(
+        cls,
+        scorer: VectorizedRoomScorer,
+        participants_count: int,
+        preferred_floor: int = None,
+        k: int = 5,
+        floor_points: Dict[int, int] = None,
+        workers: int = None
+    ) -> List[Tuple[int, float, Dict[str, float]]]:
+        """
+        Same result as scorer.top_k; sharded across the pool when it is
+        enabled and there are at least min_rooms() candidates
+        """
+        futures = cls._submit(scorer, participants_count, preferred_floor, k, floor_points, workers)
+        if futures is None:
+            return scorer.top_k(participants_count, preferred_floor, k, floor_points)
+        return cls._merge([future.result() for future in futures], k)
+
+    @classmethod
+    async def atop_k(
+        cls,
+        scorer: VectorizedRoomScorer,
+        participants_count: int,
+        preferred_floor: int = None,
+        k: int = 5,
+        floor_points: Dict[int, int] = None,
+        workers: int = None
+    ) -> List[Tuple[int, float, Dict[str, float]]]:
+        """top_k for async code: the event loop keeps running while the shards are scored"""
+        futures = cls._submit(scorer, participants_count, preferred_floor, k, floor_points, workers)
+        if futures is None:
+            return scorer.top_k(participants_count, preferred_floor, k, floor_points)
+        shards = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+        return cls._merge(shards, k)
+
+    @classmethod
+    def _submit(
+        cls,
+        scorer: VectorizedRoomScorer,
+        participants_count: int,
+        preferred_floor: Optional[int],
+        k: int,
+        floor_points: Optional[Dict[int, int]],
+        workers: Optional[int]
+    ) -> Optional[List[Future]]:
+        """One future per shard, or None when the scorer should run in-process"""
+        workers = cls.workers() if workers is None else workers
+        if workers < 2 or len(scorer) < cls.min_rooms():
+            return None
+
+        executor = cls.executor(workers)
+        bounds = np.linspace(0, len(scorer), workers + 1).astype(int).tolist()
+        return [
+            executor.submit(
+                _score_shard, scorer.snapshot(start, stop), start,
+                participants_count, preferred_floor, floor_points, k
+            )
+            for start, stop in zip(bounds, bounds[1:])
+            if stop > start
+        ]
+
+    @staticmethod
+    def _merge(
+        shards: List[List[Tuple[int, float, Dict[str, float]]]],
+        k: int
+    ) -> List[Tuple[int, float, Dict[str, float]]]:
+        merged = heapq.merge(*shards, key=lambda result: (-result[1], result[0]))
+        return list(islice(merged, k))
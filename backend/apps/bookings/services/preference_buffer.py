@@ -0,0 +1,106 @@
+"""
+FEATURE 3: Write-behind buffer for user room preferences
+New bookings add to UserRoomPreference either immediately (one atomic
+upsert) or, when PREFERENCE_WRITE_BEHIND is enabled, through an
+in-process buffer that coalesces increments and flushes them in batches
+"""
+
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from ..models import UserRoomPreference
+
+logger = logging.getLogger(__name__)
+
+
+class PreferenceWriteBuffer:
+    """
+    Pending (bookings, decay weight) increments per (user_id, room_id)
+
+    Increments are only buffered once the booking's transaction commits,
+    and are flushed when the buffer is full, when the oldest increment is
+    older than the flush interval (checked after each request) and at
+    process exit. Increments still buffered when a process is killed are
+    lost; preferences are a ranking signal, and
+    backfill_preference_decay rebuilds them from bookings.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[int, int], Tuple[int, float]] = {}
+        self._oldest: Optional[float] = None
+
+    @staticmethod
+    def enabled() -> bool:
+        return getattr(settings, 'PREFERENCE_WRITE_BEHIND', False)
+
+    @staticmethod
+    def max_pending() -> int:
+        return getattr(settings, 'PREFERENCE_WRITE_BEHIND_MAX_PENDING', 500)
+
+    @staticmethod
+    def interval() -> float:
+        return getattr(settings, 'PREFERENCE_WRITE_BEHIND_INTERVAL_SECONDS', 5)
+
+    def record(self, user_id: int, room_id: int, booked_at: datetime):
+        """One new CONFIRMED booking of room_id by user_id"""
+        self.record_many([(user_id, room_id, booked_at)])
+
+    def record_many(self, bookings: Iterable[Tuple[int, int, datetime]]):
+        """New CONFIRMED (user_id, room_id, booked_at) bookings, in one upsert"""
+        increments: Dict[Tuple[int, int], Tuple[int, float]] = {}
+        for user_id, room_id, booked_at in bookings:
+            count, weight = increments.get((user_id, room_id), (0, 0.0))
+            increments[(user_id, room_id)] = (count + 1, weight + UserRoomPreference.decay_weight(booked_at))
+        if not increments:
+            return
+        if not self.enabled():
+            UserRoomPreference.add_bookings(increments)
+            return
+        transaction.on_commit(lambda: self._add(increments))
+
+    def _add(self, increments: Dict[Tuple[int, int], Tuple[int, float]]):
+        if self._merge(increments) >= self.max_pending():
+            self.flush()
+
+    def _merge(self, increments: Dict[Tuple[int, int], Tuple[int, float]]) -> int:
+        with self._lock:
+            for pair, (count, weight) in increments.items():
+                pending_count, pending_weight = self._pending.get(pair, (0, 0.0))
+                self._pending[pair] = (pending_count + count, pending_weight + weight)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            return len(self._pending)
+
+    def flush_if_due(self):
+        oldest = self._oldest
+        if oldest is not None and time.monotonic() - oldest >= self.interval():
+            self.flush()
+
+    def flush(self):
+        """Write every pending increment in batched upserts"""
+        with self._lock:
+            batch, self._pending, self._oldest = self._pending, {}, None
+        if not batch:
+            return
+        try:
+            UserRoomPreference.add_bookings(batch)
+        except Exception:
+            # Keep the increments for the next flush rather than dropping them
+            logger.exception("Flushing %d preference increments failed", len(batch))
+            self._merge(batch)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+# One buffer per worker process
+preference_buffer = PreferenceWriteBuffer()
+atexit.register(preference_buffer.flush)
@@ -0,0 +1,244 @@
+"""
+FEATURE 3: Recommendation result cache
+Process-local LRU-with-TTL cache of recommend results, validated against
+per-room generation counters in the shared cache so a room that was just
+booked (in any worker) is never served from a stale entry
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.floors.services.shared_cache import workers_share_cache
+
+
+class RecommendationCache:
+    """
+    Entries remember the generation of every room they return plus the
+    global write sequence. Booking writes bump the room's generation and
+    the sequence; Room writes bump a global generation that drops
+    everything. A result computed while a write landed is not stored.
+    """
+
+    SEQUENCE_KEY = 'bookings:recommendations:write_sequence'
+    GLOBAL_KEY = 'bookings:recommendations:global_generation'
+    ROOM_KEY = 'bookings:recommendations:room:{}'
+
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Dict[str, int], List[Dict[str, Any]]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+        self.evictions = 0
+        self.skipped = 0
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries or getattr(settings, 'RECOMMENDATION_CACHE_MAX_ENTRIES', 1024)
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._ttl_seconds or getattr(settings, 'RECOMMENDATION_CACHE_TTL_SECONDS', 60)
+
+    @staticmethod
+    def enabled() -> bool:
+        """
+        Off unless RECOMMENDATION_CACHE_ENABLED, and then still off when the
+        generation counters do not reach every worker (see
+        apps.floors.services.shared_cache): a worker would never hear of
+        bookings made in the others and keep serving their rooms
+        """
+        return getattr(settings, 'RECOMMENDATION_CACHE_ENABLED', False) and workers_share_cache()
+
+    @staticmethod
+    def normalize_window(start_time: datetime, end_time: datetime) -> Tuple[datetime, datetime]:
+        """
+        Widen the window to whole minutes (start down, end up); results for
+        the wider window are also valid for the original one
+        """
+        start = start_time.replace(second=0, microsecond=0)
+        end = end_time.replace(second=0, microsecond=0)
+        if end < end_time:
+            end += timedelta(minutes=1)
+        return start, end
+
+    @staticmethod
+    def make_key(
+        user_id: Optional[int],
+        participants_count: int,
+        start_time: datetime,
+        end_time: datetime,
+        required_amenities: List[str],
+        preferred_floor: Optional[int],
+        near_location: Optional[Tuple[int, float, float]] = None,
+        attendee_ids: Tuple[int, ...] = (),
+        use_attendee_floors: bool = False
+    ) -> Hashable:
+        return (
+            user_id,
+            participants_count,
+            start_time.timestamp(),
+            end_time.timestamp(),
+            tuple(sorted(set(required_amenities))),
+            preferred_floor,
+            near_location,
+            attendee_ids,
+            use_attendee_floors,
+        )
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        if not self.enabled():
+            return compute()
+
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        sequence_before = cache.get(self.SEQUENCE_KEY, 0)
+        results = compute()
+        self._set(key, results, sequence_before)
+        return results
+
+    async def aget_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        get_or_compute for async views, awaiting compute() on a miss; the
+        shared cache is read through its async API, off the event loop
+        """
+        if not self.enabled():
+            return await compute()
+
+        entry = self._entry(key)
+        if entry is not None:
+            cached = self._validate(key, *entry, await cache.aget_many(list(entry[0])))
+            if cached is not None:
+                return cached
+
+        sequence_before = await cache.aget(self.SEQUENCE_KEY, 0)
+        results = await compute()
+        names = self._generation_keys(results) + [self.SEQUENCE_KEY]
+        self._store(key, results, sequence_before, await cache.aget_many(names))
+        return results
+
+    def _generation_keys(self, results: List[Dict[str, Any]]) -> List[str]:
+        return [self.GLOBAL_KEY] + [self.ROOM_KEY.format(rec['room'].id) for rec in results]
+
+    def _get(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        entry = self._entry(key)
+        if entry is None:
+            return None
+        # One round trip to the shared cache to validate every returned room
+        return self._validate(key, *entry, cache.get_many(list(entry[0])))
+
+    def _entry(self, key: Hashable) -> Optional[Tuple[Dict[str, int], List[Dict[str, Any]]]]:
+        """(generations, results) of an unexpired local entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, generations, results = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            return generations, results
+
+    def _validate(
+        self,
+        key: Hashable,
+        generations: Dict[str, int],
+        results: List[Dict[str, Any]],
+        current: Dict[str, int]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """results if the current generations still match the entry's"""
+        with self._lock:
+            if any(current.get(name, 0) != value for name, value in generations.items()):
+                self._entries.pop(key, None)
+                self.stale += 1
+                self.misses += 1
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        return results
+
+    def _set(self, key: Hashable, results: List[Dict[str, Any]], sequence_before: int):
+        names = self._generation_keys(results) + [self.SEQUENCE_KEY]
+        self._store(key, results, sequence_before, cache.get_many(names))
+
+    def _store(
+        self,
+        key: Hashable,
+        results: List[Dict[str, Any]],
+        sequence_before: int,
+        current: Dict[str, int]
+    ):
+        if current.get(self.SEQUENCE_KEY, 0) != sequence_before:
+            # A booking landed while we computed; the result may be stale
+            with self._lock:
+                self.skipped += 1
+            return
+
+        generations = {name: current.get(name, 0) for name in self._generation_keys(results)}
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, generations, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @staticmethod
+    def _bump(name: str):
+        cache.add(name, 0, timeout=None)
+        cache.incr(name)
+
+    def invalidate_room(self, room_id: int):
+        """Booking written for room_id: entries returning it become stale"""
+        self._bump(self.ROOM_KEY.format(room_id))
+        self._bump(self.SEQUENCE_KEY)
+
+    def invalidate_all(self):
+        """Room written: any entry may now be wrong"""
+        self._bump(self.GLOBAL_KEY)
+        self._bump(self.SEQUENCE_KEY)
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled(),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'skipped_stores': self.skipped,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+# One cache per worker process
+recommendation_cache = RecommendationCache()
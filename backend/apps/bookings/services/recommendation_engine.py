@@ -214,13 +214,21 @@ FEATURE 3: AI-Powered Room Recommendation Engine
 Recommends best rooms based on user preferences and meeting requirements
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
-from django.db.models import Q, Count
+from django.db.models import Exists, F, OuterRef, QuerySet, Sum
 from django.utils import timezone
 from datetime import datetime, timedelta
 from apps.floors.models import Room
-from ..models import Booking, UserRoomPreference
+from apps.floors.services.room_catalog import room_catalog
+from apps.floors.services.spatial_index import room_locator
+from ..models import Booking, RoomUsageBucket, UserRoomPreference
+from .availability_index import aload_series_intervals, booking_index, load_series_intervals
+from .parallel_scorer import ParallelRoomScorer
+from .room_affinity import AffinityModel, room_affinity
+from .vectorized_scorer import VectorizedRoomScorer
 
 
 class RoomRecommendationEngine:
@@ -234,6 +242,21 @@ class RoomRecommendationEngine:
     WEIGHT_AMENITIES = 5
     WEIGHT_RECENT_USAGE = 3
     WEIGHT_PROXIMITY = 2
+    WEIGHT_AFFINITY = 2
+    
+    # Bonus for a room on the preferred floor (group mode: scaled by the
+    # share of attendees whose home floor it is)
+    FLOOR_PREFERENCE_POINTS = 15
+    
+    # Collaborative-filtering affinity is scaled to 0..AFFINITY_POINTS
+    AFFINITY_POINTS = 10
+    
+    # Days of daily usage buckets (today included) behind the usage penalty
+    RECENT_USAGE_DAYS = 7
+    
+    # Nearest candidates to the requested location that earn proximity
+    # points: the closest gets PROXIMITY_RANKS, the next one less, ...
+    PROXIMITY_RANKS = 10
     
     @classmethod
     def recommend_rooms(
@@ -243,59 +266,209 @@ class RoomRecommendationEngine:
         start_time: datetime,
         end_time: datetime,
         required_amenities: List[str] = None,
-        preferred_floor: int = None
+        preferred_floor: int = None,
+        near_location: Tuple[int, float, float] = None,
+        attendee_ids: List[int] = None,
+        use_attendee_floors: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Main recommendation method
         Returns list of rooms sorted by recommendation score
+        
+        near_location: optional (floor_plan_id, x, y), e.g. someone's desk or
+        the elevator, that favours the closest rooms on that floor plan
+        
+        attendee_ids: group mode; the preferences of these users (plus the
+        requesting user) are averaged, and with use_attendee_floors their
+        home floors replace preferred_floor when none is given
+        """
+        required_amenities = required_amenities or []
+        
+        # Step 1: Get available rooms from the in-process room catalog
+        available = cls._get_available_records(
+            participants_count,
+            start_time,
+            end_time,
+            required_amenities
+        )
+        
+        # Step 2: Load scoring inputs for all candidates in bulk; the whole
+        # booking history of the user also drives the affinity lookup
+        room_ids = available['id'].tolist()
+        preferences, floor_points = cls._load_preferences(
+            user, attendee_ids, preferred_floor, use_attendee_floors
+        )
+        recent_usage = cls._load_recent_usage(room_ids)
+        proximity = cls._load_proximity(near_location, room_ids)
+        
+        # Step 3: Score all candidates and keep the top 5
+        top = cls._rank(
+            available, participants_count, preferred_floor,
+            preferences, recent_usage, proximity, floor_points
+        )
+        
+        # Step 4: Only the recommended rooms are loaded as model instances
+        rooms = Room.objects.select_related('floor_plan').in_bulk(
+            [room_ids[index] for index, _, _ in top]
+        )
+        return cls._results(top, room_ids, rooms)
+    
+    @classmethod
+    async def arecommend_rooms(
+        cls,
+        user: User,
+        participants_count: int,
+        start_time: datetime,
+        end_time: datetime,
+        required_amenities: List[str] = None,
+        preferred_floor: int = None,
+        near_location: Tuple[int, float, float] = None,
+        attendee_ids: List[int] = None,
+        use_attendee_floors: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        recommend_rooms for async views: the same steps through the async
+        ORM. Django 4.2 runs async queries one after another in the
+        thread-sensitive executor, so the loads of step 2 are awaited in
+        turn; file and cache reads (room catalog, affinity model, spatial
+        index) happen in worker threads, never on the event loop.
         """
         required_amenities = required_amenities or []
         
-        # Step 1: Get available rooms
-        available_rooms = cls._get_available_rooms(
+        available = await cls._aget_available_records(
             participants_count,
             start_time,
             end_time,
             required_amenities
         )
         
-        # Step 2: Score each room
+        room_ids = available['id'].tolist()
+        preferences, floor_points = await cls._aload_preferences(
+            user, attendee_ids, preferred_floor, use_attendee_floors
+        )
+        recent_usage = await cls._aload_recent_usage(room_ids)
+        # The spatial index only queries when a floor is first used
+        proximity = await sync_to_async(cls._load_proximity)(near_location, room_ids)
+        affinity_model = await room_affinity.amodel()
+        
+        # The process pool's shards are awaited rather than waited on
+        top = await ParallelRoomScorer.atop_k(
+            cls._scorer(available, preferences, recent_usage, proximity, affinity_model),
+            participants_count, preferred_floor, k=5, floor_points=floor_points
+        )
+        
+        rooms = await Room.objects.select_related('floor_plan').ain_bulk(
+            [room_ids[index] for index, _, _ in top]
+        )
+        return cls._results(top, room_ids, rooms)
+    
+    @classmethod
+    def _rank(
+        cls,
+        available: np.ndarray,
+        participants_count: int,
+        preferred_floor: Optional[int],
+        preferences: Dict[int, float],
+        recent_usage: Dict[int, int],
+        proximity: Dict[int, int],
+        floor_points: Optional[Dict[int, int]]
+    ) -> List[Tuple[int, float, Dict[str, float]]]:
+        """
+        Score the available records as arrays and return the top 5 as
+        (index, score, breakdown), sharded across the process pool for
+        campus-scale candidate sets
+        """
+        return ParallelRoomScorer.top_k(
+            cls._scorer(available, preferences, recent_usage, proximity),
+            participants_count, preferred_floor, k=5, floor_points=floor_points
+        )
+    
+    @classmethod
+    def _scorer(
+        cls,
+        available: np.ndarray,
+        preferences: Dict[int, float],
+        recent_usage: Dict[int, int],
+        proximity: Dict[int, int],
+        affinity_model: Optional[AffinityModel] = None
+    ) -> VectorizedRoomScorer:
+        """
+        Scoring arrays for the available records, room affinity included
+        (from affinity_model when given, as async callers do)
+        """
+        affinity = room_affinity.points(
+            preferences, available['id'].tolist(), cls.AFFINITY_POINTS, model=affinity_model
+        )
+        return VectorizedRoomScorer.from_records(
+            cls, available, preferences, recent_usage, proximity, affinity
+        )
+    
+    @staticmethod
+    def _results(
+        top: List[Tuple[int, float, Dict[str, float]]],
+        room_ids: List[int],
+        rooms: Dict[int, Room]
+    ) -> List[Dict[str, Any]]:
+        """Ranked entries with their rooms; a room deleted since the catalog refreshed is skipped"""
+        return [
+            {'room': rooms[room_ids[index]], 'score': score, 'score_breakdown': breakdown}
+            for index, score, breakdown in top
+            if room_ids[index] in rooms
+        ]
+    
+    @classmethod
+    def _score_rooms(
+        cls,
+        rooms: List[Room],
+        participants_count: int,
+        preferred_floor: int = None,
+        preferences: Dict[int, float] = None,
+        recent_usage: Dict[int, int] = None,
+        proximity: Dict[int, int] = None,
+        affinity: Dict[int, int] = None,
+        floor_points: Dict[int, int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Scalar reference scorer: score every room in Python and sort
+        Kept for benchmarking and verifying the vectorized path
+        """
+        preferences = preferences or {}
+        recent_usage = recent_usage or {}
+        proximity = proximity or {}
+        affinity = affinity or {}
+        
         scored_rooms = []
-        for room in available_rooms:
-            score = cls._calculate_room_score(
+        for room in rooms:
+            breakdown = cls._get_score_breakdown(
                 room,
-                user,
                 participants_count,
-                required_amenities,
-                preferred_floor
+                preferred_floor,
+                preference_count=preferences.get(room.id, 0),
+                recent_bookings=recent_usage.get(room.id, 0),
+                floor_number=room.floor_plan.floor_number,
+                proximity_points=proximity.get(room.id, 0),
+                affinity_points=affinity.get(room.id, 0),
+                floor_points=floor_points
             )
             
             scored_rooms.append({
                 'room': room,
-                'score': score,
-                'score_breakdown': cls._get_score_breakdown(
-                    room,
-                    user,
-                    participants_count,
-                    required_amenities,
-                    preferred_floor
-                )
+                'score': max(float(breakdown['total']), 0),  # Ensure non-negative
+                'score_breakdown': breakdown
             })
         
-        # Step 3: Sort by score
         scored_rooms.sort(key=lambda x: x['score'], reverse=True)
         
         return scored_rooms[:5]  # Top 5 recommendations
     
     @staticmethod
-    def _get_available_rooms(
+    def _get_candidate_rooms(
         min_capacity: int,
-        start_time: datetime,
-        end_time: datetime,
         required_amenities: List[str]
-    ) -> List[Room]:
+    ) -> QuerySet:
         """
-        Filter rooms by availability and basic requirements
+        Bookable rooms meeting capacity and amenity requirements, ignoring
+        availability
         """
         # Base filters
         rooms = Room.objects.filter(
@@ -304,117 +477,365 @@ class RoomRecommendationEngine:
             capacity__gte=min_capacity
         )
         
-        # Filter by amenities
-        for amenity in required_amenities:
-            if amenity == 'projector':
-                rooms = rooms.filter(has_projector=True)
-            elif amenity == 'whiteboard':
-                rooms = rooms.filter(has_whiteboard=True)
-            elif amenity == 'video_conference':
-                rooms = rooms.filter(has_video_conference=True)
-            elif amenity == 'tv_monitor':
-                rooms = rooms.filter(has_tv_monitor=True)
-            elif amenity == 'premium_audio':
-                rooms = rooms.filter(has_premium_audio=True)
-            elif amenity == 'natural_light':
-                rooms = rooms.filter(has_natural_light=True)
-            elif amenity == 'kitchen_access':
-                rooms = rooms.filter(has_kitchen_access=True)
-        
-        # Check availability (no overlapping bookings)
-        available = []
-        for room in rooms:
-            conflicts = Booking.objects.filter(
-                room=room,
-                status='CONFIRMED',
-                start_time__lt=end_time,
-                end_time__gt=start_time
-            )
-            if not conflicts.exists():
-                available.append(room)
+        # Filter by amenities: one bitwise predicate on the packed mask
+        required_mask = Room.amenity_mask_for(required_amenities)
+        if required_mask:
+            rooms = rooms.annotate(
+                matched_amenities=F('amenity_mask').bitand(required_mask)
+            ).filter(matched_amenities=required_mask)
         
-        return available
+        return rooms.select_related('floor_plan')
     
     @classmethod
-    def _calculate_room_score(
+    def _get_candidate_records(
         cls,
-        room: Room,
-        user: User,
-        participants_count: int,
-        required_amenities: List[str],
-        preferred_floor: int = None
-    ) -> float:
+        min_capacity: int,
+        required_amenities: List[str]
+    ) -> np.ndarray:
         """
-        Calculate total recommendation score for a room
+        Same rooms as _get_candidate_rooms, as room catalog records sorted
+        by id, without a query
         """
-        score = 0.0
-        
-        # 1. User preference score
-        pref = UserRoomPreference.objects.filter(user=user, room=room).first()
-        if pref:
-            score += pref.booking_count * cls.WEIGHT_USER_PREFERENCE
-        
-        # 2. Capacity match score (prefer rooms close to required size)
-        capacity_diff = abs(room.capacity - participants_count)
-        capacity_score = max(0, 10 - capacity_diff)  # Max 10 points
-        score += capacity_score * cls.WEIGHT_CAPACITY_MATCH
-        
-        # 3. Amenities score
-        amenity_count = len(room.amenities_list)
-        score += amenity_count * cls.WEIGHT_AMENITIES
-        
-        # 4. Recent usage score (rooms used recently get slight penalty to distribute usage)
-        recent_bookings = Booking.objects.filter(
-            room=room,
-            start_time__gte=timezone.now() - timedelta(days=7)
-        ).count()
-        score -= recent_bookings * cls.WEIGHT_RECENT_USAGE
+        return cls._filter_candidate_records(room_catalog.records(), min_capacity, required_amenities)
+    
+    @staticmethod
+    def _filter_candidate_records(
+        records: np.ndarray,
+        min_capacity: int,
+        required_amenities: List[str]
+    ) -> np.ndarray:
+        required_mask = Room.amenity_mask_for(required_amenities)
+        return records[
+            records['is_active']
+            & ~records['is_under_maintenance']
+            & (records['capacity'] >= min_capacity)
+            & ((records['amenity_mask'] & required_mask) == required_mask)
+        ]
+    
+    @classmethod
+    def _get_available_records(
+        cls,
+        min_capacity: int,
+        start_time: datetime,
+        end_time: datetime,
+        required_amenities: List[str]
+    ) -> np.ndarray:
+        """
+        Candidate records without a confirmed booking or series occurrence
+        overlapping the window
+        """
+        records = cls._get_candidate_records(min_capacity, required_amenities)
+        free = cls._free_records_from_index(records, start_time, end_time)
+        if free is not None:
+            return free
+        
+        busy = list(cls._busy_rooms_query(start_time, end_time))
+        busy.extend(load_series_intervals(None, start_time, end_time, use_index=False))
+        return records[~np.isin(records['id'], np.array(busy, dtype=np.int64))]
+    
+    @classmethod
+    async def _aget_available_records(
+        cls,
+        min_capacity: int,
+        start_time: datetime,
+        end_time: datetime,
+        required_amenities: List[str]
+    ) -> np.ndarray:
+        records = cls._filter_candidate_records(
+            await room_catalog.arecords(), min_capacity, required_amenities
+        )
+        free = cls._free_records_from_index(records, start_time, end_time)
+        if free is not None:
+            return free
         
-        # 5. Floor preference score
-        if preferred_floor and room.floor_plan.floor_number == preferred_floor:
-            score += 15
+        busy = [room_id async for room_id in cls._busy_rooms_query(start_time, end_time)]
+        busy.extend(await aload_series_intervals(None, start_time, end_time))
+        return records[~np.isin(records['id'], np.array(busy, dtype=np.int64))]
+    
+    @staticmethod
+    def _free_records_from_index(
+        records: np.ndarray,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Optional[np.ndarray]:
+        """
+        The records without an overlapping booking, checked in memory, or
+        None when the booking index is cold or stale
+        """
+        if not booking_index.covers(start_time):
+            return None
+        free_ids = booking_index.free_room_ids(records['id'].tolist(), start_time, end_time)
+        if free_ids is None:
+            return None
+        return records[np.isin(records['id'], np.fromiter(free_ids, np.int64, len(free_ids)))]
+    
+    @staticmethod
+    def _busy_rooms_query(start_time: datetime, end_time: datetime) -> QuerySet:
+        """
+        Ids of rooms with a CONFIRMED booking overlapping the window; these
+        are few, so they are fetched instead of sending every candidate id
+        to the database
+        """
+        return Booking.objects.filter(
+            status='CONFIRMED',
+            start_time__lt=end_time,
+            end_time__gt=start_time
+        ).values_list('room_id', flat=True)
+    
+    @classmethod
+    def _get_available_rooms(
+        cls,
+        min_capacity: int,
+        start_time: datetime,
+        end_time: datetime,
+        required_amenities: List[str]
+    ) -> List[Room]:
+        """
+        Filter rooms by availability and basic requirements, as model
+        instances (ORM path, used by the scalar reference scorer)
+        """
+        rooms = cls._get_candidate_rooms(min_capacity, required_amenities).order_by('id')
+        
+        # Check availability (no overlapping bookings) in memory when the
+        # booking index is warm and current
+        if booking_index.covers(start_time):
+            candidates = list(rooms)
+            free_ids = booking_index.free_room_ids([room.id for room in candidates], start_time, end_time)
+            if free_ids is not None:
+                return [room for room in candidates if room.id in free_ids]
+        
+        # Otherwise as a single anti-join instead of one EXISTS query per
+        # candidate room; series occurrences are expanded for the window
+        conflicts = Booking.objects.filter(
+            room=OuterRef('pk'),
+            status='CONFIRMED',
+            start_time__lt=end_time,
+            end_time__gt=start_time
+        )
+        series_busy = list(load_series_intervals(None, start_time, end_time, use_index=False))
         
-        return max(score, 0)  # Ensure non-negative
+        return list(rooms.filter(~Exists(conflicts)).exclude(id__in=series_busy))
+    
+    @classmethod
+    def _load_user_preferences(cls, user: User, room_ids: List[int] = None) -> Dict[int, float]:
+        """
+        Time-decayed booking counts of the user for every candidate room
+        (every room when room_ids is None), in one query
+        """
+        if user is None or room_ids == []:
+            return {}
+        
+        # Decay is applied on read: one factor for every stored weight
+        factor = UserRoomPreference.decay_factor()
+        return {
+            room_id: round(weight * factor, 2)
+            for room_id, weight in cls._user_preferences_query(user, room_ids)
+        }
+    
+    @classmethod
+    async def _aload_user_preferences(cls, user: User, room_ids: List[int] = None) -> Dict[int, float]:
+        if user is None or room_ids == []:
+            return {}
+        
+        factor = UserRoomPreference.decay_factor()
+        return {
+            room_id: round(weight * factor, 2)
+            async for room_id, weight in cls._user_preferences_query(user, room_ids)
+        }
+    
+    @staticmethod
+    def _user_preferences_query(user: User, room_ids: Optional[List[int]]) -> QuerySet:
+        preferences = UserRoomPreference.objects.filter(user=user, decayed_weight__gt=0)
+        if room_ids is not None:
+            preferences = preferences.filter(room_id__in=room_ids)
+        return preferences.values_list('room_id', 'decayed_weight')
+    
+    @classmethod
+    def _load_preferences(
+        cls,
+        user: User,
+        attendee_ids: Optional[List[int]],
+        preferred_floor: Optional[int],
+        use_attendee_floors: bool
+    ) -> Tuple[Dict[int, float], Optional[Dict[int, int]]]:
+        """
+        (preferences, floor_points): the user's own preferences, or in group
+        mode the attendees' mean preferences plus, when their home floors
+        stand in for preferred_floor, per-floor points
+        """
+        if not attendee_ids:
+            return cls._load_user_preferences(user), None
+        preferences, floor_points = cls._load_group_preferences(cls._attendee_group(user, attendee_ids))
+        if preferred_floor or not use_attendee_floors:
+            floor_points = None
+        return preferences, floor_points
+    
+    @classmethod
+    async def _aload_preferences(
+        cls,
+        user: User,
+        attendee_ids: Optional[List[int]],
+        preferred_floor: Optional[int],
+        use_attendee_floors: bool
+    ) -> Tuple[Dict[int, float], Optional[Dict[int, int]]]:
+        if not attendee_ids:
+            return await cls._aload_user_preferences(user), None
+        preferences, floor_points = await cls._aload_group_preferences(cls._attendee_group(user, attendee_ids))
+        if preferred_floor or not use_attendee_floors:
+            floor_points = None
+        return preferences, floor_points
+    
+    @staticmethod
+    def _attendee_group(user: Optional[User], attendee_ids: List[int]) -> List[int]:
+        """The attendees plus the requesting user, sorted"""
+        return sorted(set(attendee_ids) | ({user.id} if user is not None else set()))
+    
+    @classmethod
+    def _load_group_preferences(cls, user_ids: List[int]) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """
+        Group mode inputs from every attendee's preference rows, in one query:
+        the mean time-decayed booking count per room across attendees, and
+        floor preference points per floor (FLOOR_PREFERENCE_POINTS times the
+        share of attendees whose most-booked room is on that floor)
+        """
+        return cls._aggregate_group_preferences(list(cls._group_preferences_query(user_ids)), len(user_ids))
+    
+    @classmethod
+    async def _aload_group_preferences(cls, user_ids: List[int]) -> Tuple[Dict[int, float], Dict[int, int]]:
+        rows = [row async for row in cls._group_preferences_query(user_ids)]
+        return cls._aggregate_group_preferences(rows, len(user_ids))
+    
+    @staticmethod
+    def _group_preferences_query(user_ids: List[int]) -> QuerySet:
+        return UserRoomPreference.objects.filter(
+            user_id__in=user_ids,
+            decayed_weight__gt=0
+        ).values_list('user_id', 'room_id', 'decayed_weight', 'room__floor_plan__floor_number')
+    
+    @classmethod
+    def _aggregate_group_preferences(
+        cls,
+        rows: List[Tuple[int, int, float, int]],
+        group_size: int
+    ) -> Tuple[Dict[int, float], Dict[int, int]]:
+        if not rows:
+            return {}, {}
+        
+        users, rooms, weights, floors = (np.array(column) for column in zip(*rows))
+        weights = weights.astype(np.float64) * UserRoomPreference.decay_factor()
+        
+        room_ids, room_index = np.unique(rooms, return_inverse=True)
+        means = np.bincount(room_index, weights=weights) / group_size
+        preferences = {
+            room_id: round(mean, 2)
+            for room_id, mean in zip(room_ids.tolist(), means.tolist())
+        }
+        
+        # Home floor: the floor of each attendee's highest-weight room
+        order = np.lexsort((-weights, users))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = users[order][1:] != users[order][:-1]
+        home_floors, counts = np.unique(floors[order][first], return_counts=True)
+        floor_points = {
+            floor: round(cls.FLOOR_PREFERENCE_POINTS * count / group_size)
+            for floor, count in zip(home_floors.tolist(), counts.tolist())
+        }
+        
+        return preferences, floor_points
+    
+    @classmethod
+    def _load_recent_usage(cls, room_ids: List[int]) -> Dict[int, int]:
+        """
+        CONFIRMED bookings per candidate room starting in the last 7 days,
+        summed from the daily usage buckets in one grouped query
+        """
+        if not room_ids:
+            return {}
+        return dict(cls._recent_usage_query(room_ids))
+    
+    @classmethod
+    async def _aload_recent_usage(cls, room_ids: List[int]) -> Dict[int, int]:
+        if not room_ids:
+            return {}
+        return {room_id: count async for room_id, count in cls._recent_usage_query(room_ids)}
+    
+    @classmethod
+    def _recent_usage_query(cls, room_ids: List[int]) -> QuerySet:
+        today = timezone.localdate()
+        return RoomUsageBucket.objects.filter(
+            room_id__in=room_ids,
+            day__gt=today - timedelta(days=cls.RECENT_USAGE_DAYS),
+            day__lte=today
+        ).order_by().values('room_id').annotate(
+            count=Sum('bookings')
+        ).filter(count__gt=0).values_list('room_id', 'count')
+    
+    @classmethod
+    def _load_proximity(
+        cls,
+        near_location: Optional[Tuple[int, float, float]],
+        room_ids: List[int]
+    ) -> Dict[int, int]:
+        """
+        Proximity points of the candidates nearest to near_location, from a
+        nearest-k lookup on the floor plan's spatial index
+        """
+        if near_location is None or not room_ids:
+            return {}
+        
+        floor_plan_id, x, y = near_location
+        nearest = room_locator.nearest(floor_plan_id, x, y, cls.PROXIMITY_RANKS, set(room_ids))
+        return {
+            room_id: cls.PROXIMITY_RANKS - rank
+            for rank, (distance, room_id) in enumerate(nearest)
+        }
     
     @classmethod
     def _get_score_breakdown(
         cls,
         room: Room,
-        user: User,
         participants_count: int,
-        required_amenities: List[str],
-        preferred_floor: int = None
+        preferred_floor: int = None,
+        preference_count: float = 0,
+        recent_bookings: int = 0,
+        floor_number: int = None,
+        proximity_points: int = 0,
+        affinity_points: int = 0,
+        floor_points: Dict[int, int] = None
     ) -> Dict[str, float]:
         """
-        Get detailed breakdown of recommendation score
+        Get detailed breakdown of recommendation score from preloaded inputs
         """
         breakdown = {}
         
-        # User preference
-        pref = UserRoomPreference.objects.filter(user=user, room=room).first()
-        breakdown['user_preference'] = pref.booking_count * cls.WEIGHT_USER_PREFERENCE if pref else 0
+        # 1. User preference
+        breakdown['user_preference'] = preference_count * cls.WEIGHT_USER_PREFERENCE
         
-        # Capacity match
+        # 2. Capacity match (prefer rooms close to required size)
         capacity_diff = abs(room.capacity - participants_count)
-        capacity_score = max(0, 10 - capacity_diff)
+        capacity_score = max(0, 10 - capacity_diff)  # Max 10 points
         breakdown['capacity_match'] = capacity_score * cls.WEIGHT_CAPACITY_MATCH
         
-        # Amenities
+        # 3. Amenities
         breakdown['amenities'] = len(room.amenities_list) * cls.WEIGHT_AMENITIES
         
-        # Recent usage
-        recent_bookings = Booking.objects.filter(
-            room=room,
-            start_time__gte=timezone.now() - timedelta(days=7)
-        ).count()
+        # 4. Recent usage (rooms used recently get slight penalty to distribute usage)
         breakdown['recent_usage_penalty'] = -recent_bookings * cls.WEIGHT_RECENT_USAGE
         
-        # Floor preference
-        if preferred_floor and room.floor_plan.floor_number == preferred_floor:
-            breakdown['floor_preference'] = 15
+        # 5. Floor preference
+        if preferred_floor and floor_number == preferred_floor:
+            breakdown['floor_preference'] = cls.FLOOR_PREFERENCE_POINTS
+        elif floor_points:
+            breakdown['floor_preference'] = floor_points.get(floor_number, 0)
         else:
             breakdown['floor_preference'] = 0
         
+        # 6. Proximity to the requested location
+        breakdown['proximity'] = proximity_points * cls.WEIGHT_PROXIMITY
+        
+        # 7. Collaborative-filtering affinity (similar users' rooms)
+        breakdown['affinity'] = affinity_points * cls.WEIGHT_AFFINITY
+        
         breakdown['total'] = sum(breakdown.values())
         
         return breakdown
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""
+FEATURE 3: Recurrence rules
+Daily and weekly rules anchored at a first occurrence, expanded either in
+full (bounded series) or lazily for a time window (booking series)
+"""
+
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Collection, Iterator, List, Optional, Tuple
+
+from django.utils import timezone
+
+FREQUENCIES = ('DAILY', 'WEEKLY')
+MAX_OCCURRENCES = 366
+
+
+class RecurrenceError(ValueError):
+    """The recurrence rule is invalid or expands to too many occurrences"""
+
+
+class Recurrence:
+    """
+    A daily or weekly rule anchored at its first occurrence
+
+    Occurrences fall on the dates from start_time's (local) date onwards
+    that match the rule, at start_time's local wall-clock time, so a weekly
+    10:00 meeting stays at 10:00 across DST changes. DAILY repeats every
+    `interval` days; WEEKLY every `interval` weeks on `weekdays` (0 is
+    Monday; start_time's weekday by default). `until` is the last date an
+    occurrence may fall on; None repeats forever.
+    """
+
+    __slots__ = ('frequency', 'interval', 'weekdays', 'until', 'first_day', 'wall_clock', 'duration', '_monday')
+
+    def __init__(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        frequency: str,
+        interval: int = 1,
+        weekdays: Optional[Collection[int]] = None,
+        until: Optional[date] = None
+    ):
+        if frequency not in FREQUENCIES:
+            raise RecurrenceError(f"frequency must be one of {', '.join(FREQUENCIES)}")
+        if interval < 1:
+            raise RecurrenceError("interval must be at least 1")
+        if start_time >= end_time:
+            raise RecurrenceError("End time must be after start time")
+
+        local_start = timezone.localtime(start_time)
+        self.first_day, self.wall_clock = local_start.date(), local_start.time()
+        self.duration = end_time - start_time
+        self.frequency, self.interval, self.until = frequency, interval, until
+        self.weekdays = frozenset(weekdays) if weekdays else frozenset([self.first_day.weekday()])
+        if not all(0 <= weekday <= 6 for weekday in self.weekdays):
+            raise RecurrenceError("weekdays must be between 0 (Monday) and 6 (Sunday)")
+        self._monday = self.first_day - timedelta(days=self.first_day.weekday())
+
+    def matches(self, day: date) -> bool:
+        """Whether an occurrence falls on day"""
+        if day < self.first_day or (self.until is not None and day > self.until):
+            return False
+        if self.frequency == 'DAILY':
+            return (day - self.first_day).days % self.interval == 0
+        return day.weekday() in self.weekdays and (day - self._monday).days // 7 % self.interval == 0
+
+    def days(self, first: Optional[date] = None, last: Optional[date] = None) -> Iterator[date]:
+        """Occurrence dates from first to last (inclusive; open-ended by default)"""
+        day = max(first, self.first_day) if first else self.first_day
+        if self.until is not None:
+            last = min(last, self.until) if last else self.until
+        while last is None or day <= last:
+            if self.matches(day):
+                yield day
+            day += timedelta(days=1)
+
+    def occurrence(self, day: date) -> Tuple[datetime, datetime]:
+        start = timezone.make_aware(datetime.combine(day, self.wall_clock))
+        return start, start + self.duration
+
+    def between(self, start_time: datetime, end_time: datetime) -> Iterator[Tuple[date, datetime, datetime]]:
+        """(date, start, end) of the occurrences overlapping [start_time, end_time)"""
+        # A day of slack on both sides absorbs UTC offsets
+        first = timezone.localtime(start_time - self.duration).date() - timedelta(days=1)
+        last = timezone.localtime(end_time).date() + timedelta(days=1)
+        for day in self.days(first, last):
+            start, end = self.occurrence(day)
+            if start < end_time and end > start_time:
+                yield day, start, end
+
+    def nth_day(self, count: int) -> Optional[date]:
+        """Date of the count-th occurrence, or None if there are fewer"""
+        return next(islice(self.days(), count - 1, None), None)
+
+
+def expand_occurrences(
+    start_time: datetime,
+    end_time: datetime,
+    frequency: str,
+    interval: int = 1,
+    count: Optional[int] = None,
+    until: Optional[date] = None,
+    weekdays: Optional[Collection[int]] = None,
+    exceptions: Collection[date] = ()
+) -> List[Tuple[datetime, datetime]]:
+    """
+    (start, end) of every occurrence of a bounded rule (see Recurrence), in
+    order
+
+    The series ends after `count` occurrences or on `until` (inclusive). As
+    in iCalendar, dates in `exceptions` are skipped but still count towards
+    `count`.
+    """
+    if (count is None) == (until is None):
+        raise RecurrenceError("Give exactly one of count and until")
+    if count is not None and not 0 < count <= MAX_OCCURRENCES:
+        raise RecurrenceError(f"count must be between 1 and {MAX_OCCURRENCES}")
+
+    recurrence = Recurrence(start_time, end_time, frequency, interval, weekdays, until)
+    days = recurrence.days() if count is None else islice(recurrence.days(), count)
+    exceptions = set(exceptions)
+
+    occurrences: List[Tuple[datetime, datetime]] = []
+    for day in days:
+        if day in exceptions:
+            continue
+        if len(occurrences) == MAX_OCCURRENCES:
+            raise RecurrenceError(f"A series can have at most {MAX_OCCURRENCES} occurrences")
+        start, end = recurrence.occurrence(day)
+        if occurrences and start < occurrences[-1][1]:
+            raise RecurrenceError("Occurrences must not overlap each other")
+        occurrences.append((start, end))
+    return occurrences
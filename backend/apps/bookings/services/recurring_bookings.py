@@ -0,0 +1,140 @@
+"""
+FEATURE 3: Recurring bookings
+Books every occurrence of a bounded recurrence (see recurrence.py) as its
+own Booking: checks them all against existing bookings at once and inserts
+the free ones with one bulk_create
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+
+from apps.floors.models import Room
+from ..models import Booking, RoomUsageBucket
+from .availability_index import RoomIntervals, booking_index, load_room_intervals
+from .preference_buffer import preference_buffer
+from .recommendation_cache import recommendation_cache
+
+
+class RecurringBookingService:
+    """
+    Books a room for every occurrence of a series in a handful of queries
+
+    Existing bookings of the room over the whole series come from one range
+    query (or the interval index when warm), and the free occurrences are
+    inserted with one bulk_create. bulk_create bypasses Booking.save and its
+    signals, so their effects (usage buckets, preferences, interval index,
+    cached recommendations) are applied once for the batch. The database's
+    non-overlap constraint still guards the insert: when a concurrent
+    booking takes one of the slots in between, the check runs once more,
+    against the database.
+    """
+
+    ATTEMPTS = 2
+
+    @classmethod
+    def book(
+        cls,
+        user: User,
+        room: Room,
+        occurrences: List[Tuple[datetime, datetime]],
+        participants_count: int,
+        purpose: str = '',
+        skip_conflicts: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        One dict per occurrence, in order: start_time, end_time, booking (the
+        created Booking, or None) and conflicts (ids of the CONFIRMED
+        bookings it overlaps, and negated ids of the booking series whose
+        occurrences it overlaps). Unless skip_conflicts is set, nothing is
+        booked when any occurrence conflicts.
+
+        Raises IntegrityError when the insert still conflicts on the last
+        attempt.
+        """
+        if not occurrences:
+            return []
+        for attempt in range(cls.ATTEMPTS):
+            results = cls._check(room.id, occurrences, use_index=attempt == 0)
+            free = [result for result in results if not result['conflicts']]
+            if not free or (len(free) < len(results) and not skip_conflicts):
+                return results
+
+            try:
+                with transaction.atomic():
+                    bookings = cls._create(user, room, free, participants_count, purpose)
+            except IntegrityError as error:
+                if not Booking.is_overlap_error(error) or attempt == cls.ATTEMPTS - 1:
+                    raise
+                continue
+
+            for result, booking in zip(free, bookings):
+                result['booking'] = booking
+            return results
+
+    @staticmethod
+    def _check(
+        room_id: int,
+        occurrences: List[Tuple[datetime, datetime]],
+        use_index: bool = True
+    ) -> List[Dict[str, Any]]:
+        window_end = max(end for _, end in occurrences)
+        intervals = RoomIntervals.from_sorted(
+            load_room_intervals([room_id], occurrences[0][0], window_end, use_index).get(room_id, [])
+        )
+        return [
+            {
+                'start_time': start,
+                'end_time': end,
+                'booking': None,
+                'conflicts': intervals.overlapping(start.timestamp(), end.timestamp()),
+            }
+            for start, end in occurrences
+        ]
+
+    @staticmethod
+    def _create(
+        user: User,
+        room: Room,
+        free: List[Dict[str, Any]],
+        participants_count: int,
+        purpose: str
+    ) -> List[Booking]:
+        bookings = Booking.objects.bulk_create([
+            Booking(
+                room=room,
+                user=user,
+                start_time=result['start_time'],
+                end_time=result['end_time'],
+                participants_count=participants_count,
+                purpose=purpose,
+            )
+            for result in free
+        ])
+        if bookings and bookings[0].pk is None:
+            # Backends that do not return primary keys from bulk inserts
+            ids = dict(Booking.objects.filter(
+                room=room,
+                status='CONFIRMED',
+                start_time__in=[booking.start_time for booking in bookings]
+            ).values_list('start_time', 'id'))
+            for booking in bookings:
+                booking.pk = ids[booking.start_time]
+
+        # What Booking.save and the booking_saved signal do per booking
+        RoomUsageBucket.add(Counter(
+            (booking.room_id, RoomUsageBucket.day_of(booking.start_time)) for booking in bookings
+        ))
+        preference_buffer.record_many(
+            (booking.user_id, booking.room_id, booking.created_at) for booking in bookings
+        )
+        rows = [
+            (booking.pk, booking.room_id, booking.start_time, booking.end_time, booking.status)
+            for booking in bookings
+        ]
+        transaction.on_commit(lambda: booking_index.apply_bookings(rows))
+        transaction.on_commit(lambda: recommendation_cache.invalidate_room(room.id))
+        return bookings
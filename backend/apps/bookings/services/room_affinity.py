@@ -0,0 +1,248 @@
+"""
+FEATURE 3: Collaborative-filtering room affinity
+Low-rank room factors learned offline from the user x room matrix of
+UserRoomPreference time-decayed booking counts, stored as float32 .npy
+files and memory-mapped by every worker
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+def _sparse_matmul(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    values: np.ndarray,
+    dense: np.ndarray,
+    n_rows: int
+) -> np.ndarray:
+    """(n_rows x n) COO matrix times a dense (n x l) matrix"""
+    out = np.zeros((n_rows, dense.shape[1]))
+    np.add.at(out, rows, values[:, None] * dense[cols])
+    return out
+
+
+def factorize(
+    user_index: np.ndarray,
+    room_index: np.ndarray,
+    values: np.ndarray,
+    n_users: int,
+    n_rooms: int,
+    rank: int,
+    power_iterations: int = 2,
+    seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Randomized truncated SVD A ~ U S V^T of a sparse user x room matrix
+
+    Returns (V, prior): the (n_rooms x rank) room factors and the mean user
+    projected onto them, used for users without history.
+    """
+    rank = min(rank, n_users, n_rooms)
+    width = min(rank + 8, n_users, n_rooms)
+    rng = np.random.default_rng(seed)
+
+    def times(dense):
+        return _sparse_matmul(user_index, room_index, values, dense, n_users)
+
+    def transposed_times(dense):
+        return _sparse_matmul(room_index, user_index, values, dense, n_rooms)
+
+    basis, _ = np.linalg.qr(times(rng.standard_normal((n_rooms, width))))
+    for _ in range(power_iterations):
+        room_basis, _ = np.linalg.qr(transposed_times(basis))
+        basis, _ = np.linalg.qr(times(room_basis))
+
+    _, _, vt = np.linalg.svd(transposed_times(basis).T, full_matrices=False)
+    room_factors = vt[:rank].T
+
+    mean_user = np.bincount(room_index, weights=values, minlength=n_rooms) / n_users
+    return room_factors, mean_user @ room_factors
+
+
+class AffinityModel(NamedTuple):
+    """One build, swapped in as a whole"""
+    room_factors: np.ndarray
+    room_norms: np.ndarray
+    positions: np.ndarray
+    prior: np.ndarray
+
+
+class RoomAffinity:
+    """
+    Scores rooms by how well they match a user's booking history
+
+    The model is trained on log1p of time-decayed booking counts (what
+    UserRoomPreference.decayed_score() returns at build time), and a
+    history is folded in the same way: the sum of the factors of the rooms
+    booked, weighted by log1p of the decayed counts the recommendation
+    engine loads (in group mode, the attendees' mean). Users who joined
+    after the last build are personalized too; users with no history get
+    the population prior. Per-room lookups index a dense room id -> row
+    array, so no queries are needed at request time.
+    """
+
+    CURRENT_FILE = 'CURRENT'
+    FACTORS_FILE = 'room_factors.npy'
+    POSITIONS_FILE = 'room_positions.npy'
+    PRIOR_FILE = 'prior.npy'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._model: Optional[AffinityModel] = None
+        self._checked_at = float('-inf')
+
+    @staticmethod
+    def directory() -> Path:
+        return Path(getattr(settings, 'ROOM_AFFINITY_DIR', Path(settings.BASE_DIR) / 'var' / 'room_affinity'))
+
+    @staticmethod
+    def refresh_interval() -> float:
+        return getattr(settings, 'ROOM_AFFINITY_REFRESH_SECONDS', 30)
+
+    @classmethod
+    def build(
+        cls,
+        rows: Iterable[Tuple[int, int, float]],
+        rank: int,
+        power_iterations: int = 2,
+        seed: int = 0
+    ) -> Dict[str, int]:
+        """
+        Factorize (user_id, room_id, decayed booking count) rows and publish
+        the result as a new version in directory()
+        """
+        matrix = np.array(list(rows), dtype=np.float64).reshape(-1, 3)
+        matrix = matrix[matrix[:, 2] > 0]
+        if not len(matrix):
+            return {'users': 0, 'rooms': 0, 'rank': 0}
+
+        users, user_index = np.unique(matrix[:, 0].astype(np.int64), return_inverse=True)
+        rooms, room_index = np.unique(matrix[:, 1].astype(np.int64), return_inverse=True)
+        room_factors, prior = factorize(
+            user_index, room_index, np.log1p(matrix[:, 2]), len(users), len(rooms),
+            rank, power_iterations, seed
+        )
+
+        positions = np.full(rooms.max() + 1, -1, dtype=np.int32)
+        positions[rooms] = np.arange(len(rooms), dtype=np.int32)
+
+        directory = cls.directory()
+        version = str(time.time_ns())  # sorts by build time
+        target = directory / version
+        target.mkdir(parents=True)
+        np.save(target / cls.FACTORS_FILE, np.ascontiguousarray(room_factors, dtype=np.float32))
+        np.save(target / cls.POSITIONS_FILE, positions)
+        np.save(target / cls.PRIOR_FILE, prior.astype(np.float32))
+
+        # Switch readers over atomically, then drop all but the previous build
+        pointer = directory / (cls.CURRENT_FILE + '.tmp')
+        pointer.write_text(version)
+        os.replace(pointer, directory / cls.CURRENT_FILE)
+        builds = sorted(path for path in directory.iterdir() if path.is_dir())
+        for old in builds[:-2]:
+            for path in old.iterdir():
+                path.unlink()
+            old.rmdir()
+
+        return {'users': len(users), 'rooms': len(rooms), 'rank': room_factors.shape[1]}
+
+    def model(self) -> Optional[AffinityModel]:
+        """The current build, or None; CURRENT is re-read at most every refresh_interval()"""
+        if time.monotonic() - self._checked_at >= self.refresh_interval():
+            self.refresh()
+        with self._lock:
+            return self._model
+
+    async def amodel(self) -> Optional[AffinityModel]:
+        """model() for async code; a due refresh reads the files in a worker thread"""
+        if time.monotonic() - self._checked_at >= self.refresh_interval():
+            await sync_to_async(self.refresh)()
+        with self._lock:
+            return self._model
+
+    def refresh(self):
+        """Memory-map the current build if it changed"""
+        try:
+            version = (self.directory() / self.CURRENT_FILE).read_text().strip()
+        except FileNotFoundError:
+            version = None
+
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if version == self._version:
+                return
+            if version is None:
+                self._model = None
+            else:
+                path = self.directory() / version
+                room_factors = np.load(path / self.FACTORS_FILE, mmap_mode='r')
+                self._model = AffinityModel(
+                    room_factors=room_factors,
+                    room_norms=np.linalg.norm(room_factors, axis=1),
+                    positions=np.load(path / self.POSITIONS_FILE, mmap_mode='r'),
+                    prior=np.load(path / self.PRIOR_FILE),
+                )
+            self._version = version
+
+    @staticmethod
+    def user_vector(model: AffinityModel, history: Dict[int, float]) -> np.ndarray:
+        """Fold a {room_id: decayed booking count} history into model's factor space"""
+        vector = np.zeros(model.room_factors.shape[1])
+        for room_id, count in history.items():
+            if count > 0 and 0 <= room_id < len(model.positions) and model.positions[room_id] >= 0:
+                vector += np.log1p(count) * model.room_factors[model.positions[room_id]]
+        return vector if vector.any() else np.asarray(model.prior, dtype=np.float64)
+
+    def points(
+        self,
+        history: Dict[int, float],
+        room_ids: List[int],
+        scale: int,
+        model: Optional[AffinityModel] = None
+    ) -> Dict[int, int]:
+        """
+        Cosine similarity between the user and each room, as integer points
+        in 0..scale; rooms unknown to the model are left out. Async callers
+        pass the model from amodel().
+        """
+        if model is None:
+            model = self.model() if room_ids else None
+        if not room_ids or model is None:
+            return {}
+
+        user = self.user_vector(model, history)
+        user_norm = np.linalg.norm(user)
+        if not user_norm:
+            return {}
+
+        candidates = np.asarray(room_ids, dtype=np.int64)
+        positions = np.full(len(candidates), -1, dtype=np.int64)
+        in_range = (candidates >= 0) & (candidates < len(model.positions))
+        positions[in_range] = model.positions[candidates[in_range]]
+        known = positions >= 0
+        positions = positions[known]
+
+        norms = model.room_norms[positions]
+        similarity = np.zeros(len(positions))
+        nonzero = norms > 0
+        similarity[nonzero] = (model.room_factors[positions[nonzero]] @ user) / (norms[nonzero] * user_norm)
+        scores = np.clip(np.rint(similarity * scale), 0, scale).astype(np.int64)
+
+        return {
+            room_id: score
+            for room_id, score in zip(candidates[known].tolist(), scores.tolist())
+            if score
+        }
+
+
+# One memory-mapped model per worker process
+room_affinity = RoomAffinity()
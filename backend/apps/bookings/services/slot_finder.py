@@ -0,0 +1,145 @@
+"""
+FEATURE 3: Earliest available slot search
+Finds the earliest (room, start_time) pairs that fit a meeting across all
+candidate rooms with a sweep over each room's sorted bookings
+"""
+
+import heapq
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, Iterator, List, Tuple
+
+from apps.floors.models import Room
+from .availability_index import load_room_intervals
+from .recommendation_engine import RoomRecommendationEngine
+
+
+def align_up(moment: float, step: float) -> float:
+    """Round a POSIX timestamp up to the next multiple of step seconds"""
+    remainder = moment % step
+    return moment + (step - remainder) if remainder else moment
+
+
+class EarliestSlotFinder:
+    """
+    Sweep-line search for free gaps long enough to hold a meeting
+
+    Times are handled as POSIX timestamps internally; intervals come from
+    the in-memory booking index when it is warm, otherwise from one range
+    query.
+
+    Free slots are usually near the start of the horizon, so the search
+    first loads a day of bookings and only widens the window (FIRST_WINDOW,
+    then WIDEN times as long each round) when it holds fewer than `limit`
+    slots. Cutting the window short never adds a slot, and every slot
+    ending within it is still found, so the earliest `limit` ones are
+    exact.
+    """
+
+    FIRST_WINDOW = timedelta(days=1)
+    WIDEN = 4
+
+    @staticmethod
+    def free_starts(
+        intervals: List[Tuple[float, int, float]],
+        duration: float,
+        horizon_start: float,
+        horizon_end: float,
+        step: float
+    ) -> Iterator[float]:
+        """
+        Earliest aligned start of every gap that fits `duration`, given one
+        room's (start, booking_id, end) bookings sorted by start time
+        """
+        cursor = align_up(horizon_start, step)
+        for start, booking_id, end in intervals:
+            if min(start, horizon_end) - cursor >= duration:
+                yield cursor
+            if end > cursor:
+                cursor = align_up(end, step)
+            if cursor >= horizon_end:
+                return
+        if horizon_end - cursor >= duration:
+            yield cursor
+
+    @classmethod
+    def find(
+        cls,
+        participants_count: int,
+        duration: timedelta,
+        horizon_start: datetime,
+        horizon_end: datetime,
+        required_amenities: List[str] = None,
+        limit: int = 5,
+        step: timedelta = timedelta(minutes=15)
+    ) -> List[Dict[str, Any]]:
+        """
+        Earliest `limit` (room, start_time) pairs, earliest first; ties go
+        to the smallest room that fits
+        """
+        # Only ids and capacities (from the room catalog) here; full rooms
+        # are loaded for the results
+        records = RoomRecommendationEngine._get_candidate_records(
+            participants_count, required_amenities or []
+        )
+        rooms = list(zip(records['id'].tolist(), records['capacity'].tolist()))
+        if not rooms:
+            return []
+
+        window = cls.FIRST_WINDOW
+        while True:
+            window_end = min(horizon_end, horizon_start + duration + window)
+            picks = cls._earliest(rooms, duration, horizon_start, window_end, limit, step)
+            if len(picks) >= limit or window_end >= horizon_end:
+                break
+            window *= cls.WIDEN
+
+        rooms_by_id = Room.objects.select_related('floor_plan').in_bulk({room_id for room_id, _ in picks})
+        results = []
+        for room_id, start in picks:
+            start_time = datetime.fromtimestamp(start, tz=dt_timezone.utc)
+            results.append({
+                'room': rooms_by_id[room_id],
+                'start_time': start_time,
+                'end_time': start_time + duration,
+            })
+
+        return results
+
+    @classmethod
+    def _earliest(
+        cls,
+        rooms: List[Tuple[int, int]],
+        duration: timedelta,
+        horizon_start: datetime,
+        horizon_end: datetime,
+        limit: int,
+        step: timedelta
+    ) -> List[Tuple[int, float]]:
+        """Earliest `limit` (room_id, start) pairs among (room_id, capacity) rooms"""
+        intervals_by_room = load_room_intervals([room_id for room_id, _ in rooms], horizon_start, horizon_end)
+        length, window_start, window_end, granularity = (
+            duration.total_seconds(),
+            horizon_start.timestamp(),
+            horizon_end.timestamp(),
+            step.total_seconds(),
+        )
+
+        # Merge every room's gap starts, earliest first
+        heap = []
+        for room_id, capacity in rooms:
+            starts = cls.free_starts(
+                intervals_by_room.get(room_id, []), length, window_start, window_end, granularity
+            )
+            first = next(starts, None)
+            if first is not None:
+                heap.append((first, capacity, room_id, starts))
+        heapq.heapify(heap)
+
+        picks = []
+        while heap and len(picks) < limit:
+            start, capacity, room_id, starts = heapq.heappop(heap)
+            picks.append((room_id, start))
+            following = next(starts, None)
+            if following is not None:
+                heapq.heappush(heap, (following, capacity, room_id, starts))
+        return picks
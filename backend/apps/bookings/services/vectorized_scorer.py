@@ -0,0 +1,229 @@
+"""
+FEATURE 3: Vectorized room scoring
+Scores every candidate room with NumPy array operations instead of a
+Python loop, using the weights defined on RoomRecommendationEngine
+"""
+
+from types import SimpleNamespace
+from typing import Dict, List, Tuple, Any
+import numpy as np
+
+from apps.floors.models import AMENITY_LABELS_BY_MASK
+
+# Number of amenities for every possible Room.amenity_mask
+AMENITY_COUNT_BY_MASK = np.array([len(labels) for labels in AMENITY_LABELS_BY_MASK], dtype=np.int64)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k best scores, highest first
+
+    Ties keep their original order so the result matches a stable
+    ``sort(reverse=True)`` over the same scores.
+    """
+    n = len(scores)
+    if n == 0 or k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        # Partition to find the k-th best score, then keep everything at
+        # or above it so ties at the boundary are resolved by position
+        kth = np.argpartition(-scores, k - 1)[:k]
+        candidates = np.flatnonzero(scores >= scores[kth].min())
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k]
+
+
+class VectorizedRoomScorer:
+    """
+    Holds candidate room attributes as arrays and scores them in bulk
+    """
+
+    # Compact dtypes for snapshots shipped to other processes
+    SNAPSHOT_DTYPES = {
+        'capacity': np.int32,
+        'amenity_mask': np.uint8,
+        'preference_count': np.float64,
+        'recent_bookings': np.int32,
+        'floor_number': np.int32,
+        'proximity': np.int16,
+        'affinity': np.int16,
+    }
+
+    def __init__(
+        self,
+        weights: Any,
+        capacity: np.ndarray,
+        amenity_mask: np.ndarray,
+        preference_count: np.ndarray,
+        recent_bookings: np.ndarray,
+        floor_number: np.ndarray,
+        proximity: np.ndarray = None,
+        affinity: np.ndarray = None
+    ):
+        """
+        weights: object exposing the WEIGHT_* attributes (the engine class)
+        """
+        self.weights = weights
+        self.capacity = np.asarray(capacity, dtype=np.int64)
+        self.amenity_mask = np.asarray(amenity_mask, dtype=np.int64)
+        self.preference_count = np.asarray(preference_count, dtype=np.float64)
+        self.recent_bookings = np.asarray(recent_bookings, dtype=np.int64)
+        self.floor_number = np.asarray(floor_number, dtype=np.int64)
+        self.proximity = self._optional(proximity)
+        self.affinity = self._optional(affinity)
+
+    def _optional(self, values: np.ndarray) -> np.ndarray:
+        if values is None:
+            return np.zeros(len(self.capacity), dtype=np.int64)
+        return np.asarray(values, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.capacity)
+
+    def snapshot(self, start: int = 0, stop: int = None) -> Dict[str, Any]:
+        """
+        Picklable copy of rooms start..stop in compact dtypes, with the
+        weights as plain values
+        """
+        weights = {name: getattr(self.weights, name) for name in dir(self.weights) if name.isupper()}
+        arrays = {
+            name: getattr(self, name)[start:stop].astype(dtype)
+            for name, dtype in self.SNAPSHOT_DTYPES.items()
+        }
+        return {'weights': weights, **arrays}
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any]) -> 'VectorizedRoomScorer':
+        return cls(
+            SimpleNamespace(**snapshot['weights']),
+            **{name: snapshot[name] for name in cls.SNAPSHOT_DTYPES}
+        )
+
+    def has_amenities(self, required_mask: int) -> np.ndarray:
+        """
+        Boolean array: which rooms have every amenity in required_mask
+        """
+        return (self.amenity_mask & required_mask) == required_mask
+
+    @classmethod
+    def from_rooms(
+        cls,
+        weights: Any,
+        rooms: List[Any],
+        preferences: Dict[int, float],
+        recent_usage: Dict[int, int],
+        proximity: Dict[int, int] = None,
+        affinity: Dict[int, int] = None
+    ) -> 'VectorizedRoomScorer':
+        """
+        Build the arrays from loaded Room instances and bulk-loaded inputs
+        """
+        n = len(rooms)
+        proximity = proximity or {}
+        affinity = affinity or {}
+        return cls(
+            weights,
+            capacity=np.fromiter((room.capacity for room in rooms), np.int64, n),
+            amenity_mask=np.fromiter((room.amenity_mask for room in rooms), np.int64, n),
+            preference_count=np.fromiter((preferences.get(room.id, 0) for room in rooms), np.float64, n),
+            recent_bookings=np.fromiter((recent_usage.get(room.id, 0) for room in rooms), np.int64, n),
+            floor_number=np.fromiter((room.floor_plan.floor_number for room in rooms), np.int64, n),
+            proximity=np.fromiter((proximity.get(room.id, 0) for room in rooms), np.int64, n),
+            affinity=np.fromiter((affinity.get(room.id, 0) for room in rooms), np.int64, n),
+        )
+
+    @classmethod
+    def from_records(
+        cls,
+        weights: Any,
+        records: np.ndarray,
+        preferences: Dict[int, float],
+        recent_usage: Dict[int, int],
+        proximity: Dict[int, int] = None,
+        affinity: Dict[int, int] = None
+    ) -> 'VectorizedRoomScorer':
+        """
+        Build the arrays from room catalog records (see
+        apps.floors.services.room_catalog) and bulk-loaded inputs
+        """
+        room_ids = records['id'].tolist()
+        n = len(room_ids)
+
+        def lookup(values, dtype):
+            values = values or {}
+            return np.fromiter((values.get(room_id, 0) for room_id in room_ids), dtype, n)
+
+        return cls(
+            weights,
+            capacity=records['capacity'],
+            amenity_mask=records['amenity_mask'],
+            preference_count=lookup(preferences, np.float64),
+            recent_bookings=lookup(recent_usage, np.int64),
+            floor_number=records['floor_number'],
+            proximity=lookup(proximity, np.int64),
+            affinity=lookup(affinity, np.int64),
+        )
+
+    def score_components(
+        self,
+        participants_count: int,
+        preferred_floor: int = None,
+        floor_points: Dict[int, int] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Per-room score breakdown, one array per component plus 'total'
+
+        floor_points: {floor_number: points}, used when preferred_floor is
+        not given (group mode)
+        """
+        w = self.weights
+        components = {}
+
+        components['user_preference'] = self.preference_count * w.WEIGHT_USER_PREFERENCE
+
+        capacity_score = np.maximum(0, 10 - np.abs(self.capacity - participants_count))
+        components['capacity_match'] = capacity_score * w.WEIGHT_CAPACITY_MATCH
+
+        components['amenities'] = AMENITY_COUNT_BY_MASK[self.amenity_mask] * w.WEIGHT_AMENITIES
+
+        components['recent_usage_penalty'] = -self.recent_bookings * w.WEIGHT_RECENT_USAGE
+
+        if preferred_floor:
+            components['floor_preference'] = np.where(
+                self.floor_number == preferred_floor, w.FLOOR_PREFERENCE_POINTS, 0
+            )
+        else:
+            components['floor_preference'] = np.zeros(len(self), dtype=np.int64)
+            for floor, points in (floor_points or {}).items():
+                components['floor_preference'][self.floor_number == floor] = points
+
+        components['proximity'] = self.proximity * w.WEIGHT_PROXIMITY
+
+        components['affinity'] = self.affinity * w.WEIGHT_AFFINITY
+
+        components['total'] = sum(components.values())
+
+        return components
+
+    def top_k(
+        self,
+        participants_count: int,
+        preferred_floor: int = None,
+        k: int = 5,
+        floor_points: Dict[int, int] = None
+    ) -> List[Tuple[int, float, Dict[str, float]]]:
+        """
+        Best k rooms as (index, score, score_breakdown), highest score first
+        """
+        components = self.score_components(participants_count, preferred_floor, floor_points)
+        scores = np.maximum(components['total'].astype(np.float64), 0)
+
+        results = []
+        for index in top_k_indices(scores, k):
+            breakdown = {name: values[index].item() for name, values in components.items()}
+            score = scores[index].item() if breakdown['total'] >= 0 else 0
+            results.append((int(index), score, breakdown))
+
+        return results
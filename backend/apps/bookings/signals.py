@@ -0,0 +1,133 @@
+"""
+Signal handlers for bookings app
+Keep in-memory availability structures and cached recommendations in step
+with Booking and Room writes
+"""
+
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.floors.models import Room
+from .models import Booking, BookingSeries, RoomUsageBucket
+from .services.availability_index import booking_index
+from .services.preference_buffer import preference_buffer
+from .services.recommendation_cache import recommendation_cache
+
+
+USAGE_FIELDS = {'room', 'room_id', 'start_time', 'status'}
+
+
+def usage_bucket(room_id, start_time, status):
+    """The (room_id, day) usage bucket a booking counts in, if any"""
+    return (room_id, RoomUsageBucket.day_of(start_time)) if status == 'CONFIRMED' else None
+
+
+@receiver(pre_save, sender=Booking)
+def remember_usage_bucket(sender, instance, update_fields=None, **kwargs):
+    """
+    Note the bucket the stored version of the booking counts in: as loaded
+    or last saved (Booking.from_db), and read back only for bookings built
+    with a pk or loaded without those fields. Like the rest of the row, a
+    copy saved after another copy's change overwrites it as it was loaded;
+    rebuild_room_usage recounts the buckets.
+    """
+    instance._usage_bucket_before = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not USAGE_FIELDS & set(update_fields):
+        instance._usage_bucket_before = usage_bucket(instance.room_id, instance.start_time, instance.status)
+        return
+    stored = getattr(instance, '_stored_usage', None)
+    if stored is None:
+        stored = Booking.objects.filter(pk=instance.pk).values_list(*Booking.USAGE_COLUMNS).first()
+    if stored is not None:
+        instance._usage_bucket_before = usage_bucket(*stored)
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, update_fields=None, **kwargs):
+    """
+    Move the booking between daily usage buckets in the same transaction,
+    and apply it to the interval index once the write commits
+    """
+    before = getattr(instance, '_usage_bucket_before', None)
+    after = usage_bucket(instance.room_id, instance.start_time, instance.status)
+    if before != after:
+        deltas = {}
+        if before is not None:
+            deltas[before] = -1
+        if after is not None:
+            deltas[after] = deltas.get(after, 0) + 1
+        RoomUsageBucket.add(deltas)
+    if update_fields is None:
+        instance._stored_usage = (instance.room_id, instance.start_time, instance.status)
+    elif USAGE_FIELDS & set(update_fields):
+        # Some of them may still differ from the row: read it next time
+        instance._stored_usage = None
+    
+    booking_id, room_id = instance.pk, instance.room_id
+    start_time, end_time, status = instance.start_time, instance.end_time, instance.status
+    transaction.on_commit(
+        lambda: booking_index.apply_booking(booking_id, room_id, start_time, end_time, status)
+    )
+    if instance.series_id is not None:
+        # An override also hides a series occurrence
+        transaction.on_commit(booking_index.invalidate)
+    transaction.on_commit(lambda: recommendation_cache.invalidate_room(room_id))
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    """Drop the booking from its usage bucket and, once the delete commits, the interval index"""
+    bucket = usage_bucket(instance.room_id, instance.start_time, instance.status)
+    if bucket is not None:
+        RoomUsageBucket.add({bucket: -1})
+    
+    booking_id, room_id = instance.pk, instance.room_id
+    transaction.on_commit(lambda: booking_index.remove_booking(booking_id))
+    if instance.series_id is not None:
+        transaction.on_commit(booking_index.invalidate)
+    transaction.on_commit(lambda: recommendation_cache.invalidate_room(room_id))
+
+
+@receiver(post_save, sender=BookingSeries)
+@receiver(post_delete, sender=BookingSeries)
+def booking_series_changed(sender, instance, **kwargs):
+    """
+    A series rule can change availability over its whole span: have every
+    index reload rather than patch it
+    """
+    room_id = instance.room_id
+    transaction.on_commit(booking_index.invalidate)
+    transaction.on_commit(lambda: recommendation_cache.invalidate_room(room_id))
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def room_changed(sender, instance, **kwargs):
+    """Room attributes feed every recommendation: drop all cached results"""
+    transaction.on_commit(recommendation_cache.invalidate_all)
+
+
+@receiver(request_started)
+def sync_booking_index(sender, **kwargs):
+    """Apply the bookings other processes changed since the last request"""
+    booking_index.sync()
+
+
+@receiver(request_finished)
+def reload_booking_index(sender, **kwargs):
+    """
+    Reload hook: (re)build the index after the response has been sent when
+    it is cold or fell too far behind to sync incrementally
+    """
+    if booking_index.needs_reload():
+        booking_index.reload()
+
+
+@receiver(request_finished)
+def flush_preference_buffer(sender, **kwargs):
+    """Write buffered preference increments once they are old enough"""
+    preference_buffer.flush_if_due()
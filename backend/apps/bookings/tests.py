@@ -0,0 +1,1513 @@
+"""
+Tests for bookings app
+"""
+
+import asyncio
+import csv
+import io
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SynchronousOnlyOperation
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, UniqueConstraint
+from django.core.checks import run_checks
+from django.test import AsyncClient, Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.floors.models import AMENITIES, FloorPlan, Room
+from apps.floors.services.room_catalog import room_catalog
+from apps.floors.services.shared_cache import cache_is_shared
+from apps.floors.services.spatial_index import room_locator
+from .views import AMENITIES_ERROR
+from .models import Booking, BookingSeries, RoomUsageBucket, UserRoomPreference, backfill_decayed_weights
+from .services.availability_grid import FULL_DAY, SLOTS_PER_DAY, AvailabilityGrid, slot_range_mask
+from .services.availability_index import BookingIntervalIndex, RoomIntervals, booking_index, load_room_intervals
+from .benchmarks.campus import CampusGenerator
+from .services.booking_export import EXPORT_COLUMNS, BookingExport
+from .services.booking_series import BookingSeriesService
+from .services.recommendation_cache import recommendation_cache
+from .services.parallel_scorer import ParallelRoomScorer
+from .services.room_affinity import RoomAffinity
+from .services.slot_finder import EarliestSlotFinder
+from .services.recommendation_engine import RoomRecommendationEngine
+from .services.vectorized_scorer import VectorizedRoomScorer
+
+
+def create_rooms(floor_plan, count, start=0, **fields):
+    """count rooms on floor_plan in one bulk insert (Room.save and its signals are skipped)"""
+    return Room.objects.bulk_create([
+        Room(
+            floor_plan=floor_plan,
+            name=f'Room {number}',
+            room_number=str(number),
+            capacity=fields.get('capacity', 8),
+            location_x=float(number % 100),
+            location_y=float(number // 100),
+        )
+        for number in range(start, start + count)
+    ])
+
+
+def next_monday_at(hour):
+    today = timezone.localdate()
+    monday = today + timedelta(days=7 - today.weekday())
+    return timezone.make_aware(datetime.combine(monday, datetime.min.time())) + timedelta(hours=hour)
+
+
+# The database path: the in-memory index and result cache would answer
+# without queries
+@override_settings(BOOKING_INTERVAL_INDEX_ENABLED=False, RECOMMENDATION_CACHE_ENABLED=False)
+class AvailabilityQueryCountTests(TestCase):
+    """Availability costs the same number of queries for 10 rooms as for 10,000"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='employee', password='secret')
+        cls.floor_plan = FloorPlan.objects.create(name='Floor 1', floor_number=1)
+        cls.start_time = next_monday_at(10)
+        cls.end_time = cls.start_time + timedelta(hours=1)
+
+    def _queries(self, call):
+        room_catalog.reload()
+        with CaptureQueriesContext(connection) as queries:
+            result = call()
+        return len(queries), result
+
+    def _available_rooms(self):
+        return self._queries(lambda: RoomRecommendationEngine._get_available_rooms(
+            2, self.start_time, self.end_time, []
+        ))
+
+    def _recommendations(self):
+        return self._queries(lambda: RoomRecommendationEngine.recommend_rooms(
+            self.user, 2, self.start_time, self.end_time
+        ))
+
+    def test_query_count_does_not_grow_with_rooms(self):
+        rooms = create_rooms(self.floor_plan, 10)
+        Booking.objects.create(
+            room=rooms[0], user=self.user, start_time=self.start_time, end_time=self.end_time,
+            participants_count=2
+        )
+
+        small_count, available = self._available_rooms()
+        self.assertEqual(len(available), 9)
+        self.assertNotIn(rooms[0].id, {room.id for room in available})
+        small_recommend_count, _ = self._recommendations()
+
+        create_rooms(self.floor_plan, 9_990, start=10)
+
+        large_count, available = self._available_rooms()
+        self.assertEqual(len(available), 9_999)
+        self.assertNotIn(rooms[0].id, {room.id for room in available})
+        large_recommend_count, recommendations = self._recommendations()
+        self.assertNotIn(rooms[0].id, {item['room'].id for item in recommendations})
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(small_recommend_count, large_recommend_count)
+
+
+class RecommendationCacheBackendTests(TestCase):
+    """The result cache only runs where its invalidations reach every worker"""
+
+    SHARED_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp'}}
+
+    @staticmethod
+    def _warnings():
+        return [message.id for message in run_checks() if message.id == 'bookings.W001']
+
+    @override_settings(RECOMMENDATION_CACHE_ENABLED=True)
+    def test_off_with_a_per_process_cache(self):
+        # The test settings use LocMemCache
+        self.assertFalse(cache_is_shared())
+        self.assertFalse(recommendation_cache.enabled())
+        self.assertEqual(self._warnings(), ['bookings.W001'])
+
+    @override_settings(RECOMMENDATION_CACHE_ENABLED=True, SINGLE_PROCESS_DEPLOYMENT=True)
+    def test_on_in_a_declared_single_process_site(self):
+        self.assertTrue(recommendation_cache.enabled())
+        self.assertEqual(self._warnings(), [])
+
+    @override_settings(RECOMMENDATION_CACHE_ENABLED=True, CACHES=SHARED_CACHE)
+    def test_on_with_a_shared_cache(self):
+        self.assertTrue(cache_is_shared())
+        self.assertTrue(recommendation_cache.enabled())
+        self.assertEqual(self._warnings(), [])
+
+    @override_settings(
+        RECOMMENDATION_CACHE_ENABLED=True, SINGLE_PROCESS_DEPLOYMENT=True,
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+    )
+    def test_off_with_the_dummy_cache(self):
+        # It keeps no counters, even in one process
+        self.assertFalse(recommendation_cache.enabled())
+        self.assertEqual(self._warnings(), ['bookings.W001'])
+
+    def test_shipped_settings_do_not_warn(self):
+        self.assertFalse(recommendation_cache.enabled())
+        self.assertEqual(self._warnings(), [])
+
+    @override_settings(
+        RECOMMENDATION_CACHE_ENABLED=True, SINGLE_PROCESS_DEPLOYMENT=True, BOOKING_INTERVAL_INDEX_ENABLED=False
+    )
+    def test_booked_room_is_not_served_from_the_cache(self):
+        user = User.objects.create_user(username='employee', password='secret')
+        create_rooms(FloorPlan.objects.create(name='Floor 1', floor_number=1), 5)
+        room_catalog.reload()
+        recommendation_cache.invalidate_all()
+        start_time = next_monday_at(10)
+        end_time = start_time + timedelta(hours=1)
+        key = recommendation_cache.make_key(user.id, 2, start_time, end_time, [], None)
+
+        def recommend():
+            return recommendation_cache.get_or_compute(
+                key, lambda: RoomRecommendationEngine.recommend_rooms(user, 2, start_time, end_time)
+            )
+
+        first = recommend()
+        hits = recommendation_cache.hits
+        self.assertEqual([item['room'].id for item in recommend()], [item['room'].id for item in first])
+        self.assertEqual(recommendation_cache.hits, hits + 1)
+
+        booked = first[0]['room']
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                room=booked, user=user, start_time=start_time, end_time=end_time, participants_count=2
+            )
+        self.assertNotIn(booked.id, [item['room'].id for item in recommend()])
+
+    @override_settings(RECOMMENDATION_CACHE_ENABLED=True, SINGLE_PROCESS_DEPLOYMENT=True)
+    async def test_async_lookups_are_validated_too(self):
+        computed = []
+
+        async def compute():
+            computed.append(len(computed))
+            return [{'room': SimpleNamespace(id=7)}]
+
+        recommendation_cache.invalidate_all()
+        for _ in range(2):
+            await recommendation_cache.aget_or_compute(('async',), compute)
+        self.assertEqual(computed, [0])
+        recommendation_cache.invalidate_room(7)
+        await recommendation_cache.aget_or_compute(('async',), compute)
+        self.assertEqual(computed, [0, 1])
+
+
+@override_settings(BOOKING_INTERVAL_INDEX_ENABLED=True, SINGLE_PROCESS_DEPLOYMENT=True, RECOMMENDATION_CACHE_ENABLED=False)
+class BookingIntervalIndexTests(TestCase):
+    """Booking writes reach the index of every process through the change log, or it falls back to the database"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='employee')
+        cls.rooms = create_rooms(FloorPlan.objects.create(name='Floor 1', floor_number=1), 3)
+        cls.start_time = next_monday_at(10)
+        cls.end_time = cls.start_time + timedelta(hours=1)
+
+    def setUp(self):
+        cache.clear()
+        booking_index.reload()
+        # Another worker, warmed before any of the writes below
+        self.other = BookingIntervalIndex()
+        self.other.reload()
+
+    def _free(self, index, start_hours=0, end_hours=1):
+        return index.free_room_ids(
+            [room.id for room in self.rooms],
+            self.start_time + timedelta(hours=start_hours),
+            self.start_time + timedelta(hours=end_hours),
+        )
+
+    def _book(self, room, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(
+                room=room, user=self.user, participants_count=2,
+                start_time=fields.pop('start_time', self.start_time), end_time=fields.pop('end_time', self.end_time),
+                **fields,
+            )
+
+    def _save(self, booking):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+
+    def test_add_cancel_and_move_reach_the_other_process(self):
+        all_rooms = {room.id for room in self.rooms}
+        booking = self._book(self.rooms[0])
+        self.assertEqual(self._free(booking_index), all_rooms - {self.rooms[0].id})
+        # Not before its next sync
+        self.assertEqual(self._free(self.other), all_rooms)
+        self.other.sync()
+        self.assertEqual(self._free(self.other), all_rooms - {self.rooms[0].id})
+        # Half-open: the next hour is free
+        self.assertEqual(self._free(self.other, 1, 2), all_rooms)
+
+        booking.room = self.rooms[1]
+        booking.start_time += timedelta(hours=1)
+        booking.end_time += timedelta(hours=1)
+        self._save(booking)
+        self.other.sync()
+        self.assertEqual(self._free(self.other), all_rooms)
+        self.assertEqual(self._free(self.other, 1, 2), all_rooms - {self.rooms[1].id})
+
+        booking.status = 'CANCELLED'
+        self._save(booking)
+        self.other.sync()
+        self.assertEqual(self._free(self.other, 1, 2), all_rooms)
+
+        booking.status = 'CONFIRMED'
+        self._save(booking)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.delete()
+        self.other.sync()
+        self.assertEqual(self._free(self.other, 1, 2), all_rooms)
+        self.assertFalse(self.other.needs_reload())
+
+    def test_changes_are_applied_in_order(self):
+        first = self._book(self.rooms[0])
+        second = self._book(self.rooms[1])
+        first.status = 'CANCELLED'
+        self._save(first)
+        self.other.sync()
+        self.assertEqual(self._free(self.other), {self.rooms[0].id, self.rooms[2].id})
+        self.assertEqual(self._free(self.other), self._free(booking_index))
+        self.assertIsNotNone(second.pk)
+
+    def test_lost_changes_make_the_other_process_reload(self):
+        self._book(self.rooms[0])
+        self._book(self.rooms[1])
+        # Evicted from the shared cache before the other process synced
+        cache.delete(BookingIntervalIndex.CHANGE_CACHE_KEY.format(cache.get(BookingIntervalIndex.GENERATION_CACHE_KEY)))
+
+        with mock.patch.object(BookingIntervalIndex, 'MISSING_CHANGE_GRACE_SECONDS', 0):
+            self.other.sync()
+            # The first change applied; the missing one may still be in flight
+            self.assertFalse(self.other.needs_reload())
+            self.assertEqual(self._free(self.other), {self.rooms[1].id, self.rooms[2].id})
+            time.sleep(0.01)
+            self.other.sync()
+
+        self.assertTrue(self.other.needs_reload())
+        self.assertIsNone(self._free(self.other))
+        self.other.reload()
+        self.assertEqual(self._free(self.other), {self.rooms[2].id})
+
+    def test_cleared_cache_and_series_changes_make_every_process_reload(self):
+        self._book(self.rooms[0])
+        cache.clear()
+        self._book(self.rooms[1])
+        self.other.sync()
+        self.assertTrue(self.other.needs_reload())
+
+        self.other.reload()
+        booking_index.invalidate()
+        self.assertTrue(booking_index.needs_reload())
+        self.other.sync()
+        self.assertTrue(self.other.needs_reload())
+
+    def test_request_hooks_sync_and_reload(self):
+        self.client.force_login(self.user)
+        booking_index.invalidate()
+        self.client.get('/api/bookings/bookings/')
+        # Rebuilt after the response
+        self.assertFalse(booking_index.needs_reload())
+        self.assertEqual(len(self._free(booking_index)), 3)
+
+    @override_settings(SINGLE_PROCESS_DEPLOYMENT=False)
+    def test_database_fallback_without_a_shared_cache(self):
+        # The test settings use LocMemCache, which other processes never see
+        self.assertFalse(booking_index.enabled())
+        self.assertIn('bookings.W002', [message.id for message in run_checks()])
+        self.assertIsNone(self._free(booking_index))
+
+        self._book(self.rooms[0])
+        start, end = self.start_time, self.end_time
+        self.assertEqual(
+            load_room_intervals([room.id for room in self.rooms], start, end),
+            {self.rooms[0].id: [(start.timestamp(), Booking.objects.get().id, end.timestamp())]},
+        )
+        self.client.force_login(self.user)
+        response = self.client.post('/api/bookings/bookings/', {
+            'room': self.rooms[0].id, 'participants_count': 2,
+            'start_time': start.isoformat(), 'end_time': end.isoformat(),
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+
+    @override_settings(BOOKING_INTERVAL_INDEX_ENABLED=False)
+    def test_no_warning_when_turned_off(self):
+        self.assertNotIn('bookings.W002', [message.id for message in run_checks()])
+
+
+class RoomIntervalsTests(SimpleTestCase):
+    """The sorted array answers overlaps like a scan over every entry"""
+
+    def test_against_a_scan(self):
+        generator = random.Random(5)
+        intervals, entries = RoomIntervals(), {}
+        for booking_id in range(1, 400):
+            if entries and generator.random() < 0.3:
+                removed = generator.choice(list(entries))
+                self.assertTrue(intervals.remove(entries.pop(removed)[0], removed))
+                self.assertFalse(intervals.remove(0.0, removed))
+                continue
+            start = generator.randrange(0, 10_000)
+            # Mostly short, a few very long
+            end = start + (generator.randrange(1, 50) if generator.random() < 0.95 else generator.randrange(500, 3000))
+            intervals.add(start, end, booking_id)
+            entries[booking_id] = (start, end)
+
+            query_start = generator.randrange(0, 10_000)
+            query_end = query_start + generator.randrange(1, 100)
+            expected = sorted(
+                (start, key) for key, (start, end) in entries.items() if start < query_end and end > query_start
+            )
+            self.assertEqual(intervals.overlapping(query_start, query_end), [key for _, key in expected])
+            self.assertEqual(intervals.overlaps(query_start, query_end), bool(expected))
+        self.assertEqual(intervals.entries, sorted((start, key, end) for key, (start, end) in entries.items()))
+
+
+# The index reload that follows a cold process's first request is not paging
+@override_settings(BOOKING_INTERVAL_INDEX_ENABLED=False)
+class BookingPaginationTests(TestCase):
+    """Following next from the first page to the last lists every booking once, at a flat query count"""
+
+    PAGE_SIZE = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', is_staff=True)
+        rooms = create_rooms(FloorPlan.objects.create(name='Floor 1', floor_number=1), 6)
+        start_time = next_monday_at(9)
+        # Six bookings share each start time, so pages end inside runs of ties
+        Booking.objects.bulk_create([
+            Booking(
+                room=room, user=cls.user, participants_count=2,
+                start_time=start_time + timedelta(hours=hour),
+                end_time=start_time + timedelta(hours=hour, minutes=30),
+            )
+            for hour in range(5)
+            for room in rooms
+        ])
+        cls.expected = list(Booking.objects.order_by('-start_time', '-id').values_list('id', flat=True))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_next_walks_every_booking_once(self):
+        url = f'/api/bookings/bookings/?page_size={self.PAGE_SIZE}'
+        pages, query_counts = [], []
+        while url:
+            page, query_count = self._get(url)
+            pages.append([booking['id'] for booking in page['results']])
+            query_counts.append(query_count)
+            url = page['next']
+
+        self.assertEqual(len(pages), -(-len(self.expected) // self.PAGE_SIZE))
+        self.assertEqual([booking_id for ids in pages for booking_id in ids], self.expected)
+        self.assertEqual(len(set(query_counts)), 1, query_counts)
+
+        # And previous leads back to the page before
+        page, _ = self._get(page['previous'])
+        self.assertEqual([booking['id'] for booking in page['results']], pages[-2])
+
+
+def create_overlapping_booking(test, room, user, start_time):
+    """Assert the database itself rejects a booking overlapping start_time's hour"""
+    with test.assertRaises(IntegrityError) as raised, transaction.atomic():
+        Booking.objects.create(
+            room=room, user=user, participants_count=2,
+            start_time=start_time + timedelta(minutes=30), end_time=start_time + timedelta(minutes=90),
+        )
+    test.assertTrue(Booking.is_overlap_error(raised.exception))
+
+
+class BookingOverlapTests(TestCase):
+    """The database rejects overlapping CONFIRMED bookings of a room, and the API answers 409"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='employee')
+        cls.room = create_rooms(FloorPlan.objects.create(name='Floor 1', floor_number=1), 1)[0]
+        cls.start_time = next_monday_at(10)
+        Booking.objects.create(
+            room=cls.room, user=cls.user, participants_count=2,
+            start_time=cls.start_time, end_time=cls.start_time + timedelta(hours=1),
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _book(self, start_hours, end_hours, booking_id=None):
+        body = {
+            'room': self.room.id,
+            'participants_count': 2,
+            'start_time': (self.start_time + timedelta(hours=start_hours)).isoformat(),
+            'end_time': (self.start_time + timedelta(hours=end_hours)).isoformat(),
+        }
+        if booking_id is None:
+            return self.client.post('/api/bookings/bookings/', body, content_type='application/json')
+        return self.client.put(f'/api/bookings/bookings/{booking_id}/', body, content_type='application/json')
+
+    def _assert_conflicts_are_409(self):
+        self.assertTrue(Booking.database_prevents_overlap())
+        create_overlapping_booking(self, self.room, self.user, self.start_time)
+
+        self.assertEqual(self._book(0.5, 1.5).status_code, 409)
+        # Half-open ranges: back to back is not an overlap
+        later = self._book(1, 2)
+        self.assertEqual(later.status_code, 201)
+
+        # Moving a booking onto another is rejected by the update path
+        self.assertEqual(self._book(0.5, 1.5, later.json()['id']).status_code, 409)
+
+        # Only CONFIRMED bookings take up the room
+        Booking.objects.filter(start_time=self.start_time).update(status='CANCELLED')
+        self.assertEqual(self._book(0, 1).status_code, 201)
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite fallback')
+    def test_sqlite_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s ORDER BY name",
+                [Booking._meta.db_table],
+            )
+            triggers = [name for name, in cursor.fetchall()]
+        self.assertEqual(triggers, [f'{Booking.OVERLAP_CONSTRAINT}_insert', f'{Booking.OVERLAP_CONSTRAINT}_update'])
+        self._assert_conflicts_are_409()
+
+    @skipUnless(connection.vendor == 'postgresql', 'PostgreSQL exclusion constraint')
+    def test_postgresql_exclusion_constraint(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT contype FROM pg_constraint WHERE conname = %s", [Booking.OVERLAP_CONSTRAINT])
+            self.assertEqual(cursor.fetchall(), [('x',)])
+        self._assert_conflicts_are_409()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite fallback')
+class SQLiteOverlapTriggerRebuildTests(TransactionTestCase):
+    """SQLite makes most schema changes by rebuilding the table; the rebuilt table gets the triggers again"""
+
+    def test_triggers_survive_table_rebuilds(self):
+        user = User.objects.create_user(username='employee')
+        room = create_rooms(FloorPlan.objects.create(name='Floor 1', floor_number=1), 1)[0]
+        start_time = next_monday_at(10)
+        Booking.objects.create(
+            room=room, user=user, participants_count=2,
+            start_time=start_time, end_time=start_time + timedelta(hours=1),
+        )
+
+        unique = next(
+            constraint for constraint in Booking._meta.constraints if isinstance(constraint, UniqueConstraint)
+        )
+        for change in ('remove_constraint', 'add_constraint'):
+            with self.subTest(change=change):
+                with connection.schema_editor() as editor:
+                    getattr(editor, change)(Booking, unique)
+                create_overlapping_booking(self, room, user, start_time)
+
+
+class PreferenceDecayBackfillTests(TestCase):
+    """decayed_weight is recomputed from bookings, pair by pair, by the command and migration 0007"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(username=f'user{number}') for number in range(3)]
+        cls.rooms = create_rooms(FloorPlan.objects.create(name='Floor 1', floor_number=1), 3)
+        start_time = next_monday_at(9)
+        # bulk_create skips Booking.save, as imports and pre-0002 history did
+        booked = [(0, 0, 3), (0, 2, 1), (1, 1, 2), (2, 0, 1), (2, 2, 4)]
+        Booking.objects.bulk_create([
+            Booking(
+                room=cls.rooms[room], user=cls.users[user], participants_count=1,
+                start_time=start_time + timedelta(days=user * 10 + room, hours=hour),
+                end_time=start_time + timedelta(days=user * 10 + room, hours=hour, minutes=30),
+            )
+            for user, room, count in booked
+            for hour in range(count)
+        ])
+        Booking.objects.bulk_create([Booking(
+            room=cls.rooms[1], user=cls.users[1], participants_count=1, status='CANCELLED',
+            start_time=start_time, end_time=start_time + timedelta(hours=1),
+        )])
+        cls.expected = {
+            (cls.users[user].id, cls.rooms[room].id): count * UserRoomPreference.decay_weight(timezone.now())
+            for user, room, count in booked
+        }
+        # Rows as migration 0002 left them, and one for a pair without bookings
+        for user, room in [(0, 0), (1, 1), (2, 2), (0, 1)]:
+            UserRoomPreference.objects.create(user=cls.users[user], room=cls.rooms[room], booking_count=7)
+        UserRoomPreference.objects.filter(user=cls.users[0], room=cls.rooms[1]).update(decayed_weight=5.0)
+
+    def _weights(self):
+        return {
+            (user_id, room_id): weight
+            for user_id, room_id, weight in UserRoomPreference.objects.values_list('user_id', 'room_id', 'decayed_weight')
+        }
+
+    def _assert_backfilled(self):
+        weights = self._weights()
+        for pair, weight in self.expected.items():
+            self.assertAlmostEqual(weights[pair] / weight, 1.0, places=3)
+        # Untouched: no bookings for the pair
+        self.assertEqual(weights[(self.users[0].id, self.rooms[1].id)], 5.0)
+        self.assertEqual(len(weights), 6)
+
+    def test_backfill_across_chunks(self):
+        for chunk_size in (1, 2, 1000):
+            with self.subTest(chunk_size=chunk_size):
+                UserRoomPreference.objects.filter(decayed_weight__lt=5).update(decayed_weight=0.0)
+                updated, created = backfill_decayed_weights(Booking, UserRoomPreference, chunk_size)
+                self._assert_backfilled()
+                self.assertEqual(updated + created, 5)
+
+    def test_missing_rows_get_their_booking_count(self):
+        backfill_decayed_weights(Booking, UserRoomPreference)
+        self.assertEqual(UserRoomPreference.objects.get(user=self.users[0], room=self.rooms[2]).booking_count, 1)
+        self.assertEqual(UserRoomPreference.objects.get(user=self.users[1], room=self.rooms[1]).booking_count, 7)
+
+    def test_migration_backfills(self):
+        migration = import_module('apps.bookings.migrations.0007_backfill_preference_decay')
+        migration.backfill_preference_decay(apps, None)
+        self._assert_backfilled()
+
+    def test_moving_the_epoch_keeps_scores(self):
+        backfill_decayed_weights(Booking, UserRoomPreference)
+        scores = {(row.user_id, row.room_id): row.decayed_score() for row in UserRoomPreference.objects.all()}
+
+        with override_settings(PREFERENCE_DECAY_EPOCH=timezone.now() - timedelta(days=3)):
+            backfill_decayed_weights(Booking, UserRoomPreference)
+            for row in UserRoomPreference.objects.exclude(user=self.users[0], room=self.rooms[1]):
+                self.assertAlmostEqual(row.decayed_score() / scores[(row.user_id, row.room_id)], 1.0, places=6)
+
+
+class PreferenceDecayCheckTests(SimpleTestCase):
+    """Weights that no longer fit a float are reported before bookings start failing"""
+
+    @staticmethod
+    def _messages():
+        return [message.id for message in run_checks() if message.id in ('bookings.E001', 'bookings.E002', 'bookings.W003')]
+
+    def test_default_settings_pass(self):
+        self.assertEqual(self._messages(), [])
+
+    def test_short_half_life_exhausts_the_epoch(self):
+        # 1000 days after 2024-01-01
+        with override_settings(PREFERENCE_HALF_LIFE_DAYS=1):
+            self.assertLess(UserRoomPreference.decay_horizon(), timezone.now())
+            self.assertEqual(self._messages(), ['bookings.E002'])
+
+            epoch = timezone.now()
+            with override_settings(PREFERENCE_DECAY_EPOCH=epoch):
+                self.assertEqual(self._messages(), [])
+                self.assertEqual(UserRoomPreference.decay_weight(epoch + timedelta(days=10)), 2 ** 10)
+            with override_settings(PREFERENCE_DECAY_EPOCH=timezone.now() - timedelta(days=800)):
+                self.assertEqual(self._messages(), ['bookings.W003'])
+
+    @override_settings(PREFERENCE_HALF_LIFE_DAYS=0)
+    def test_half_life_must_be_positive(self):
+        self.assertEqual(self._messages(), ['bookings.E001'])
+
+
+class RoomAffinityTests(SimpleTestCase):
+    """Histories of decayed booking counts are folded like the ones the model was trained on"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(ROOM_AFFINITY_DIR=directory.name, ROOM_AFFINITY_REFRESH_SECONDS=3600)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    @staticmethod
+    def _build(seed=0):
+        # Two groups of users, each booking its own three rooms
+        rows = [
+            (user, room, 1.0 + (user * room) % 3 * 0.7)
+            for user in range(20)
+            for room in ((1, 2, 3) if user < 10 else (4, 5, 6))
+        ]
+        return RoomAffinity.build(rows, rank=2, seed=seed)
+
+    def test_history_points_to_rooms_booked_together(self):
+        self.assertEqual(self._build(), {'users': 20, 'rooms': 6, 'rank': 2})
+        affinity = RoomAffinity()
+
+        points = affinity.points({1: 2.5, 2: 0.4}, [1, 2, 3, 4, 5, 6, 99], 10)
+        self.assertGreaterEqual(min(points.get(room, 0) for room in (1, 2, 3)), 9)
+        self.assertEqual(max(points.get(room, 0) for room in (4, 5, 6)), 0)
+        # Unknown to the model
+        self.assertNotIn(99, points)
+
+        # No usable history: the population prior, which likes every room
+        for history in ({}, {99: 3.0}, {4: 0.0}):
+            self.assertEqual(sorted(affinity.points(history, [1, 2, 3, 4, 5, 6], 10)), [1, 2, 3, 4, 5, 6])
+
+    def test_new_builds_are_picked_up_on_refresh(self):
+        affinity = RoomAffinity()
+        self.assertIsNone(affinity.model())
+        self.assertEqual(affinity.points({1: 1.0}, [1, 2], 10), {})
+
+        self._build()
+        # CURRENT is not read again before the interval has passed
+        self.assertIsNone(affinity.model())
+        affinity.refresh()
+        first = affinity.model()
+        self.assertIsNotNone(first)
+
+        self._build(seed=1)
+        self.assertIs(affinity.model(), first)
+        with override_settings(ROOM_AFFINITY_REFRESH_SECONDS=0):
+            second = asyncio.run(affinity.amodel())
+        self.assertIsNot(second, first)
+        # An old snapshot stays usable while a new one is swapped in
+        self.assertEqual(affinity.points({1: 1.0}, [1, 4], 10, model=first), affinity.points({1: 1.0}, [1, 4], 10, model=second))
+
+
+class BatchRecommendTests(TestCase):
+    """The batch endpoint parses every meeting like the single one and never double-books a room"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='employee')
+        create_rooms(FloorPlan.objects.create(name='Floor 1', floor_number=1), 2, capacity=4)
+        floor_2 = FloorPlan.objects.create(name='Floor 2', floor_number=2)
+        cls.upstairs = create_rooms(floor_2, 1, start=10, capacity=4)[0]
+        # The only room for eight people
+        cls.large = create_rooms(floor_2, 1, start=20, capacity=10)[0]
+        cls.start_time = next_monday_at(10)
+
+    def setUp(self):
+        room_catalog.reload()
+        self.client.force_login(self.user)
+
+    def _meeting(self, start_hours=0, hours=1, **fields):
+        return {
+            'participants_count': 2,
+            'start_time': (self.start_time + timedelta(hours=start_hours)).isoformat(),
+            'end_time': (self.start_time + timedelta(hours=start_hours + hours)).isoformat(),
+            **fields,
+        }
+
+    def _post(self, *meetings):
+        return self.client.post(
+            '/api/bookings/bookings/batch_recommend/', {'meetings': list(meetings)}, content_type='application/json'
+        )
+
+    def _rooms(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [entry['room'] and entry['room']['id'] for entry in response.json()['results']]
+
+    def test_overlapping_meetings_get_different_rooms(self):
+        rooms = self._rooms(self._post(self._meeting(), self._meeting(0.5), self._meeting(0.75, 2)))
+        self.assertEqual(len(set(rooms)), 3)
+        self.assertNotIn(None, rooms)
+
+    def test_two_meetings_competing_for_one_room(self):
+        response = self._post(
+            self._meeting(participants_count=8), self._meeting(0.5, participants_count=8),
+            # Back to back with the first: the room is free again
+            self._meeting(1, participants_count=8),
+        )
+        rooms = self._rooms(response)
+        self.assertCountEqual(rooms, [None, self.large.id, self.large.id])
+        self.assertEqual(rooms[2], self.large.id)
+        self.assertEqual((response.json()['assigned'], response.json()['unassigned']), (2, 1))
+
+    def test_existing_bookings_are_respected(self):
+        Booking.objects.create(
+            room=self.large, user=self.user, participants_count=8,
+            start_time=self.start_time, end_time=self.start_time + timedelta(hours=1),
+        )
+        self.assertEqual(self._rooms(self._post(self._meeting(participants_count=8))), [None])
+
+    def test_preferred_floor_is_parsed_like_the_single_endpoint(self):
+        # A string floor is honoured, not silently ignored
+        for preferred_floor in (2, '2'):
+            with self.subTest(preferred_floor=preferred_floor):
+                response = self._post(self._meeting(preferred_floor=preferred_floor))
+                self.assertEqual(self._rooms(response), [self.upstairs.id])
+                self.assertGreater(response.json()['results'][0]['score_breakdown']['floor_preference'], 0)
+
+    def test_invalid_meetings_are_a_400_naming_the_index(self):
+        cases = [
+            (self._meeting(preferred_floor='second'), 'preferred_floor must be an integer'),
+            (self._meeting(participants_count='many'), 'participants_count must be an integer'),
+            (self._meeting(required_amenities='projector'), AMENITIES_ERROR),
+            ({'participants_count': 2}, 'Invalid datetime format'),
+            (self._meeting(hours=-1), 'must end after it starts'),
+            ('meeting', 'must be an object'),
+        ]
+        for meeting, message in cases:
+            with self.subTest(meeting=meeting):
+                response = self._post(self._meeting(), meeting)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('index 1', response.json()['error'])
+                self.assertIn(message, response.json()['error'])
+
+
+@override_settings(BOOKING_INTERVAL_INDEX_ENABLED=False)
+class BookingSeriesConflictTests(TestCase):
+    """Series are checked against each other over their whole common period, with the room locked"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='employee')
+        cls.room = create_rooms(FloorPlan.objects.create(name='Floor 1', floor_number=1), 1)[0]
+        cls.start_time = next_monday_at(10)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _create(self, weeks_later, interval, **fields):
+        start_time = self.start_time + timedelta(weeks=weeks_later)
+        body = {
+            'room': self.room.id,
+            'start_time': start_time.isoformat(),
+            'end_time': (start_time + timedelta(hours=1)).isoformat(),
+            'frequency': 'WEEKLY',
+            'interval': interval,
+            'participants_count': 2,
+            **fields,
+        }
+        return self.client.post('/api/bookings/series/', body, content_type='application/json')
+
+    def test_open_ended_series_clashing_after_the_horizon(self):
+        # Weeks 0, 52, 104, ... against 2, 53, 104, ...: first clash two years on
+        self.assertEqual(self._create(0, 52).status_code, 201)
+        response = self._create(2, 51)
+        self.assertEqual(response.status_code, 409)
+        self.assertIn((self.start_time + timedelta(weeks=104)).date().isoformat(), response.json()['detail'])
+        # A bounded rule ending before the clash is fine
+        until = (self.start_time + timedelta(weeks=103)).date().isoformat()
+        self.assertEqual(self._create(2, 51, until=until).status_code, 201)
+
+    def test_open_ended_series_that_never_clash(self):
+        # Even weeks against odd ones
+        self.assertEqual(self._create(0, 2).status_code, 201)
+        self.assertEqual(self._create(1, 2).status_code, 201)
+        self.assertEqual(self._create(2, 4).status_code, 409)
+
+    def test_overridden_clashes_move_to_the_next_period(self):
+        first = BookingSeries.objects.get(pk=self._create(0, 52).json()['id'])
+        clash = (self.start_time + timedelta(weeks=104)).date()
+        BookingSeriesService.cancel_occurrence(first, clash)
+        response = self._create(2, 51)
+        self.assertEqual(response.status_code, 409)
+        # lcm of 52 and 51 weeks later
+        self.assertIn((clash + timedelta(weeks=52 * 51)).isoformat(), response.json()['detail'])
+
+    def test_room_is_locked_before_the_check(self):
+        calls = []
+        lock_room = BookingSeriesService.lock_room
+        conflicts = BookingSeriesService.conflicts
+        with mock.patch.object(
+            BookingSeriesService, 'lock_room', side_effect=lambda room_id: calls.append('lock') or lock_room(room_id)
+        ), mock.patch.object(
+            BookingSeriesService, 'conflicts', side_effect=lambda *args: calls.append('check') or conflicts(*args)
+        ):
+            self.assertEqual(self._create(0, 1).status_code, 201)
+        self.assertEqual(calls, ['lock', 'check'])
+
+        # Single bookings are checked against series under the lock too
+        calls.clear()
+        with mock.patch.object(
+            BookingSeriesService, 'lock_room', side_effect=lambda room_id: calls.append(room_id) or lock_room(room_id)
+        ):
+            response = self.client.post('/api/bookings/bookings/', {
+                'room': self.room.id,
+                'participants_count': 2,
+                'start_time': (self.start_time + timedelta(minutes=30)).isoformat(),
+                'end_time': (self.start_time + timedelta(minutes=90)).isoformat(),
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(calls, [self.room.id])
+
+
+@override_settings(BOOKING_INTERVAL_INDEX_ENABLED=False)
+class RecurringBookingTests(TestCase):
+    """The recurring endpoint bounds its rule, reports conflicts per occurrence and can skip them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='employee')
+        cls.room = create_rooms(FloorPlan.objects.create(name='Floor 1', floor_number=1), 1)[0]
+        cls.start_time = next_monday_at(10)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _post(self, skip_conflicts=False, **recurrence):
+        body = {
+            'room': self.room.id,
+            'participants_count': 2,
+            'start_time': self.start_time.isoformat(),
+            'end_time': (self.start_time + timedelta(hours=1)).isoformat(),
+            'recurrence': {'frequency': 'WEEKLY', 'count': 4, **recurrence},
+            'skip_conflicts': skip_conflicts,
+        }
+        return self.client.post('/api/bookings/bookings/recurring/', body, content_type='application/json')
+
+    def _book_week(self, weeks):
+        start_time = self.start_time + timedelta(weeks=weeks)
+        return Booking.objects.create(
+            room=self.room, user=self.user, participants_count=2,
+            start_time=start_time, end_time=start_time + timedelta(hours=1),
+        )
+
+    def test_rule_bounds(self):
+        last_day = self.start_time.date() + timedelta(days=366)
+        cases = [
+            ({'interval': 0}, 'interval must be between 1 and 52'),
+            ({'interval': 53}, 'interval must be between 1 and 52'),
+            ({'count': None, 'until': (last_day + timedelta(days=1)).isoformat()}, 'until must be at most 366 days'),
+        ]
+        for recurrence, message in cases:
+            with self.subTest(recurrence=recurrence):
+                response = self._post(**recurrence)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(message, response.json()['error'])
+        response = self._post(count=None, interval=52, until=last_day.isoformat())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 2)
+
+    def test_conflicts_are_reported_and_nothing_is_booked(self):
+        booking = self._book_week(2)
+        series = BookingSeries.objects.create(
+            room=self.room, user=self.user, participants_count=2, frequency='WEEKLY',
+            start_time=self.start_time + timedelta(weeks=3, minutes=30),
+            end_time=self.start_time + timedelta(weeks=3, minutes=90),
+        )
+        response = self._post()
+        self.assertEqual(response.status_code, 409)
+        data = response.json()
+        self.assertEqual((data['created'], data['conflicts']), (0, 2))
+        self.assertEqual(
+            [(entry['conflicts_with'], entry['conflicts_with_series']) for entry in data['occurrences']],
+            [([], []), ([], []), ([booking.id], []), ([], [series.id])],
+        )
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_skip_conflicts_books_the_free_occurrences(self):
+        self._book_week(1)
+        response = self._post(skip_conflicts=True)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual((data['created'], data['conflicts']), (3, 1))
+        self.assertIsNone(data['occurrences'][1]['booking_id'])
+        self.assertEqual(Booking.objects.filter(user=self.user).count(), 4)
+
+        # Nothing left to book is a 409
+        response = self._post(skip_conflicts=True)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['created'], 0)
+
+
+class EarliestSlotTests(TestCase):
+    """Gaps are found back to back with bookings, within the horizon, across midnight and in bookable rooms only"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='employee')
+        floor_plan = FloorPlan.objects.create(name='Floor 1', floor_number=1)
+        cls.room, cls.closed = create_rooms(floor_plan, 2, capacity=4)
+        Room.objects.filter(pk=cls.closed.pk).update(is_under_maintenance=True)
+        cls.start_time = next_monday_at(9)
+
+    def setUp(self):
+        room_catalog.reload()
+
+    def _book(self, start_hours, end_hours):
+        Booking.objects.create(
+            room=self.room, user=self.user, participants_count=2,
+            start_time=self.start_time + timedelta(hours=start_hours),
+            end_time=self.start_time + timedelta(hours=end_hours),
+        )
+
+    def _slots(self, duration_minutes=60, horizon_start=None, horizon_days=1, limit=3):
+        response = self.client.post('/api/bookings/bookings/earliest_slots/', {
+            'participants_count': 2,
+            'duration_minutes': duration_minutes,
+            'horizon_start': (horizon_start or self.start_time).isoformat(),
+            'horizon_days': horizon_days,
+            'limit': limit,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return [
+            (slot['id'], datetime.fromisoformat(slot['start_time'].replace('Z', '+00:00')) - self.start_time)
+            for slot in response.json()
+        ]
+
+    def test_gaps_exactly_as_long_as_the_meeting_fit(self):
+        # Free 09:00-10:00 and 11:00-12:00, then busy until the next day
+        self._book(1, 2)
+        self._book(3, 24)
+        hour = timedelta(hours=1)
+        self.assertEqual(self._slots(), [(self.room.id, 0 * hour), (self.room.id, 2 * hour)])
+        # Too short for 61 minutes; the room under maintenance is never offered
+        self.assertEqual(self._slots(duration_minutes=61), [])
+
+    def test_slot_must_end_within_the_horizon(self):
+        self._book(0, 23)
+        # One free hour left before the horizon ends
+        self.assertEqual(self._slots(), [(self.room.id, timedelta(hours=23))])
+        self.assertEqual(self._slots(duration_minutes=75), [])
+
+    def test_starts_are_aligned_after_a_booking(self):
+        # Free from 09:48, so from 10:00 on the quarter hours
+        self._book(0, 0.8)
+        self._book(2, 24)
+        self.assertEqual(self._slots(), [(self.room.id, timedelta(hours=1))])
+        self.assertEqual(
+            list(EarliestSlotFinder.free_starts([(10.0, 1, 50.0)], 20.0, 0.0, 100.0, 15.0)),
+            [60.0],
+        )
+
+    def test_windows_crossing_midnight(self):
+        # 23:00-23:30 taken: a 90 minute meeting runs 23:30-01:00
+        self._book(14, 14.5)
+        late = self.start_time + timedelta(hours=14)
+        slots = self._slots(duration_minutes=90, horizon_start=late, limit=1)
+        self.assertEqual(slots, [(self.room.id, timedelta(hours=14.5))])
+        self.assertNotEqual(
+            timezone.localtime(self.start_time + slots[0][1]).date(),
+            timezone.localtime(self.start_time + slots[0][1] + timedelta(minutes=90)).date(),
+        )
+
+
+@override_settings(SINGLE_PROCESS_DEPLOYMENT=True)
+class EarliestSlotLatencyTests(TestCase):
+    """The earliest-slot search stays within its 100 ms budget on a busy campus"""
+
+    BUDGET_MS = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        CampusGenerator(floors=5, rooms=1000, users=200, months=1, seed=7).generate()
+
+    def setUp(self):
+        room_catalog.reload()
+
+    def _p95_ms(self):
+        """p95 over a mix of requests, each timed as the best of three runs to keep out machine noise"""
+        now = timezone.now()
+        samples = []
+        for participants_count in (1, 2, 4, 8, 12, 20, 30):
+            for minutes in (30, 60, 120):
+                runs = []
+                for _ in range(3):
+                    started = time.perf_counter()
+                    EarliestSlotFinder.find(
+                        participants_count, timedelta(minutes=minutes), now, now + timedelta(days=14), limit=5
+                    )
+                    runs.append((time.perf_counter() - started) * 1000)
+                samples.append(min(runs))
+        return sorted(samples)[round(0.95 * (len(samples) - 1))]
+
+    def test_database_path(self):
+        with override_settings(BOOKING_INTERVAL_INDEX_ENABLED=False):
+            self.assertLess(self._p95_ms(), self.BUDGET_MS)
+
+    def test_index_path(self):
+        with override_settings(BOOKING_INTERVAL_INDEX_ENABLED=True):
+            booking_index.reload()
+            try:
+                self.assertLess(self._p95_ms(), self.BUDGET_MS)
+            finally:
+                booking_index.invalidate()
+
+    @override_settings(BOOKING_INTERVAL_INDEX_ENABLED=False)
+    def test_widening_windows_find_the_same_slots(self):
+        now = timezone.now()
+        for participants_count, minutes, limit in ((1, 30, 5), (12, 120, 20), (30, 480, 50)):
+            arguments = (participants_count, timedelta(minutes=minutes), now, now + timedelta(days=14))
+            with self.subTest(participants_count=participants_count, minutes=minutes):
+                with mock.patch.object(EarliestSlotFinder, 'FIRST_WINDOW', timedelta(days=14)):
+                    expected = EarliestSlotFinder.find(*arguments, limit=limit)
+                slots = EarliestSlotFinder.find(*arguments, limit=limit)
+                self.assertEqual(
+                    [(slot['room'].id, slot['start_time']) for slot in slots],
+                    [(slot['room'].id, slot['start_time']) for slot in expected],
+                )
+
+
+class RoomUsageBucketTests(TestCase):
+    """Booking signals keep the daily usage buckets equal to a recount, without reading bookings back"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='employee')
+        cls.room, cls.other_room = create_rooms(FloorPlan.objects.create(name='Floor 1', floor_number=1), 2)
+        cls.start_time = next_monday_at(10)
+
+    def _buckets(self):
+        return {
+            (room_id, day): bookings
+            for room_id, day, bookings in RoomUsageBucket.objects.values_list('room_id', 'day', 'bookings')
+            if bookings
+        }
+
+    def _assert_buckets(self, expected):
+        self.assertEqual(self._buckets(), expected)
+        RoomUsageBucket.rebuild()
+        self.assertEqual(self._buckets(), expected)
+
+    def test_create_cancel_move_and_delete(self):
+        monday, tuesday = self.start_time.date(), self.start_time.date() + timedelta(days=1)
+        booking = Booking.objects.create(
+            room=self.room, user=self.user, participants_count=2,
+            start_time=self.start_time, end_time=self.start_time + timedelta(hours=1),
+        )
+        self._assert_buckets({(self.room.id, monday): 1})
+
+        booking.status = 'CANCELLED'
+        booking.save()
+        self._assert_buckets({})
+
+        booking = Booking.objects.get(pk=booking.pk)
+        booking.status = 'CONFIRMED'
+        booking.room = self.other_room
+        booking.start_time += timedelta(days=1)
+        booking.end_time += timedelta(days=1)
+        booking.save()
+        self._assert_buckets({(self.other_room.id, tuesday): 1})
+
+        booking.delete()
+        self._assert_buckets({})
+
+    def test_saving_a_loaded_booking_does_not_read_it_back(self):
+        booking = Booking.objects.create(
+            room=self.room, user=self.user, participants_count=2,
+            start_time=self.start_time, end_time=self.start_time + timedelta(hours=1),
+        )
+        for loaded in (booking, None):
+            loaded = loaded or Booking.objects.get(pk=booking.pk)
+            loaded.start_time += timedelta(days=1)
+            loaded.end_time += timedelta(days=1)
+            with CaptureQueriesContext(connection) as queries:
+                loaded.save()
+            self.assertFalse([
+                query['sql'] for query in queries
+                if query['sql'].startswith('SELECT') and 'bookings_booking' in query['sql']
+            ])
+        self._assert_buckets({(self.room.id, self.start_time.date() + timedelta(days=2)): 1})
+
+    def test_bookings_without_stored_values_are_read_back(self):
+        booking = Booking.objects.create(
+            room=self.room, user=self.user, participants_count=2,
+            start_time=self.start_time, end_time=self.start_time + timedelta(hours=1),
+        )
+        # Built by hand, and loaded without the start time
+        copy = Booking(
+            pk=booking.pk, room=self.other_room, user=self.user, participants_count=2, status='CONFIRMED',
+            start_time=booking.start_time, end_time=booking.end_time, created_at=booking.created_at,
+        )
+        copy.save()
+        self._assert_buckets({(self.other_room.id, self.start_time.date()): 1})
+
+        partial = Booking.objects.only('id', 'room', 'status').get(pk=booking.pk)
+        partial.status = 'CANCELLED'
+        partial.save()
+        self._assert_buckets({})
+
+
+class AvailabilityGridTests(SimpleTestCase):
+    """Bookings set the bits of every 15-minute slot they touch, on every day they span"""
+
+    def setUp(self):
+        self.monday = datetime(2024, 3, 4).date()
+        self.rooms = [SimpleNamespace(id=room_id, is_under_maintenance=False) for room_id in (1, 2, 3)]
+        self.grid = AvailabilityGrid(self.rooms, self.monday, 3)
+
+    def _at(self, day_index, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.monday + timedelta(days=day_index), datetime.min.time())) + \
+            timedelta(hours=hour, minutes=minute)
+
+    def test_partial_slots_round_outwards(self):
+        cases = [
+            ((10, 0), (10, 15), slot_range_mask(40, 41)),
+            ((10, 5), (10, 20), slot_range_mask(40, 42)),
+            ((10, 14), (10, 16), slot_range_mask(40, 42)),
+            ((23, 50), (24, 0), slot_range_mask(95, 96)),
+        ]
+        for (start_hour, start_minute), (end_hour, end_minute), expected in cases:
+            with self.subTest(start=(start_hour, start_minute), end=(end_hour, end_minute)):
+                grid = AvailabilityGrid(self.rooms, self.monday, 3)
+                grid.mark_busy(1, self._at(0, start_hour, start_minute), self._at(0, end_hour, end_minute))
+                self.assertEqual(grid.busy[1], [expected, 0, 0])
+
+    def test_multi_day_bookings(self):
+        # Monday 22:00 to Wednesday 02:00
+        self.grid.mark_busy(1, self._at(0, 22), self._at(2, 2))
+        self.assertEqual(self.grid.busy[1], [slot_range_mask(88, 96), FULL_DAY, slot_range_mask(0, 8)])
+        # Starting before and ending after the grid: clipped to its days
+        self.grid.mark_busy(2, self._at(-2, 12), self._at(5, 12))
+        self.assertEqual(self.grid.busy[2], [FULL_DAY] * 3)
+        self.assertEqual(AvailabilityGrid.to_slot_string(self.grid.free_mask(1, 2), 6, 10), '0011')
+
+    def test_common_free_mask(self):
+        self.grid.mark_busy(1, self._at(1, 9), self._at(1, 10))
+        self.grid.mark_busy(2, self._at(1, 9, 30), self._at(1, 11))
+        common = self.grid.common_free_mask([1, 2], 1)
+        self.assertEqual(common, FULL_DAY & ~slot_range_mask(36, 44))
+        self.assertEqual(self.grid.common_free_mask([1, 2, 3], 0), FULL_DAY)
+        self.assertEqual(self.grid.common_free_mask([], 1), FULL_DAY)
+        self.assertEqual(self.grid.free_room_ids(1, 40, 44), [1, 3])
+        self.assertEqual(self.grid.free_room_ids(1, 38, 39), [3])
+
+        closed = SimpleNamespace(id=4, is_under_maintenance=True)
+        grid = AvailabilityGrid(self.rooms + [closed], self.monday, 1)
+        self.assertEqual(grid.common_free_mask([1, 4], 0), 0)
+        self.assertEqual(len(AvailabilityGrid.to_slot_string(grid.free_mask(1, 0))), SLOTS_PER_DAY)
+
+
+class BookingExportTests(TestCase):
+    """Exports stream every visible booking, oldest first, the same under WSGI and ASGI"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', is_staff=True)
+        cls.user = User.objects.create_user(username='employee', email='employee@example.com')
+        cls.room = create_rooms(FloorPlan.objects.create(name='Floor 1', floor_number=1), 1)[0]
+        start_time = next_monday_at(9)
+        # Created out of order; the employee owns every other one
+        for hours in (4, 0, 3, 1, 2):
+            Booking.objects.create(
+                room=cls.room, user=cls.user if hours % 2 == 0 else cls.admin, participants_count=2,
+                purpose='Stand-up, daily' if hours == 0 else '',
+                start_time=start_time + timedelta(hours=hours),
+                end_time=start_time + timedelta(hours=hours, minutes=30),
+            )
+
+    def _get(self, user, export_type):
+        self.client.force_login(user)
+        response = self.client.get('/api/bookings/bookings/export/', {'type': export_type})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_for_staff_has_every_booking(self):
+        rows = list(csv.reader(io.StringIO(self._get(self.admin, 'csv'))))
+        self.assertEqual(rows[0], [column for column, _ in EXPORT_COLUMNS])
+        records = [dict(zip(rows[0], row)) for row in rows[1:]]
+        expected = Booking.objects.order_by('start_time', 'id')
+        self.assertEqual([int(record['id']) for record in records], [booking.id for booking in expected])
+        self.assertEqual(records[0]['purpose'], 'Stand-up, daily')
+        self.assertEqual(records[0]['floor_name'], 'Floor 1')
+        self.assertEqual(records[0]['start_time'], timezone.localtime(expected[0].start_time).isoformat())
+
+    def test_ndjson_for_employees_has_their_own_bookings(self):
+        records = [json.loads(line) for line in self._get(self.user, 'ndjson').splitlines()]
+        self.assertEqual(
+            [record['id'] for record in records],
+            list(Booking.objects.filter(user=self.user).order_by('start_time').values_list('id', flat=True)),
+        )
+        self.assertEqual({record['username'] for record in records}, {'employee'})
+        self.assertEqual(records[0]['email'], 'employee@example.com')
+        self.assertIsNone(records[0]['series_id'])
+
+    def test_unknown_type_is_a_400(self):
+        self.client.force_login(self.admin)
+        response = self.client.get('/api/bookings/bookings/export/', {'type': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_asgi_streams_through_astream(self):
+        expected = await sync_to_async(
+            lambda: ''.join(BookingExport(Booking.objects.all(), 'csv', chunk_size=2).stream())
+        )()
+        chunks = [chunk async for chunk in BookingExport(Booking.objects.all(), 'csv', chunk_size=2).astream()]
+        # The header, then chunks of two rows
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(''.join(chunks), expected)
+
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(self.admin)
+        response = await client.get('/api/bookings/bookings/export/', {'type': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(body, expected)
+
+    async def test_aiterator_cannot_read_values_list_rows(self):
+        # Why astream() reads the cursor itself; once Django stops raising here, it can use aiterator()
+        with self.assertRaises(SynchronousOnlyOperation):
+            [row async for row in Booking.objects.values_list('id').aiterator()]
+
+
+class RoomCatalogSyncTests(TestCase):
+    """Without a cache shared by every worker, the catalog and the locator do not trust cached room data"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.floor_plan = FloorPlan.objects.create(name='Floor 1', floor_number=1)
+        cls.rooms = create_rooms(cls.floor_plan, 3)
+        for number, room in enumerate(cls.rooms):
+            room.location_x, room.location_y = number * 10, 0
+            room.save()
+
+    def _catalog_ids(self):
+        room_catalog.refresh()
+        return room_catalog.records()['id'].tolist()
+
+    def _nearest(self):
+        return [room_id for _, room_id in room_locator.nearest(self.floor_plan.id, -6, 0, 1)]
+
+    def _change_elsewhere(self):
+        # Like writes made by another worker: the on-commit notices of the
+        # delete never run in a TestCase, and queryset updates send none
+        Room.objects.filter(pk=self.rooms[1].pk).delete()
+        Room.objects.filter(pk=self.rooms[2].pk).update(location_x=-5)
+
+    def test_reloads_without_a_shared_cache(self):
+        room_catalog.reload()
+        self.assertEqual(self._nearest(), [self.rooms[0].id])
+
+        self._change_elsewhere()
+        self.assertEqual(self._catalog_ids(), [self.rooms[0].id, self.rooms[2].id])
+        self.assertEqual(self._nearest(), [self.rooms[2].id])
+
+    @override_settings(SINGLE_PROCESS_DEPLOYMENT=True)
+    def test_kept_between_notices_with_a_shared_cache(self):
+        room_catalog.reload()
+        room_locator.remove_room(0)  # starts from a fresh generation
+        self.assertEqual(self._nearest(), [self.rooms[0].id])
+
+        self._change_elsewhere()
+        self.assertEqual(self._catalog_ids(), [room.id for room in self.rooms])
+        with self.assertNumQueries(0):
+            self.assertEqual(self._nearest(), [self.rooms[0].id])
+
+        # The notices the other worker publishes through the cache
+        room_catalog.mark_changed()
+        cache.incr(room_locator.GENERATION_CACHE_KEY)
+        self.assertEqual(self._catalog_ids(), [self.rooms[0].id, self.rooms[2].id])
+        self.assertEqual(self._nearest(), [self.rooms[2].id])
+
+
+class RoomAmenityMaskTests(TestCase):
+    """amenity_mask follows the has_* flags through save and queryset updates"""
+
+    def test_queryset_updates_recompute_the_mask(self):
+        floor_plan = FloorPlan.objects.create(name='Floor 1', floor_number=1)
+        rooms = [
+            Room.objects.create(floor_plan=floor_plan, name=f'Room {number}', room_number=str(number), capacity=4)
+            for number in range(3)
+        ]
+        self.assertEqual(Room.objects.get(pk=rooms[0].pk).amenities_list, ())
+
+        before = Room.objects.get(pk=rooms[0].pk).updated_at
+        Room.objects.filter(pk__in=[rooms[0].pk, rooms[1].pk], has_projector=False).update(
+            has_projector=True, has_whiteboard=True
+        )
+        Room.objects.filter(pk=rooms[1].pk).update(has_whiteboard=F('has_natural_light'))
+        Room.objects.filter(pk=rooms[2].pk).update(capacity=6)
+
+        stored = Room.objects.in_bulk([room.pk for room in rooms])
+        self.assertEqual(stored[rooms[0].pk].amenities_list, ('Projector', 'Whiteboard'))
+        self.assertEqual(stored[rooms[1].pk].amenities_list, ('Projector',))
+        self.assertEqual(stored[rooms[2].pk].amenity_mask, 0)
+        self.assertGreater(stored[rooms[0].pk].updated_at, before)
+        for room in stored.values():
+            self.assertEqual(room.amenity_mask, room.compute_amenity_mask())
+
+
+class RecommendRequestValidationTests(TestCase):
+    """Malformed recommend bodies are a 400 on the sync and the async endpoint, never a 500"""
+
+    ENDPOINTS = ('/api/bookings/bookings/recommend/', '/api/bookings/async/recommend/')
+
+    @classmethod
+    def setUpTestData(cls):
+        floor_plan = FloorPlan.objects.create(name='Floor 1', floor_number=1)
+        create_rooms(floor_plan, 3)
+        cls.start_time = next_monday_at(10)
+
+    def setUp(self):
+        room_catalog.reload()
+
+    def _post(self, endpoint, **fields):
+        body = {
+            'participants_count': 2,
+            'start_time': self.start_time.isoformat(),
+            'end_time': (self.start_time + timedelta(hours=1)).isoformat(),
+            **fields,
+        }
+        return self.client.post(endpoint, body, content_type='application/json')
+
+    def test_required_amenities_must_be_a_list_of_names(self):
+        for endpoint in self.ENDPOINTS:
+            for amenities in ('projector', [{'name': 'projector'}], [1, 2], {'projector': True}):
+                with self.subTest(endpoint=endpoint, required_amenities=amenities):
+                    response = self._post(endpoint, required_amenities=amenities)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('required_amenities', response.json()['error'])
+
+    def test_unknown_amenities_are_a_400_everywhere(self):
+        with self.assertRaisesMessage(ValueError, 'Unknown amenities: jacuzzi'):
+            Room.amenity_mask_for(['projector', 'jacuzzi'])
+
+        bodies = {
+            endpoint: {} for endpoint in self.ENDPOINTS + ('/api/bookings/bookings/earliest_slots/',)
+        }
+        # Batch planning is for signed-in users
+        self.client.force_login(User.objects.create_user(username='employee'))
+        bodies['/api/bookings/bookings/batch_recommend/'] = {'meetings': [{
+            'participants_count': 2,
+            'start_time': self.start_time.isoformat(),
+            'end_time': (self.start_time + timedelta(hours=1)).isoformat(),
+            'required_amenities': ['projector', 'jacuzzi'],
+        }]}
+        for endpoint, body in bodies.items():
+            with self.subTest(endpoint=endpoint):
+                response = self._post(endpoint, required_amenities=['projector', 'jacuzzi'], **body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Unknown amenities: jacuzzi', response.json()['error'])
+
+    def test_missing_or_null_amenities_mean_none(self):
+        for endpoint in self.ENDPOINTS:
+            for fields in ({}, {'required_amenities': None}, {'required_amenities': ['projector']}):
+                with self.subTest(endpoint=endpoint, **fields):
+                    self.assertEqual(self._post(endpoint, **fields).status_code, 200)
+
+    def test_both_endpoints_check_csrf_for_sessions_only(self):
+        # DRF's SessionAuthentication rule, on the sync and the async twin
+        self.client = Client(enforce_csrf_checks=True)
+        for endpoint in self.ENDPOINTS:
+            with self.subTest(endpoint=endpoint, caller='anonymous'):
+                self.assertEqual(self._post(endpoint).status_code, 200)
+
+        self.client.force_login(User.objects.create_user(username='employee'))
+        for endpoint in self.ENDPOINTS:
+            with self.subTest(endpoint=endpoint, caller='session without token'):
+                response = self._post(endpoint)
+                self.assertEqual(response.status_code, 403)
+                self.assertIn('CSRF', response.json()['detail'])
+
+        token = 'a' * 32
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = token
+        self.client.defaults['HTTP_X_CSRFTOKEN'] = token
+        for endpoint in self.ENDPOINTS:
+            with self.subTest(endpoint=endpoint, caller='session with token'):
+                self.assertEqual(self._post(endpoint).status_code, 200)
+
+    def test_preferred_floor_must_be_an_integer(self):
+        for endpoint in self.ENDPOINTS:
+            with self.subTest(endpoint=endpoint):
+                self.assertEqual(self._post(endpoint, preferred_floor={'floor': 1}).status_code, 400)
+                self.assertEqual(self._post(endpoint, preferred_floor='1').status_code, 200)
+
+
+class ScorerEquivalenceTests(SimpleTestCase):
+    """
+    The vectorized and process-pool scorers rank exactly as the scalar
+    reference scorer, ties and amenity filters included
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(7)
+        floors = [FloorPlan(id=number, name=f'Floor {number}', floor_number=number) for number in range(1, 4)]
+        # Few distinct attribute values, so most scores are shared by many rooms
+        cls.rooms = []
+        for pk in range(1, 601):
+            room = Room(id=pk, name=f'Room {pk}', capacity=rng.choice([4, 8, 12]))
+            for _, field, _ in AMENITIES[:3]:
+                setattr(room, field, rng.random() < 0.5)
+            room.amenity_mask = room.compute_amenity_mask()
+            room.floor_plan = rng.choice(floors)
+            cls.rooms.append(room)
+        cls.preferences = {room.id: rng.choice([1, 2]) for room in rng.sample(cls.rooms, 60)}
+        cls.recent_usage = {room.id: rng.choice([1, 3]) for room in rng.sample(cls.rooms, 120)}
+
+    @classmethod
+    def tearDownClass(cls):
+        ParallelRoomScorer.shutdown()
+        super().tearDownClass()
+
+    def _expected(self, rooms, participants_count, preferred_floor, floor_points=None):
+        scored = RoomRecommendationEngine._score_rooms(
+            rooms, participants_count, preferred_floor, self.preferences, self.recent_usage,
+            floor_points=floor_points
+        )
+        return [(item['room'].id, item['score'], item['score_breakdown']) for item in scored]
+
+    def _scorer(self, rooms):
+        return VectorizedRoomScorer.from_rooms(RoomRecommendationEngine, rooms, self.preferences, self.recent_usage)
+
+    @staticmethod
+    def _actual(rooms, top):
+        return [(rooms[index].id, score, breakdown) for index, score, breakdown in top]
+
+    def test_ties_rank_as_the_reference_scorer(self):
+        scorer = self._scorer(self.rooms)
+        for participants_count, preferred_floor in ((8, 2), (4, None), (12, 1)):
+            with self.subTest(participants_count=participants_count, preferred_floor=preferred_floor):
+                expected = self._expected(self.rooms, participants_count, preferred_floor)
+                top = scorer.top_k(participants_count, preferred_floor, k=5)
+                self.assertEqual(self._actual(self.rooms, top), expected)
+                # The case under test: the top 5 is cut inside a run of equal scores
+                scores = scorer.score_components(participants_count, preferred_floor)['total']
+                self.assertGreater((scores == expected[-1][1]).sum(), 1)
+
+    def test_group_floor_points_rank_as_the_reference_scorer(self):
+        floor_points = {1: 20, 3: 10}
+        top = self._scorer(self.rooms).top_k(8, None, k=5, floor_points=floor_points)
+        self.assertEqual(self._actual(self.rooms, top), self._expected(self.rooms, 8, None, floor_points))
+
+    def test_amenity_filter_matches_the_room_flags(self):
+        scorer = self._scorer(self.rooms)
+        for size in range(4):
+            amenities = [key for key, _, _ in AMENITIES[:size]]
+            with self.subTest(required_amenities=amenities):
+                fields = [field for _, field, _ in AMENITIES[:size]]
+                matching = [room for room in self.rooms if all(getattr(room, field) for field in fields)]
+                mask = scorer.has_amenities(Room.amenity_mask_for(amenities))
+                self.assertEqual([room for room, keep in zip(self.rooms, mask) if keep], matching)
+
+                top = self._scorer(matching).top_k(8, 2, k=5)
+                self.assertEqual(self._actual(matching, top), self._expected(matching, 8, 2))
+
+    @override_settings(RECOMMENDATION_POOL_WORKERS=3, RECOMMENDATION_POOL_MIN_ROOMS=1)
+    def test_process_pool_ranks_as_the_reference_scorer(self):
+        # Three shards, with tied rooms on either side of every boundary
+        for amenities in ([], ['projector', 'whiteboard']):
+            with self.subTest(required_amenities=amenities):
+                mask = self._scorer(self.rooms).has_amenities(Room.amenity_mask_for(amenities))
+                rooms = [room for room, keep in zip(self.rooms, mask) if keep]
+                top = ParallelRoomScorer.top_k(self._scorer(rooms), 8, 2, k=5)
+                self.assertEqual(self._actual(rooms, top), self._expected(rooms, 8, 2))
+
+    async def test_async_process_pool_leaves_the_event_loop_running(self):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker = asyncio.create_task(tick())
+        with self.settings(RECOMMENDATION_POOL_MIN_ROOMS=1):
+            top = await ParallelRoomScorer.atop_k(self._scorer(self.rooms), 8, 2, k=5, workers=3)
+        ticker.cancel()
+        # A blocking wait on the shards would not let the ticker start
+        self.assertGreater(ticks, 0)
+        self.assertEqual(self._actual(self.rooms, top), self._expected(self.rooms, 8, 2))
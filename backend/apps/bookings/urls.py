@@ -20,12 +20,21 @@ URL routing for bookings app
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BookingViewSet, UserRoomPreferenceViewSet
+from .views import (
+    BookingSeriesViewSet,
+    BookingViewSet,
+    UserRoomPreferenceViewSet,
+    availability_grid_async,
+    recommend_async,
+)
 
 router = DefaultRouter()
 router.register(r'bookings', BookingViewSet, basename='booking')
+router.register(r'series', BookingSeriesViewSet, basename='booking-series')
 router.register(r'preferences', UserRoomPreferenceViewSet, basename='preference')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/recommend/', recommend_async, name='booking-recommend-async'),
+    path('async/availability-grid/', availability_grid_async, name='booking-availability-grid-async'),
 ]
\ No newline at end of file
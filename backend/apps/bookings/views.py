@@ -1,14 +1,359 @@
 """Views for bookings app"""
 
-from rest_framework import viewsets, status
+from rest_framework import exceptions, viewsets, status
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import json
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 
-from .models import Booking, UserRoomPreference
-from .serializers import BookingSerializer, UserRoomPreferenceSerializer
+from apps.floors.models import Room
+from .models import Booking, BookingSeries, UserRoomPreference
+from .pagination import BookingCursorPagination
+from .serializers import BookingConflict, BookingSerializer, BookingSeriesSerializer, UserRoomPreferenceSerializer
+from .services.availability_grid import AvailabilityGrid, SLOT_MINUTES, SLOTS_PER_DAY
+from .services.batch_recommender import BatchRecommendationService
+from .services.booking_export import EXPORT_FORMATS, BookingExport
+from .services.booking_series import BookingSeriesService, SeriesConflict
+from .services.recommendation_cache import recommendation_cache
 from .services.recommendation_engine import RoomRecommendationEngine
+from .services.recurrence import RecurrenceError, expand_occurrences
+from .services.recurring_bookings import RecurringBookingService
+from .services.slot_finder import EarliestSlotFinder
+
+MAX_GRID_DAYS = 31
+MAX_SLOT_HORIZON = timedelta(days=31)
+MAX_SLOT_RESULTS = 50
+MAX_BATCH_MEETINGS = 500
+MAX_ATTENDEES = 500
+MAX_SERIES_WINDOW_DAYS = 366
+# Bounds of a recurring booking rule: the interval (as for series), and how
+# far past the first occurrence `until` may reach
+MAX_RECURRENCE_INTERVAL = 52
+MAX_RECURRENCE_SPAN = timedelta(days=366)
+
+NEAR_ROOM_FIELDS = ("floor_plan_id", "location_x", "location_y")
+NEAR_ROOM_ERROR = "near_room_id must be an existing room id"
+AMENITIES_ERROR = "required_amenities must be a list of amenity names"
+
+
+def _parse_amenities(value) -> Tuple[Optional[List[str]], Optional[str]]:
+    """required_amenities as a list of known amenity keys (missing or null: none), or an error message"""
+    if value is None:
+        return [], None
+    if not isinstance(value, list) or not all(isinstance(amenity, str) for amenity in value):
+        return None, AMENITIES_ERROR
+    try:
+        Room.amenity_mask_for(value)
+    except ValueError as error:
+        return None, str(error)
+    return value, None
+
+
+def _parse_meeting(data) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    FEATURE 3: the meeting fields of a recommend request (participants,
+    window, amenities, preferred floor), or an error message; shared by
+    the single and the batch endpoint
+    """
+    raw_participants = data.get("participants_count", 1)
+
+    start_time_str = data.get("start_time")
+    end_time_str = data.get("end_time")
+
+    try:
+        participants_count = int(raw_participants)
+    except (TypeError, ValueError):
+        return None, "participants_count must be an integer"
+
+    # Both feed the cache key, so they must be hashable
+    required_amenities, error = _parse_amenities(data.get("required_amenities"))
+    if error:
+        return None, error
+    preferred_floor = data.get("preferred_floor")
+    if preferred_floor is not None:
+        try:
+            preferred_floor = int(preferred_floor)
+        except (TypeError, ValueError):
+            return None, "preferred_floor must be an integer"
+
+    try:
+        start_time = datetime.fromisoformat(start_time_str.replace("Z", "+00:00"))
+        end_time = datetime.fromisoformat(end_time_str.replace("Z", "+00:00"))
+    except Exception:
+        return None, "Invalid datetime format"
+
+    return {
+        "participants_count": participants_count,
+        "start_time": start_time,
+        "end_time": end_time,
+        "required_amenities": required_amenities,
+        "preferred_floor": preferred_floor,
+    }, None
+
+
+def _parse_recommend_request(data) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    FEATURE 3: recommend arguments from a request body, or an error message
+
+    near_room_id is validated but not looked up, so sync and async views
+    can each resolve it with their own query.
+    """
+    meeting, error = _parse_meeting(data)
+    if error:
+        return None, error
+
+    # Optional proximity anchor: a room (e.g. the elevator or someone's
+    # desk) or a point {"floor_plan": id, "x": ..., "y": ...}
+    near_location = None
+    near_room_id = data.get("near_room_id")
+    near = data.get("near")
+    if near_room_id is not None:
+        try:
+            near_room_id = int(near_room_id)
+        except (TypeError, ValueError):
+            return None, NEAR_ROOM_ERROR
+    elif near is not None:
+        try:
+            near_location = (int(near["floor_plan"]), float(near["x"]), float(near["y"]))
+        except (TypeError, ValueError, KeyError):
+            return None, "near must be an object with floor_plan, x and y"
+
+    # Optional group mode: combine the attendees' preferences (and, with
+    # use_attendee_floors, their home floors)
+    attendee_ids = data.get("attendee_ids") or []
+    try:
+        if not isinstance(attendee_ids, list):
+            raise TypeError
+        attendee_ids = sorted({int(attendee_id) for attendee_id in attendee_ids})
+    except (TypeError, ValueError):
+        return None, "attendee_ids must be a list of user ids"
+    if len(attendee_ids) > MAX_ATTENDEES:
+        return None, f"At most {MAX_ATTENDEES} attendees are supported"
+
+    start_time, end_time = recommendation_cache.normalize_window(meeting["start_time"], meeting["end_time"])
+    return {
+        **meeting,
+        "start_time": start_time,
+        "end_time": end_time,
+        "near_room_id": near_room_id,
+        "near_location": near_location,
+        "attendee_ids": attendee_ids,
+        "use_attendee_floors": bool(data.get("use_attendee_floors", False)),
+    }, None
+
+
+def _engine_arguments(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: value for name, value in arguments.items() if name != "near_room_id"}
+
+
+def _recommendation_cache_key(user, arguments: Dict[str, Any]):
+    return recommendation_cache.make_key(
+        user.id if user else None,
+        arguments["participants_count"],
+        arguments["start_time"],
+        arguments["end_time"],
+        arguments["required_amenities"],
+        arguments["preferred_floor"],
+        arguments["near_location"],
+        tuple(arguments["attendee_ids"]),
+        arguments["use_attendee_floors"],
+    )
+
+
+def _serialize_recommendations(recommendations):
+    data = []
+    for rec in recommendations:
+        room_data = {
+            "id": rec["room"].id,
+            "name": rec["room"].name,
+            "capacity": rec["room"].capacity,
+            "floor_number": rec["room"].floor_plan.floor_number,
+            "amenities": rec["room"].amenities_list,
+            "score": rec["score"],
+            "score_breakdown": rec["score_breakdown"],
+        }
+        data.append(room_data)
+    return data
+
+
+def _parse_availability_grid_request(params) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """FEATURE 3: availability grid query parameters, or an error message"""
+    try:
+        floor_number = int(params.get("floor"))
+        start_date = date.fromisoformat(params.get("start_date"))
+        end_date = date.fromisoformat(params.get("end_date") or params.get("start_date"))
+        window_start = time.fromisoformat(params.get("from", "00:00"))
+        window_end = time.fromisoformat(params["to"]) if params.get("to") else None
+    except (TypeError, ValueError):
+        return None, "floor, start_date (YYYY-MM-DD) are required; end_date, from and to (HH:MM) are optional"
+
+    days = (end_date - start_date).days + 1
+    if days < 1 or days > MAX_GRID_DAYS:
+        return None, f"Date range must cover 1 to {MAX_GRID_DAYS} days"
+
+    start_slot = (window_start.hour * 60 + window_start.minute) // SLOT_MINUTES
+    end_slot = (
+        -(-(window_end.hour * 60 + window_end.minute) // SLOT_MINUTES)
+        if window_end else SLOTS_PER_DAY
+    )
+    if end_slot <= start_slot:
+        return None, "'to' must be after 'from'"
+
+    return {
+        "floor": floor_number,
+        "start_date": start_date,
+        "end_date": end_date,
+        "start_slot": start_slot,
+        "end_slot": end_slot,
+    }, None
+
+
+def _serialize_availability_grid(grid: AvailabilityGrid, params: Dict[str, Any]) -> Dict[str, Any]:
+    start_slot, end_slot = params["start_slot"], params["end_slot"]
+    return {
+        "floor": params["floor"],
+        "slot_minutes": SLOT_MINUTES,
+        "first_slot": start_slot,
+        "dates": [day.isoformat() for day in grid.dates],
+        "rooms": [
+            {
+                "id": room.id,
+                "name": room.name,
+                "capacity": room.capacity,
+                "slots": [
+                    AvailabilityGrid.to_slot_string(grid.free_mask(room.id, day_index), start_slot, end_slot)
+                    for day_index in range(len(grid.dates))
+                ],
+            }
+            for room in grid.rooms
+        ],
+        # Rooms free for the whole from-to window, per date
+        "free_for_window": [
+            grid.free_room_ids(day_index, start_slot, end_slot)
+            for day_index in range(len(grid.dates))
+        ],
+    }
+
+
+def _parse_recurring_request(data) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    FEATURE 3: recurring booking arguments from a request body, or an error
+    message; the recurrence is expanded here, so an invalid rule is a 400
+    """
+    try:
+        room_id = int(data.get("room"))
+        participants_count = int(data.get("participants_count", 1))
+    except (TypeError, ValueError):
+        return None, "room and participants_count must be integers"
+    if participants_count < 1:
+        return None, "participants_count must be at least 1"
+
+    try:
+        start_time = datetime.fromisoformat(data["start_time"].replace("Z", "+00:00"))
+        end_time = datetime.fromisoformat(data["end_time"].replace("Z", "+00:00"))
+    except Exception:
+        return None, "Invalid datetime format"
+    if timezone.is_naive(start_time):
+        start_time = timezone.make_aware(start_time)
+    if timezone.is_naive(end_time):
+        end_time = timezone.make_aware(end_time)
+
+    # {"frequency": "DAILY" | "WEEKLY", "interval": 1, "count": n or
+    # "until": "YYYY-MM-DD", "weekdays": [0-6], "exceptions": ["YYYY-MM-DD"]}
+    recurrence = data.get("recurrence")
+    if not isinstance(recurrence, dict):
+        return None, "recurrence must be an object"
+    try:
+        count = recurrence.get("count")
+        until = recurrence.get("until")
+        rule = {
+            "frequency": str(recurrence.get("frequency", "")).upper(),
+            "interval": int(recurrence.get("interval", 1)),
+            "count": None if count is None else int(count),
+            "until": None if until is None else date.fromisoformat(until),
+            "weekdays": [int(weekday) for weekday in recurrence.get("weekdays") or []],
+            "exceptions": [date.fromisoformat(day) for day in recurrence.get("exceptions") or []],
+        }
+    except (TypeError, ValueError):
+        return None, "Invalid recurrence: interval, count and weekdays are integers, until and exceptions ISO dates"
+    if not 1 <= rule["interval"] <= MAX_RECURRENCE_INTERVAL:
+        return None, f"interval must be between 1 and {MAX_RECURRENCE_INTERVAL}"
+    # Checked before expanding: a far-off until with few matching dates
+    # would otherwise walk every day up to it
+    if rule["until"] is not None and rule["until"] > timezone.localtime(start_time).date() + MAX_RECURRENCE_SPAN:
+        return None, f"until must be at most {MAX_RECURRENCE_SPAN.days} days after the first occurrence"
+
+    try:
+        occurrences = expand_occurrences(start_time, end_time, **rule)
+    except RecurrenceError as error:
+        return None, str(error)
+    if not occurrences:
+        return None, "The recurrence has no occurrences"
+
+    return {
+        "room_id": room_id,
+        "occurrences": occurrences,
+        "participants_count": participants_count,
+        "purpose": str(data.get("purpose", "")),
+        "skip_conflicts": bool(data.get("skip_conflicts", False)),
+    }, None
+
+
+def _serialize_recurring_results(results) -> Dict[str, Any]:
+    return {
+        "created": sum(1 for result in results if result["booking"]),
+        "conflicts": sum(1 for result in results if result["conflicts"]),
+        "occurrences": [
+            {
+                "start_time": result["start_time"],
+                "end_time": result["end_time"],
+                "booking_id": result["booking"].id if result["booking"] else None,
+                # Booking ids, then ids of the series (stored negated)
+                "conflicts_with": [conflict for conflict in result["conflicts"] if conflict > 0],
+                "conflicts_with_series": [-conflict for conflict in result["conflicts"] if conflict < 0],
+            }
+            for result in results
+        ],
+    }
+
+
+def _parse_booking_filters(params) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Queryset filters for the booking list: room, floor (floor plan id) and
+    start_date/end_date (bookings starting on those dates, inclusive), all
+    optional. Date bounds are on start_time, so with a room they fall on the
+    (room, start_time, end_time) index, and without one on (start_time, id).
+    """
+    filters: Dict[str, Any] = {}
+    try:
+        if params.get("room"):
+            filters["room_id"] = int(params["room"])
+        if params.get("floor"):
+            filters["room__floor_plan_id"] = int(params["floor"])
+    except ValueError:
+        return None, "room and floor must be integers"
+
+    try:
+        start_date = date.fromisoformat(params["start_date"]) if params.get("start_date") else None
+        end_date = date.fromisoformat(params["end_date"]) if params.get("end_date") else None
+    except ValueError:
+        return None, "start_date and end_date must be ISO dates (YYYY-MM-DD)"
+    if start_date and end_date and end_date < start_date:
+        return None, "end_date must not be before start_date"
+    if start_date:
+        filters["start_time__gte"] = timezone.make_aware(datetime.combine(start_date, time.min))
+    if end_date:
+        filters["start_time__lt"] = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+
+    return filters, None
 
 
 class BookingViewSet(viewsets.ModelViewSet):
@@ -17,66 +362,348 @@ class BookingViewSet(viewsets.ModelViewSet):
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = BookingCursorPagination
 
     def get_queryset(self):
         """Admins see all bookings; employees see only their own."""
         user = self.request.user
+        # room_name and user_username are serialized for every row
+        bookings = Booking.objects.select_related("room", "user")
         if user.is_staff:
-            return Booking.objects.all()
-        return Booking.objects.filter(user=user)
+            return bookings
+        return bookings.filter(user=user)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Bookings newest first, a page at a time (see BookingCursorPagination):
+        one query per page, with rooms and users joined in.
+        """
+        filters, error = _parse_booking_filters(request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        page = self.paginate_queryset(self.get_queryset().filter(**filters))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream the bookings matching the list filters, oldest first, as CSV
+        or NDJSON (type=csv|ndjson) with room, floor and user columns.
+        """
+        filters, error = _parse_booking_filters(request.query_params)
+        export_type = request.query_params.get("type", "csv")
+        if error is None and export_type not in EXPORT_FORMATS:
+            error = f"type must be one of {', '.join(EXPORT_FORMATS)}"
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        export = BookingExport(self.get_queryset().filter(**filters), export_type)
+        # Under ASGI a synchronous iterator would be read to the end before
+        # the first byte is sent
+        content = export.astream() if isinstance(request._request, ASGIRequest) else export.stream()
+        response = StreamingHttpResponse(content, content_type=export.content_type)
+        response["Content-Disposition"] = f'attachment; filename="bookings.{export_type}"'
+        return response
 
     @action(detail=False, methods=["post"], permission_classes=[AllowAny])
     def recommend(self, request):
         """FEATURE 3: Get room recommendations (open for demo)."""
-        raw_participants = request.data.get("participants_count", 1)
+        arguments, error = _parse_recommend_request(request.data)
+        if error is None and arguments["near_room_id"] is not None:
+            try:
+                arguments["near_location"] = Room.objects.values_list(*NEAR_ROOM_FIELDS).get(
+                    pk=arguments["near_room_id"]
+                )
+            except Room.DoesNotExist:
+                error = NEAR_ROOM_ERROR
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # For demo, we allow anonymous recommend calls. In production you would
+        # likely require authentication and pass the real user here.
+        user = request.user if request.user and request.user.is_authenticated else None
+
+        # Identical requests arrive in bursts from the booking form: serve
+        # them from the cache, keyed on the minute-widened window
+        recommendations = recommendation_cache.get_or_compute(
+            _recommendation_cache_key(user, arguments),
+            lambda: RoomRecommendationEngine.recommend_rooms(user=user, **_engine_arguments(arguments)),
+        )
+
+        return Response(_serialize_recommendations(recommendations))
+
+    @action(detail=False, methods=["post"])
+    def batch_recommend(self, request):
+        """FEATURE 3: Assign rooms to many meetings at once with no conflicts between them."""
+        raw_meetings = request.data.get("meetings")
+        if not isinstance(raw_meetings, list) or not 0 < len(raw_meetings) <= MAX_BATCH_MEETINGS:
+            return Response(
+                {"error": f"meetings must be a list of 1 to {MAX_BATCH_MEETINGS} requests"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        start_time_str = request.data.get("start_time")
-        end_time_str = request.data.get("end_time")
-        required_amenities = request.data.get("required_amenities", [])
-        preferred_floor = request.data.get("preferred_floor")
+        meetings = []
+        for index, raw in enumerate(raw_meetings):
+            meeting, error = _parse_meeting(raw) if isinstance(raw, dict) else (None, "must be an object")
+            if error:
+                return Response(
+                    {"error": f"Invalid meeting at index {index}: {error}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            for name in ("start_time", "end_time"):
+                if timezone.is_naive(meeting[name]):
+                    meeting[name] = timezone.make_aware(meeting[name])
+            meetings.append(meeting)
+            if meetings[-1]["start_time"] >= meetings[-1]["end_time"]:
+                return Response(
+                    {"error": f"Meeting at index {index} must end after it starts"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        assignments = BatchRecommendationService.assign(request.user, meetings)
+
+        data = []
+        for index, (meeting, assignment) in enumerate(zip(meetings, assignments)):
+            entry = {
+                "index": index,
+                "start_time": meeting["start_time"],
+                "end_time": meeting["end_time"],
+                "room": None,
+            }
+            if assignment:
+                room = assignment["room"]
+                entry.update({
+                    "room": {
+                        "id": room.id,
+                        "name": room.name,
+                        "capacity": room.capacity,
+                        "floor_number": room.floor_plan.floor_number,
+                        "amenities": room.amenities_list,
+                    },
+                    "score": assignment["score"],
+                    "score_breakdown": assignment["score_breakdown"],
+                })
+            data.append(entry)
+
+        return Response({
+            "assigned": sum(1 for assignment in assignments if assignment),
+            "unassigned": sum(1 for assignment in assignments if not assignment),
+            "results": data,
+        })
+
+    @action(detail=False, methods=["post"], permission_classes=[AllowAny])
+    def earliest_slots(self, request):
+        """FEATURE 3: Earliest (room, start_time) pairs that fit a meeting within a search horizon."""
+        required_amenities, error = _parse_amenities(request.data.get("required_amenities"))
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        horizon_start_str = request.data.get("horizon_start")
 
         try:
-            participants_count = int(raw_participants)
+            participants_count = int(request.data.get("participants_count", 1))
+            duration = timedelta(minutes=int(request.data.get("duration_minutes", 60)))
+            horizon = timedelta(days=int(request.data.get("horizon_days", 14)))
+            limit = int(request.data.get("limit", 5))
         except (TypeError, ValueError):
             return Response(
-                {"error": "participants_count must be an integer"},
+                {"error": "participants_count, duration_minutes, horizon_days and limit must be integers"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         try:
-            start_time = datetime.fromisoformat(start_time_str.replace("Z", "+00:00"))
-            end_time = datetime.fromisoformat(end_time_str.replace("Z", "+00:00"))
+            horizon_start = (
+                datetime.fromisoformat(horizon_start_str.replace("Z", "+00:00"))
+                if horizon_start_str else timezone.now()
+            )
         except Exception:
             return Response({"error": "Invalid datetime format"}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(horizon_start):
+            horizon_start = timezone.make_aware(horizon_start)
 
-        # For demo, we allow anonymous recommend calls. In production you would
-        # likely require authentication and pass the real user here.
-        user = request.user if request.user and request.user.is_authenticated else None
+        if duration <= timedelta(0) or not timedelta(0) < horizon <= MAX_SLOT_HORIZON or not 0 < limit <= MAX_SLOT_RESULTS:
+            return Response(
+                {"error": f"duration_minutes must be positive, horizon_days at most {MAX_SLOT_HORIZON.days} "
+                          f"and limit at most {MAX_SLOT_RESULTS}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        recommendations = RoomRecommendationEngine.recommend_rooms(
-            user=user,
+        slots = EarliestSlotFinder.find(
             participants_count=participants_count,
-            start_time=start_time,
-            end_time=end_time,
+            duration=duration,
+            horizon_start=horizon_start,
+            horizon_end=horizon_start + horizon,
             required_amenities=required_amenities,
-            preferred_floor=preferred_floor,
+            limit=limit,
         )
 
         data = []
-        for rec in recommendations:
-            room_data = {
-                "id": rec["room"].id,
-                "name": rec["room"].name,
-                "capacity": rec["room"].capacity,
-                "floor_number": rec["room"].floor_plan.floor_number,
-                "amenities": rec["room"].amenities_list,
-                "score": rec["score"],
-                "score_breakdown": rec["score_breakdown"],
-            }
-            data.append(room_data)
+        for slot in slots:
+            room = slot["room"]
+            data.append({
+                "id": room.id,
+                "name": room.name,
+                "capacity": room.capacity,
+                "floor_number": room.floor_plan.floor_number,
+                "amenities": room.amenities_list,
+                "start_time": slot["start_time"],
+                "end_time": slot["end_time"],
+            })
 
         return Response(data)
 
+    @action(detail=False, methods=["get"])
+    def availability_grid(self, request):
+        """FEATURE 3: Rooms x 15-minute slots free/busy grid for a floor and date range."""
+        params, error = _parse_availability_grid_request(request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        grid = AvailabilityGrid.for_floor(params["floor"], params["start_date"], params["end_date"])
+        return Response(_serialize_availability_grid(grid, params))
+
+    @action(detail=False, methods=["post"])
+    def recurring(self, request):
+        """
+        FEATURE 3: Book a room for every occurrence of a daily or weekly series
+        in one request. Conflicts are reported per occurrence; nothing is
+        booked when any occurrence conflicts unless skip_conflicts is set.
+        """
+        arguments, error = _parse_recurring_request(request.data)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        room = Room.objects.filter(pk=arguments.pop("room_id")).first()
+        if room is None:
+            return Response({"error": "room must be an existing room id"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results = RecurringBookingService.book(request.user, room, **arguments)
+        except IntegrityError as error:
+            if not Booking.is_overlap_error(error):
+                raise
+            raise BookingConflict() from error
+
+        data = _serialize_recurring_results(results)
+        return Response(data, status=status.HTTP_201_CREATED if data["created"] else status.HTTP_409_CONFLICT)
+
+
+def _parse_occurrence_window(params) -> Tuple[Optional[Tuple[date, date]], Optional[str]]:
+    """FEATURE 3: start_date/end_date of a series occurrence listing (the next 30 days by default)"""
+    try:
+        start_date = date.fromisoformat(params["start_date"]) if params.get("start_date") else timezone.localdate()
+        end_date = (
+            date.fromisoformat(params["end_date"]) if params.get("end_date") else start_date + timedelta(days=30)
+        )
+    except ValueError:
+        return None, "start_date and end_date must be ISO dates (YYYY-MM-DD)"
+    if end_date < start_date:
+        return None, "end_date must not be before start_date"
+    if (end_date - start_date).days >= MAX_SERIES_WINDOW_DAYS:
+        return None, f"At most {MAX_SERIES_WINDOW_DAYS} days at a time"
+    return (start_date, end_date), None
+
+
+def _parse_occurrence_date(data) -> Tuple[Optional[date], Optional[str]]:
+    try:
+        return date.fromisoformat(data["date"]), None
+    except (KeyError, TypeError, ValueError):
+        return None, "date must be the ISO date (YYYY-MM-DD) of an occurrence"
+
+
+def _parse_move_request(data) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """FEATURE 3: where and when a series occurrence moves to, or an error message"""
+    day, error = _parse_occurrence_date(data)
+    if error:
+        return None, error
+    try:
+        start_time = datetime.fromisoformat(data["start_time"].replace("Z", "+00:00"))
+        end_time = datetime.fromisoformat(data["end_time"].replace("Z", "+00:00"))
+    except Exception:
+        return None, "Invalid datetime format"
+    if timezone.is_naive(start_time):
+        start_time = timezone.make_aware(start_time)
+    if timezone.is_naive(end_time):
+        end_time = timezone.make_aware(end_time)
+    if start_time >= end_time:
+        return None, "End time must be after start time"
+    try:
+        room_id = None if data.get("room") is None else int(data["room"])
+    except (TypeError, ValueError):
+        return None, "room must be an integer"
+    return {"day": day, "start_time": start_time, "end_time": end_time, "room_id": room_id}, None
+
+
+class BookingSeriesViewSet(viewsets.ModelViewSet):
+    """
+    FEATURE 3: Open-ended recurring bookings, stored as a rule and expanded on
+    read. Single occurrences are cancelled or moved with overrides.
+    """
+
+    queryset = BookingSeries.objects.all()
+    serializer_class = BookingSeriesSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Admins see all series; employees see only their own."""
+        series = BookingSeries.objects.select_related("room", "user")
+        if self.request.user.is_staff:
+            return series
+        return series.filter(user=self.request.user)
+
+    @action(detail=True, methods=["get"])
+    def occurrences(self, request, pk=None):
+        """Occurrences between start_date and end_date, with their overrides applied."""
+        window, error = _parse_occurrence_window(request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        series = self.get_object()
+        return Response({
+            "series": series.id,
+            "occurrences": BookingSeriesService.occurrences(series, *window),
+        })
+
+    @action(detail=True, methods=["post"])
+    def cancel_occurrence(self, request, pk=None):
+        """Skip the occurrence on date; the rest of the series is unchanged."""
+        day, error = _parse_occurrence_date(request.data)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            override = BookingSeriesService.cancel_occurrence(self.get_object(), day)
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(BookingSerializer(override).data)
+
+    @action(detail=True, methods=["post"])
+    def move_occurrence(self, request, pk=None):
+        """Move the occurrence on date to start_time-end_time, optionally in another room."""
+        arguments, error = _parse_move_request(request.data)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        room = None
+        if arguments["room_id"] is not None:
+            room = Room.objects.filter(pk=arguments["room_id"]).first()
+            if room is None:
+                return Response({"error": "room must be an existing room id"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            override = BookingSeriesService.move_occurrence(
+                self.get_object(), arguments["day"], arguments["start_time"], arguments["end_time"], room
+            )
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        except SeriesConflict as error:
+            raise BookingConflict("This room is booked by a recurring series at the selected time") from error
+        except IntegrityError as error:
+            if not Booking.is_overlap_error(error):
+                raise
+            raise BookingConflict() from error
+        return Response(BookingSerializer(override).data)
+
 
 class UserRoomPreferenceViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = UserRoomPreference.objects.all()
@@ -84,4 +711,83 @@ class UserRoomPreferenceViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return UserRoomPreference.objects.filter(user=self.request.user)
\ No newline at end of file
+        return UserRoomPreference.objects.filter(user=self.request.user)
+
+
+# FEATURE 3: Async-native endpoints. Plain Django async views (DRF views are
+# sync-only): under Daphne they await their queries on the event loop
+# instead of holding a worker thread for the whole request.
+
+def _session_user(request):
+    """The authenticated user or None; loading the session is sync in Django 4.2"""
+    return request.user if request.user.is_authenticated else None
+
+
+def _authenticate(request):
+    """
+    (user, error) under DRF's SessionAuthentication, as the sync views
+    authenticate: anonymous callers pass, session users need a CSRF token
+    on unsafe methods
+    """
+    user = request.user
+    if not user.is_active:
+        return None, None
+    try:
+        SessionAuthentication().enforce_csrf(request)
+    except exceptions.PermissionDenied as error:
+        return None, error.detail
+    return user, None
+
+
+async def recommend_async(request):
+    """FEATURE 3: Async twin of BookingViewSet.recommend (POST, open for demo, same CSRF rule)."""
+    if request.method != "POST":
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    user, error = await sync_to_async(_authenticate)(request)
+    if error:
+        return JsonResponse({"detail": error}, status=403)
+    try:
+        data = json.loads(request.body or b"{}")
+        if not isinstance(data, dict):
+            raise ValueError
+    except ValueError:
+        return JsonResponse({"error": "Request body must be a JSON object"}, status=400)
+
+    arguments, error = _parse_recommend_request(data)
+    if error is None and arguments["near_room_id"] is not None:
+        try:
+            arguments["near_location"] = await Room.objects.values_list(*NEAR_ROOM_FIELDS).aget(
+                pk=arguments["near_room_id"]
+            )
+        except Room.DoesNotExist:
+            error = NEAR_ROOM_ERROR
+    if error:
+        return JsonResponse({"error": error}, status=400)
+
+    recommendations = await recommendation_cache.aget_or_compute(
+        _recommendation_cache_key(user, arguments),
+        lambda: RoomRecommendationEngine.arecommend_rooms(user=user, **_engine_arguments(arguments)),
+    )
+
+    return JsonResponse(_serialize_recommendations(recommendations), safe=False)
+
+
+# CSRF is checked by _authenticate, as for the sync twin; Django 4.2's
+# csrf_exempt() would wrap the coroutine in a sync view
+recommend_async.csrf_exempt = True
+
+
+async def availability_grid_async(request):
+    """FEATURE 3: Async twin of BookingViewSet.availability_grid (GET, authenticated)."""
+    if request.method != "GET":
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    if await sync_to_async(_session_user)(request) is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=403)
+
+    params, error = _parse_availability_grid_request(request.GET)
+    if error:
+        return JsonResponse({"error": error}, status=400)
+
+    grid = await AvailabilityGrid.afor_floor(params["floor"], params["start_date"], params["end_date"])
+    return JsonResponse(_serialize_availability_grid(grid, params))
+
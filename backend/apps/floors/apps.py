@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class FloorsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.floors'  # Important: full path
\ No newline at end of file
+    name = 'apps.floors'  # Important: full path
+
+    def ready(self):
+        from . import signals  # noqa: F401  (connects Room signal handlers)
\ No newline at end of file
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:50
+
+from django.db import migrations, models
+
+
+AMENITY_FIELDS = [
+    'has_projector',
+    'has_whiteboard',
+    'has_video_conference',
+    'has_tv_monitor',
+    'has_premium_audio',
+    'has_natural_light',
+    'has_kitchen_access',
+]
+
+
+def backfill_amenity_mask(apps, schema_editor):
+    """Set amenity_mask from the existing has_* booleans, one UPDATE per bit"""
+    Room = apps.get_model('floors', 'Room')
+    for bit, field in enumerate(AMENITY_FIELDS):
+        Room.objects.filter(**{field: True}).update(
+            amenity_mask=models.F('amenity_mask').bitor(1 << bit)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('floors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalroom',
+            name='amenity_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='amenity_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['amenity_mask'], name='floors_room_amenity_fa0429_idx'),
+        ),
+        migrations.RunPython(backfill_amenity_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('floors', '0002_room_amenity_mask'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['updated_at'], name='floors_room_updated_15a30f_idx'),
+        ),
+    ]
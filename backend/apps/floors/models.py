@@ -3,8 +3,12 @@
 Floors app models: FloorPlan, Room, ConflictLog
 """
 
-from django.db import models
+from functools import reduce
+from operator import add
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 from simple_history.models import HistoricalRecords
 
 
@@ -44,6 +48,56 @@ class FloorPlan(models.Model):
         return self.rooms.count()
 
 
+# FEATURE 3: Room amenities as (request key, boolean field, display label).
+# The position in this list is the amenity's bit in Room.amenity_mask.
+AMENITIES = [
+    ('projector', 'has_projector', 'Projector'),
+    ('whiteboard', 'has_whiteboard', 'Whiteboard'),
+    ('video_conference', 'has_video_conference', 'Video Conference'),
+    ('tv_monitor', 'has_tv_monitor', 'TV/Monitor'),
+    ('premium_audio', 'has_premium_audio', 'Premium Audio'),
+    ('natural_light', 'has_natural_light', 'Natural Light'),
+    ('kitchen_access', 'has_kitchen_access', 'Kitchen Access'),
+]
+AMENITY_BITS = {key: 1 << bit for bit, (key, field, label) in enumerate(AMENITIES)}
+AMENITY_FIELDS = {field for key, field, label in AMENITIES}
+
+# Display labels for every possible mask, so amenities_list is a lookup
+AMENITY_LABELS_BY_MASK = tuple(
+    tuple(label for bit, (key, field, label) in enumerate(AMENITIES) if mask & (1 << bit))
+    for mask in range(1 << len(AMENITIES))
+)
+
+
+def amenity_mask_expression():
+    """SQL for Room.compute_amenity_mask, from the stored has_* columns"""
+    return reduce(add, [
+        models.Case(models.When(**{field: True}, then=models.Value(1 << bit)), default=models.Value(0))
+        for bit, (key, field, label) in enumerate(AMENITIES)
+    ])
+
+
+class RoomQuerySet(models.QuerySet):
+    """
+    Queryset updates bypass Room.save, so update() does its work: it moves
+    updated_at (for the room catalog) and, when has_* flags change,
+    recomputes amenity_mask, which amenities_list and amenity filters read.
+    bulk_create and bulk_update callers set amenity_mask themselves.
+    """
+    
+    def update(self, **kwargs):
+        kwargs.setdefault('updated_at', timezone.now())
+        if not AMENITY_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            count = super().update(**kwargs)
+            # A second statement: within one UPDATE the mask would be
+            # computed from the flags as they were before it
+            mask = amenity_mask_expression()
+            self.model._base_manager.using(self.db).exclude(amenity_mask=mask).update(amenity_mask=mask)
+        return count
+
+
 class Room(models.Model):
     """Individual room within a floor plan"""
     
@@ -73,6 +127,10 @@ class Room(models.Model):
     has_natural_light = models.BooleanField(default=False)
     has_kitchen_access = models.BooleanField(default=False)
     
+    # FEATURE 3: Amenity flags packed into one integer (see AMENITIES), kept
+    # in sync with the has_* booleans on save
+    amenity_mask = models.PositiveSmallIntegerField(default=0, editable=False)
+    
     is_active = models.BooleanField(default=True)
     is_under_maintenance = models.BooleanField(default=False)
     
@@ -81,27 +139,67 @@ class Room(models.Model):
     
     history = HistoricalRecords()
     
+    objects = RoomQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['floor_plan', 'room_number']
         indexes = [
             models.Index(fields=['capacity']),
             models.Index(fields=['is_active']),
+            models.Index(fields=['amenity_mask']),
+            models.Index(fields=['updated_at']),
         ]
     
     def __str__(self):
         return f"{self.name} (Cap: {self.capacity})"
     
+    def save(self, *args, **kwargs):
+        self.amenity_mask = self.compute_amenity_mask()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # updated_at always moves so the room catalog picks the change up
+            update_fields = set(update_fields) | {'updated_at'}
+            if AMENITY_FIELDS.intersection(update_fields):
+                update_fields.add('amenity_mask')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+    
+    def compute_amenity_mask(self):
+        """Pack the has_* booleans into a bitmask"""
+        mask = 0
+        for key, field, label in AMENITIES:
+            if getattr(self, field):
+                mask |= AMENITY_BITS[key]
+        return mask
+    
+    @staticmethod
+    def amenity_mask_for(amenities):
+        """
+        Bitmask for a list of amenity keys (e.g. ['projector']); raises
+        ValueError for unknown keys, which would otherwise match every room
+        """
+        mask = 0
+        unknown = []
+        for key in amenities:
+            if key in AMENITY_BITS:
+                mask |= AMENITY_BITS[key]
+            else:
+                unknown.append(key)
+        if unknown:
+            raise ValueError(
+                f"Unknown amenities: {', '.join(map(str, unknown))} "
+                f"(known: {', '.join(AMENITY_BITS)})"
+            )
+        return mask
+    
     @property
     def amenities_list(self):
-        amenities = []
-        if self.has_projector: amenities.append('Projector')
-        if self.has_whiteboard: amenities.append('Whiteboard')
-        if self.has_video_conference: amenities.append('Video Conference')
-        if self.has_tv_monitor: amenities.append('TV/Monitor')
-        if self.has_premium_audio: amenities.append('Premium Audio')
-        if self.has_natural_light: amenities.append('Natural Light')
-        if self.has_kitchen_access: amenities.append('Kitchen Access')
-        return amenities
+        """
+        Labels of the amenities in amenity_mask: flags changed on this
+        instance show once it is saved (queryset updates keep it current
+        too, see RoomQuerySet)
+        """
+        return AMENITY_LABELS_BY_MASK[self.amenity_mask]
 
 
 class ConflictLog(models.Model):
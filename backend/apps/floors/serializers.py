@@ -18,13 +18,14 @@ class RoomSerializer(serializers.ModelSerializer):
             'capacity', 'location_x', 'location_y',
             'has_projector', 'has_whiteboard', 'has_video_conference',
             'has_tv_monitor', 'has_premium_audio', 'has_natural_light',
-            'has_kitchen_access', 'is_active', 'is_under_maintenance',
+            'has_kitchen_access', 'amenity_mask', 'is_active', 'is_under_maintenance',
             'amenities', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'amenity_mask', 'created_at', 'updated_at']
     
     def get_amenities(self, obj):
-        return obj.amenities_list
+        # Labels are looked up from the packed amenity_mask
+        return list(obj.amenities_list)
 
 
 class FloorPlanSerializer(serializers.ModelSerializer):
@@ -0,0 +1,158 @@
+"""
+FEATURE 3: In-process room catalog
+Read-only structured NumPy array with the room attributes hot paths need
+(capacity, amenities, floor, location, flags), one row per room sorted by
+id. Loaded once per worker and refreshed incrementally from
+Room.updated_at (or reloaded whole, see RoomCatalog).
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from ..models import Room
+from .shared_cache import workers_share_cache
+
+
+ROOM_RECORD = np.dtype([
+    ('id', np.int64),
+    ('floor_plan_id', np.int64),
+    ('floor_number', np.int32),
+    ('capacity', np.int32),
+    ('amenity_mask', np.uint8),
+    ('location_x', np.float32),
+    ('location_y', np.float32),
+    ('is_active', np.bool_),
+    ('is_under_maintenance', np.bool_),
+])
+
+ROOM_RECORD_COLUMNS = (
+    'id', 'floor_plan_id', 'floor_plan__floor_number', 'capacity', 'amenity_mask',
+    'location_x', 'location_y', 'is_active', 'is_under_maintenance',
+)
+
+
+class RoomCatalog:
+    """
+    Changed rooms are picked up with one `updated_at >= last sync - overlap`
+    query at most every ROOM_CATALOG_REFRESH_SECONDS; the overlap covers
+    transactions that commit after a later one and writers whose clocks lag.
+    Re-merging a row is harmless. Deletions and floor plan
+    changes do not touch Room.updated_at; they bump a generation counter in
+    the shared cache that makes every process reload the whole catalog.
+    Where that counter does not reach every worker (workers_share_cache),
+    each due refresh reloads the whole catalog instead.
+
+    Readers get an immutable array; refreshes swap in a new one.
+    """
+
+    GENERATION_CACHE_KEY = 'floors:room_catalog:generation'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = np.empty(0, dtype=ROOM_RECORD)
+        self._synced_at: Optional[datetime] = None
+        self._checked_at = 0.0
+        self._generation: Optional[int] = None
+
+    @staticmethod
+    def refresh_interval() -> float:
+        return getattr(settings, 'ROOM_CATALOG_REFRESH_SECONDS', 2)
+
+    @staticmethod
+    def overlap() -> timedelta:
+        return timedelta(seconds=getattr(settings, 'ROOM_CATALOG_OVERLAP_SECONDS', 30))
+
+    @classmethod
+    def _shared_generation(cls) -> int:
+        cache.add(cls.GENERATION_CACHE_KEY, 0, timeout=None)
+        return cache.get(cls.GENERATION_CACHE_KEY, 0)
+
+    @staticmethod
+    def _to_records(rows) -> np.ndarray:
+        records = np.array([tuple(row) for row in rows], dtype=ROOM_RECORD)
+        records.sort(order='id')
+        records.flags.writeable = False
+        return records
+
+    def records(self) -> np.ndarray:
+        """Every room (active or not), sorted by id; refreshed when due"""
+        if time.monotonic() - self._checked_at >= self.refresh_interval():
+            self.refresh()
+        return self._records
+
+    async def arecords(self) -> np.ndarray:
+        """records() for async code; a due refresh runs in a worker thread"""
+        if time.monotonic() - self._checked_at >= self.refresh_interval():
+            await sync_to_async(self.refresh)()
+        return self._records
+
+    def reload(self):
+        """Load the whole catalog with one query"""
+        with self._lock:
+            generation = self._shared_generation()
+            synced_at = Room.objects.aggregate(latest=Max('updated_at'))['latest']
+            self._records = self._to_records(Room.objects.values_list(*ROOM_RECORD_COLUMNS))
+            self._synced_at = synced_at
+            self._generation = generation
+            self._checked_at = time.monotonic()
+
+    def refresh(self):
+        """
+        Merge rooms updated since the last sync, or reload if rooms were
+        deleted (or if other workers' deletions would go unnoticed)
+        """
+        if (
+            not workers_share_cache()
+            or self._generation is None
+            or self._generation != self._shared_generation()
+        ):
+            self.reload()
+            return
+
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if self._synced_at is None:
+                changed = Room.objects.all()
+            else:
+                changed = Room.objects.filter(updated_at__gte=self._synced_at - self.overlap())
+            rows = list(changed.values_list(*ROOM_RECORD_COLUMNS, 'updated_at'))
+            if not rows:
+                return
+
+            self._synced_at = max(self._synced_at or rows[0][-1], max(row[-1] for row in rows))
+            updates = self._to_records(row[:-1] for row in rows)
+            positions = np.searchsorted(self._records['id'], updates['id'])
+            positions = np.minimum(positions, max(len(self._records) - 1, 0))
+            known = (len(self._records) > 0) & (self._records['id'][positions] == updates['id'])
+
+            records = self._records.copy()
+            records[positions[known]] = updates[known]
+            records = np.concatenate([records, updates[~known]])
+            records.sort(order='id')
+            records.flags.writeable = False
+            self._records = records
+
+    def mark_changed(self):
+        """
+        A room was deleted or a floor plan changed: every process reloads
+        on its next refresh
+        """
+        cache.add(self.GENERATION_CACHE_KEY, 0, timeout=None)
+        cache.incr(self.GENERATION_CACHE_KEY)
+        self._checked_at = 0.0
+
+    def expire(self):
+        """A room was saved in this process: pick it up on the next read"""
+        self._checked_at = 0.0
+
+
+# One catalog per worker process
+room_catalog = RoomCatalog()
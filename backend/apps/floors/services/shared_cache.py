@@ -0,0 +1,36 @@
+"""
+FEATURE 3: Shared cache detection
+The in-process structures (booking interval index, recommendation cache,
+room catalog, room locator) hear of writes made by other workers through
+counters in the default cache. That only works when every worker sees the
+same cache, or when there is only one worker.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def cache_is_shared() -> bool:
+    """
+    Whether every process sees the same default cache: not with a
+    per-process (locmem) or no-op (dummy) backend
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def single_process() -> bool:
+    """Whether the site is declared to run in one process (SINGLE_PROCESS_DEPLOYMENT)"""
+    return getattr(settings, 'SINGLE_PROCESS_DEPLOYMENT', False)
+
+
+def workers_share_cache() -> bool:
+    """
+    Whether counters in the default cache reach every worker: a shared
+    backend, or a locmem one in a single-process site (the dummy backend
+    keeps no counters at all)
+    """
+    if isinstance(caches['default'], DummyCache):
+        return False
+    return cache_is_shared() or single_process()
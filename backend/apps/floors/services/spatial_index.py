@@ -0,0 +1,244 @@
+"""
+FEATURE 3: Spatial index over room coordinates
+One uniform grid per floor plan for nearest-k lookups on
+Room.location_x/location_y. Floors are loaded lazily and updated in place
+when a room is saved or deleted, where every worker hears of those writes.
+"""
+
+import heapq
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.core.cache import cache
+
+from ..models import Room
+from .shared_cache import workers_share_cache
+
+
+class FloorGrid:
+    """
+    Rooms of one floor plan bucketed into square cells
+
+    The cell size is picked from the floor's bounding box so that a cell
+    holds a handful of rooms; nearest-k searches then only visit the rings
+    of cells around the query point.
+    """
+
+    ROOMS_PER_CELL = 4
+
+    __slots__ = ('cell_size', 'cells', 'positions', 'bounds')
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Dict[int, Tuple[float, float]]] = {}
+        self.positions: Dict[int, Tuple[float, float]] = {}
+        self.bounds: Optional[List[int]] = None  # min cx, min cy, max cx, max cy
+
+    @classmethod
+    def build(cls, rooms: Iterable[Tuple[int, float, float]]) -> 'FloorGrid':
+        """Grid from (room_id, x, y) rows"""
+        rooms = list(rooms)
+        cell_size = 1.0
+        if rooms:
+            xs = [x for _, x, _ in rooms]
+            ys = [y for _, _, y in rooms]
+            area = max(max(xs) - min(xs), 1.0) * max(max(ys) - min(ys), 1.0)
+            cell_size = math.sqrt(area * cls.ROOMS_PER_CELL / len(rooms))
+
+        grid = cls(cell_size)
+        for room_id, x, y in rooms:
+            grid.add(room_id, x, y)
+        return grid
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def add(self, room_id: int, x: float, y: float):
+        if room_id in self.positions:
+            self.remove(room_id)
+        cx, cy = self._cell(x, y)
+        self.cells.setdefault((cx, cy), {})[room_id] = (x, y)
+        self.positions[room_id] = (x, y)
+        if self.bounds is None:
+            self.bounds = [cx, cy, cx, cy]
+        else:
+            bounds = self.bounds
+            bounds[0], bounds[1] = min(bounds[0], cx), min(bounds[1], cy)
+            bounds[2], bounds[3] = max(bounds[2], cx), max(bounds[3], cy)
+
+    def remove(self, room_id: int):
+        position = self.positions.pop(room_id, None)
+        if position is None:
+            return
+        cell = self._cell(*position)
+        members = self.cells[cell]
+        del members[room_id]
+        if not members:
+            del self.cells[cell]
+
+    def _ring(self, cx: int, cy: int, radius: int) -> Iterable[Tuple[int, int]]:
+        """Cells at Chebyshev distance `radius` from (cx, cy), clipped to the bounds"""
+        min_x, min_y, max_x, max_y = self.bounds
+        if radius == 0:
+            yield cx, cy
+            return
+        for x in range(max(cx - radius, min_x), min(cx + radius, max_x) + 1):
+            if min_y <= cy - radius <= max_y:
+                yield x, cy - radius
+            if min_y <= cy + radius <= max_y:
+                yield x, cy + radius
+        for y in range(max(cy - radius + 1, min_y), min(cy + radius - 1, max_y) + 1):
+            if min_x <= cx - radius <= max_x:
+                yield cx - radius, y
+            if min_x <= cx + radius <= max_x:
+                yield cx + radius, y
+
+    def nearest(
+        self,
+        x: float,
+        y: float,
+        k: int,
+        room_ids: Optional[Set[int]] = None
+    ) -> List[Tuple[float, int]]:
+        """
+        Up to k (distance, room_id) pairs closest to (x, y), nearest first,
+        optionally restricted to room_ids
+        """
+        if k <= 0 or not self.positions:
+            return []
+
+        cx, cy = self._cell(x, y)
+        min_x, min_y, max_x, max_y = self.bounds
+        first = max(min_x - cx, cx - max_x, min_y - cy, cy - max_y, 0)
+        last = max(cx - min_x, max_x - cx, cy - min_y, max_y - cy)
+
+        best: List[Tuple[float, int]] = []  # max-heap of (-distance, -room_id)
+        for radius in range(first, last + 1):
+            for cell in self._ring(cx, cy, radius):
+                members = self.cells.get(cell)
+                if not members:
+                    continue
+                for room_id, (room_x, room_y) in members.items():
+                    if room_ids is not None and room_id not in room_ids:
+                        continue
+                    entry = (-math.hypot(room_x - x, room_y - y), -room_id)
+                    if len(best) < k:
+                        heapq.heappush(best, entry)
+                    elif entry > best[0]:
+                        heapq.heapreplace(best, entry)
+            # Every room in a farther ring is at least radius cells away
+            if len(best) == k and -best[0][0] <= radius * self.cell_size:
+                break
+
+        return sorted((-distance, -room_id) for distance, room_id in best)
+
+
+class RoomLocator:
+    """
+    Process-local grids for every floor plan that has been queried
+
+    Room saves and deletes are applied to loaded grids in place; a
+    generation counter in the shared cache tells other processes to drop
+    their grids and reload them on next use. Where that counter does not
+    reach every worker (workers_share_cache), no grids are kept: each
+    lookup builds its floor's grid with one query.
+    """
+
+    GENERATION_CACHE_KEY = 'floors:room_locator:generation'
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._floors: Dict[int, FloorGrid] = {}
+        self._room_floors: Dict[int, int] = {}
+        self._generation: Optional[int] = None
+
+    def _sync(self):
+        cache.add(self.GENERATION_CACHE_KEY, 0, timeout=None)
+        generation = cache.get(self.GENERATION_CACHE_KEY, 0)
+        if generation != self._generation:
+            with self._lock:
+                self._floors = {}
+                self._room_floors = {}
+                self._generation = generation
+
+    def floor(self, floor_plan_id: int) -> FloorGrid:
+        """Grid of a floor plan, loaded with one query on first use (every use without a shared cache)"""
+        if not workers_share_cache():
+            return self._load(floor_plan_id)
+        self._sync()
+        grid = self._floors.get(floor_plan_id)
+        if grid is None:
+            grid = self._load(floor_plan_id)
+            with self._lock:
+                self._floors[floor_plan_id] = grid
+                for room_id in grid.positions:
+                    self._room_floors[room_id] = floor_plan_id
+        return grid
+
+    @staticmethod
+    def _load(floor_plan_id: int) -> FloorGrid:
+        return FloorGrid.build(
+            Room.objects.filter(floor_plan_id=floor_plan_id).values_list('id', 'location_x', 'location_y')
+        )
+
+    def nearest(
+        self,
+        floor_plan_id: int,
+        x: float,
+        y: float,
+        k: int,
+        room_ids: Optional[Set[int]] = None
+    ) -> List[Tuple[float, int]]:
+        """Up to k (distance, room_id) pairs on the floor plan, nearest first"""
+        grid = self.floor(floor_plan_id)
+        with self._lock:
+            return grid.nearest(x, y, k, room_ids)
+
+    def update_room(self, room_id: int, floor_plan_id: int, x: float, y: float):
+        """A room was created or moved (possibly to another floor plan)"""
+        if not workers_share_cache():
+            self._forget()
+            return
+        with self._lock:
+            previous = self._room_floors.pop(room_id, None)
+            if previous is not None and previous in self._floors:
+                self._floors[previous].remove(room_id)
+            grid = self._floors.get(floor_plan_id)
+            if grid is not None:
+                grid.add(room_id, x, y)
+                self._room_floors[room_id] = floor_plan_id
+            self._publish_change()
+
+    def remove_room(self, room_id: int):
+        if not workers_share_cache():
+            self._forget()
+            return
+        with self._lock:
+            previous = self._room_floors.pop(room_id, None)
+            if previous is not None and previous in self._floors:
+                self._floors[previous].remove(room_id)
+            self._publish_change()
+
+    def _forget(self):
+        """Drop grids kept while workers shared the cache; floor() keeps none now"""
+        with self._lock:
+            self._floors = {}
+            self._room_floors = {}
+            self._generation = None
+
+    def _publish_change(self):
+        cache.add(self.GENERATION_CACHE_KEY, 0, timeout=None)
+        generation = cache.incr(self.GENERATION_CACHE_KEY)
+        if self._generation is not None and generation == self._generation + 1:
+            # Nobody else wrote since our last sync: our grids are current
+            self._generation = generation
+        else:
+            # Another process moved rooms; reload everything on next use
+            self._floors = {}
+            self._room_floors = {}
+            self._generation = generation
+
+
+# One locator per worker process
+room_locator = RoomLocator()
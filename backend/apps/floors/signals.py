@@ -0,0 +1,41 @@
+"""
+Signal handlers for floors app
+Keep the room spatial index and room catalog in step with Room and
+FloorPlan writes
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import FloorPlan, Room
+from .services.room_catalog import room_catalog
+from .services.spatial_index import room_locator
+
+LOCATION_FIELDS = {'floor_plan', 'floor_plan_id', 'location_x', 'location_y'}
+
+
+@receiver(post_save, sender=Room)
+def room_saved(sender, instance, update_fields=None, **kwargs):
+    """Move the room in the spatial index once the write commits"""
+    transaction.on_commit(room_catalog.expire)
+    if update_fields is not None and not LOCATION_FIELDS & set(update_fields):
+        return
+    room_id, floor_plan_id = instance.pk, instance.floor_plan_id
+    x, y = instance.location_x, instance.location_y
+    transaction.on_commit(lambda: room_locator.update_room(room_id, floor_plan_id, x, y))
+
+
+@receiver(post_delete, sender=Room)
+def room_deleted(sender, instance, **kwargs):
+    """Drop the room from the spatial index once the delete commits"""
+    room_id = instance.pk
+    transaction.on_commit(lambda: room_locator.remove_room(room_id))
+    transaction.on_commit(room_catalog.mark_changed)
+
+
+@receiver(post_save, sender=FloorPlan)
+@receiver(post_delete, sender=FloorPlan)
+def floor_plan_changed(sender, **kwargs):
+    """Floor numbers are denormalized into the room catalog: reload it everywhere"""
+    transaction.on_commit(room_catalog.mark_changed)
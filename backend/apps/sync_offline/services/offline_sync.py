@@ -245,7 +245,7 @@ Handles batch synchronization of offline changes
 """
 
 from typing import Dict, List, Any
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.contrib.auth.models import User
 from apps.floors.models import FloorPlan, Room
 from apps.bookings.models import Booking
@@ -448,7 +448,13 @@ class OfflineSyncService:
         """Sync Booking changes"""
         if change_type == 'CREATE':
             change_data['user'] = user
-            booking = Booking.objects.create(**change_data)
+            try:
+                with transaction.atomic():
+                    booking = Booking.objects.create(**change_data)
+            except IntegrityError as error:
+                if not Booking.is_overlap_error(error):
+                    raise
+                return OfflineSyncService._booking_overlap(object_id, change_type)
             return {
                 'status': 'synced',
                 'change': {'model_name': 'Booking', 'object_id': booking.id, 'change_type': 'CREATE'},
@@ -459,7 +465,13 @@ class OfflineSyncService:
             booking = Booking.objects.get(id=object_id, user=user)
             for key, value in change_data.items():
                 setattr(booking, key, value)
-            booking.save()
+            try:
+                with transaction.atomic():
+                    booking.save()
+            except IntegrityError as error:
+                if not Booking.is_overlap_error(error):
+                    raise
+                return OfflineSyncService._booking_overlap(object_id, change_type)
             return {
                 'status': 'synced',
                 'change': {'model_name': 'Booking', 'object_id': object_id, 'change_type': 'UPDATE'}
@@ -476,4 +488,14 @@ class OfflineSyncService:
             'status': 'failed',
             'change': {'model_name': 'Booking', 'object_id': object_id, 'change_type': change_type},
             'error': f'Unsupported change type: {change_type}'
+        }
+    
+    @staticmethod
+    def _booking_overlap(object_id: int, change_type: str) -> Dict[str, Any]:
+        """The database rejected the booking: the room was booked meanwhile"""
+        return {
+            'status': 'conflict',
+            'change': {'model_name': 'Booking', 'object_id': object_id, 'change_type': change_type},
+            'conflicts': ['start_time', 'end_time'],
+            'error': 'This room is already booked for the selected time'
         }
\ No newline at end of file
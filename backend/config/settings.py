@@ -2,6 +2,7 @@
 
 import os
 import sys
+from datetime import datetime, timezone
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -154,4 +155,60 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
     }
-}
\ No newline at end of file
+}
+
+# FEATURE 3: In-process structures (booking interval index, recommendation
+# cache, room catalog, room locator) hear of other workers' writes through
+# the default cache, so they need a shared backend (e.g. Redis). Set this
+# to True to use them with the per-process LocMemCache above when the site
+# runs in a single process.
+SINGLE_PROCESS_DEPLOYMENT = False
+
+# FEATURE 3: In-memory booking interval index (apps.bookings.services.availability_index).
+# Workers sync through a change log in the default cache; without a shared
+# cache (or SINGLE_PROCESS_DEPLOYMENT) the index stays off and availability
+# is read from the database (check bookings.W002).
+BOOKING_INTERVAL_INDEX_ENABLED = False
+BOOKING_INTERVAL_INDEX_LOOKBACK_HOURS = 24
+
+# FEATURE 3: Recommendation result cache (apps.bookings.services.recommendation_cache).
+# Entries are invalidated through generation counters in the default cache,
+# which must therefore be shared by every worker (e.g. Redis). Turn it on
+# with a shared cache or SINGLE_PROCESS_DEPLOYMENT; with the per-process
+# LocMemCache above it would stay off (check bookings.W001).
+RECOMMENDATION_CACHE_ENABLED = False
+RECOMMENDATION_CACHE_MAX_ENTRIES = 1024
+RECOMMENDATION_CACHE_TTL_SECONDS = 60
+
+# FEATURE 3: Collaborative-filtering room affinity (manage.py build_room_affinity)
+ROOM_AFFINITY_DIR = BASE_DIR / 'var' / 'room_affinity'
+ROOM_AFFINITY_RANK = 16
+# How often each worker checks for a new build
+ROOM_AFFINITY_REFRESH_SECONDS = 30
+
+# FEATURE 3: Half-life of UserRoomPreference scores, and the instant their
+# stored weights are relative to. Weights only fit a float for 1000
+# half-lives after the epoch (check bookings.W003); after changing either
+# run manage.py backfill_preference_decay.
+PREFERENCE_HALF_LIFE_DAYS = 30
+PREFERENCE_DECAY_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+# FEATURE 3: Buffer preference increments in memory and upsert them in
+# batches instead of once per booking (apps.bookings.services.preference_buffer)
+PREFERENCE_WRITE_BEHIND = False
+PREFERENCE_WRITE_BEHIND_MAX_PENDING = 500
+PREFERENCE_WRITE_BEHIND_INTERVAL_SECONDS = 5
+
+# FEATURE 3: Opt-in process-pool scoring (apps.bookings.services.parallel_scorer);
+# 0 keeps scoring in-process. See manage.py benchmark_parallel_scoring.
+RECOMMENDATION_POOL_WORKERS = 0
+RECOMMENDATION_POOL_MIN_ROOMS = 50000
+
+# FEATURE 3: In-process room catalog (apps.floors.services.room_catalog):
+# how often each worker checks for changed rooms, and how far back each
+# check looks to catch late commits. See manage.py benchmark_room_catalog.
+# Deletions reach other workers through the default cache; without a shared
+# cache (or SINGLE_PROCESS_DEPLOYMENT) each check reloads the whole catalog,
+# and the room locator builds floor grids per lookup instead of keeping them.
+ROOM_CATALOG_REFRESH_SECONDS = 2
+ROOM_CATALOG_OVERLAP_SECONDS = 30
\ No newline at end of file
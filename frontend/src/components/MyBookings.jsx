@@ -8,16 +8,22 @@ const { Content } = Layout;
 
 function MyBookings() {
   const [bookings, setBookings] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     fetchBookings();
   }, []);
 
-  const fetchBookings = async () => {
+  // The list is paginated with a cursor: `next` is the URL of the following page
+  const fetchBookings = async (url = '/api/bookings/bookings/') => {
+    const append = url !== '/api/bookings/bookings/';
+    setLoading(true);
     try {
-      const response = await api.get('/api/bookings/bookings/');
-      setBookings(response.data.results || response.data);
+      const response = await api.get(url);
+      const results = response.data.results || response.data;
+      setBookings(append ? [...bookings, ...results] : results);
+      setNextPage(response.data.next || null);
     } catch (error) {
       message.error('Failed to fetch bookings');
     } finally {
@@ -53,6 +59,13 @@ function MyBookings() {
             <List
               loading={loading}
               dataSource={bookings}
+              loadMore={nextPage && (
+                <div style={{ textAlign: 'center', marginTop: 12 }}>
+                  <Button onClick={() => fetchBookings(nextPage)} loading={loading}>
+                    Load more
+                  </Button>
+                </div>
+              )}
               renderItem={(booking) => (
                 <List.Item
                   actions={[